@@ -34,6 +34,8 @@ async def set_config(config_update: LLMConfigUpdate):
             weather_location=config_update.weather_location,
             zodiac_sign=config_update.zodiac_sign,
             recommendation_mode_weights=config_update.recommendation_mode_weights,
+            vision_image=config_update.vision_image,
+            vision_image_overrides=config_update.vision_image_overrides,
         )
         return {
             "success": True,
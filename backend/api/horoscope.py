@@ -1,13 +1,21 @@
 """
 星座运势 API
 """
+from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
-from services.horoscope import get_daily_horoscope
-from services.weather import get_weather, normalize_location_request, DEFAULT_LOCATION_QUERY
+from api.http_cache import apply_cache_headers, apply_no_store, is_not_modified, make_etag, not_modified_response
+from services.horoscope import get_daily_horoscope, get_daily_horoscope_version
+from services.weather import (
+    get_weather_with_meta,
+    normalize_location_request,
+    build_geocode_cache_key,
+    build_weather_cache_bucket,
+    DEFAULT_LOCATION_QUERY,
+)
 
 router = APIRouter()
 
@@ -28,8 +36,44 @@ class HoroscopeResponse(BaseModel):
     llm_reasoning: str
 
 
+def _horoscope_cache_validators(
+    version: dict,
+    location: str,
+    include_inference: bool,
+    bucket_start: Optional[str] = None,
+) -> tuple[str, Optional[datetime]]:
+    """
+    运势记录版本 + 天气时间桶（建议文案依赖天气）-> (ETag, Last-Modified)。
+    bucket_start 为生成建议所用天气数据的时间桶，默认取当前时间桶。
+    """
+    bucket_start = bucket_start or build_weather_cache_bucket()
+    etag = make_etag(
+        "horoscope",
+        version["date"],
+        version["zodiac_sign"],
+        version["id"],
+        version["llm_status"],
+        version["updated_at"],
+        include_inference,
+        build_geocode_cache_key(location),
+        bucket_start,
+    )
+    # Last-Modified 取记录更新时间与时间桶起点（本地时间）中较晚者：
+    # 只带 If-Modified-Since 的请求在时间桶切换后不会再拿到旧天气建议的 304
+    last_modified = datetime.strptime(bucket_start, "%Y-%m-%dT%H").astimezone(timezone.utc)
+    try:
+        # SQLite CURRENT_TIMESTAMP 为 UTC
+        updated_at = datetime.fromisoformat(str(version["updated_at"])).replace(tzinfo=timezone.utc)
+        last_modified = max(last_modified, updated_at)
+    except (TypeError, ValueError):
+        pass
+    return etag, last_modified
+
+
 @router.get("/horoscope/daily", response_model=HoroscopeResponse)
 async def get_today_horoscope(
+    request: Request,
+    response: Response,
     location: str = Query(
         default=DEFAULT_LOCATION_QUERY,
         description="城市名 或 经纬度坐标"
@@ -58,12 +102,36 @@ async def get_today_horoscope(
     if validation_error:
         raise HTTPException(status_code=422, detail=validation_error)
 
-    weather = await get_weather(normalized_location)
+    # 条件请求：只读运势记录的版本信息，命中时不请求天气、不执行推理
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        version = await get_daily_horoscope_version(zodiac_sign, include_inference)
+        if version:
+            etag, last_modified = _horoscope_cache_validators(version, normalized_location, include_inference)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+
+    weather, cache_info = await get_weather_with_meta(normalized_location)
     if not weather:
         raise HTTPException(status_code=500, detail="获取天气信息失败")
 
-    return await get_daily_horoscope(
+    result = await get_daily_horoscope(
         weather=weather,
         zodiac_sign=zodiac_sign,
         include_inference=include_inference,
     )
+    # 与 /weather 一致：建议基于旧时间桶天气（stale / fallback）时校验值也对应旧时间桶，
+    # 天气刷新后客户端的条件请求会拿到新建议；模拟天气不发 ETag
+    if not cache_info.bucket_start:
+        apply_no_store(response)
+        return result
+    version = await get_daily_horoscope_version(zodiac_sign, include_inference)
+    if version:
+        etag, last_modified = _horoscope_cache_validators(
+            version, normalized_location, include_inference, cache_info.bucket_start
+        )
+        # 旧时间桶数据不发 Last-Modified：记录更新时间可能晚于当前时间桶起点，
+        # 只带 If-Modified-Since 的请求会一直命中旧建议的 304
+        if cache_info.bucket_start != build_weather_cache_bucket():
+            last_modified = None
+        apply_cache_headers(response, etag, last_modified)
+    return result
@@ -0,0 +1,89 @@
+"""
+HTTP 条件请求（ETag / Last-Modified / 304）辅助函数
+ETag 由调用方从廉价的版本信息（衣柜版本号、天气时间桶、运势记录更新时间）派生，
+命中时在读取数据库和序列化 JSON 之前直接返回 304。
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+# 允许缓存，但每次使用前必须向服务端验证
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# 没有对应缓存时间桶的模拟数据不允许缓存；上游失败时返回的旧数据（fallback）
+# 仍按其所在时间桶发 ETag，上游恢复后条件请求不会命中，客户端随即拿到新数据
+NO_STORE_CACHE_CONTROL = "no-store"
+
+
+def make_etag(*parts: object) -> str:
+    """由若干版本信息生成弱 ETag（响应语义相同即可，不保证字节完全一致）。"""
+    raw = "\x1f".join(str(part) for part in parts)
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def _opaque_tag(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """按弱比较判断 If-None-Match 是否命中。"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    expected = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == expected for candidate in if_none_match.split(","))
+
+
+def format_http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """If-None-Match 优先；没有该请求头时才比较 If-Modified-Since。"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if last_modified is None:
+        return False
+    since = _parse_http_date(request.headers.get("if-modified-since"))
+    if since is None:
+        return False
+    modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+    return modified.replace(microsecond=0) <= since
+
+
+def _cache_headers(etag: str, last_modified: Optional[datetime]) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag, last_modified))
+
+
+def apply_cache_headers(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    response.headers.update(_cache_headers(etag, last_modified))
+
+
+def apply_no_store(response: Response) -> None:
+    """不发送 ETag，避免客户端之后的条件请求一直命中 304 而拿不到恢复后的数据。"""
+    response.headers["Cache-Control"] = NO_STORE_CACHE_CONTROL
@@ -5,7 +5,9 @@ AI穿搭推荐 API 路由
 from fastapi import APIRouter, HTTPException, Query
 from typing import Literal, Optional
 from services.weather import get_weather, normalize_location_request, DEFAULT_LOCATION_QUERY
-from services.recommendation import get_ai_recommendation
+from services.recommendation import get_ai_recommendation, stream_ai_recommendation
+from api.responses import FastJSONResponse, format_sse, sse_response
+from services.outfits import OUTFIT_MAX_K, get_outfit_recommendations
 from pydantic import BaseModel, Field
 
 router = APIRouter()
@@ -29,7 +31,20 @@ class RecommendationResponse(BaseModel):
     mode: str = "balanced"
 
 
-@router.get("/recommendation", response_model=RecommendationResponse)
+class OutfitsResponse(BaseModel):
+    """多套穿搭组合响应"""
+    weather: dict
+    horoscope: Optional[dict] = None
+    temperature_rule: Optional[dict] = None
+    k: int
+    outfits: list[dict] = Field(default_factory=list)
+    purchase_suggestions: list[dict] = Field(default_factory=list)
+    goal_raw: Optional[str] = None
+    goal_normalized: Optional[str] = None
+    mode: str = "balanced"
+
+
+@router.get("/recommendation", response_model=RecommendationResponse, response_class=FastJSONResponse)
 async def get_outfit_recommendation(
     location: str = Query(
         default=DEFAULT_LOCATION_QUERY,
@@ -47,6 +62,7 @@ async def get_outfit_recommendation(
         default="balanced",
         description="推荐模式：balanced / goal_first / wardrobe_first"
     ),
+    bypass_cache: bool = Query(default=False, description="跳过 AI 文案缓存，重新生成"),
 ):
     """
     获取AI穿搭推荐
@@ -76,6 +92,102 @@ async def get_outfit_recommendation(
         zodiac_sign=zodiac_sign,
         goal=goal,
         mode=mode,
+        bypass_cache=bypass_cache,
     )
     
-    return recommendation
+    # 推荐结果（含较长的 Markdown 文案）直接用 orjson 编码，不再经过 response_model 校验与默认编码器
+    return FastJSONResponse(recommendation)
+
+
+@router.get("/recommendation/stream")
+async def stream_outfit_recommendation(
+    location: str = Query(
+        default=DEFAULT_LOCATION_QUERY,
+        description="城市名 或 经纬度坐标(如 '31.23,121.47' 或 '121.47,31.23')"
+    ),
+    city: Optional[str] = Query(default=None, description="城市（结构化查询参数）"),
+    state: Optional[str] = Query(default=None, description="省/州（结构化查询参数）"),
+    country: Optional[str] = Query(default=None, description="国家（结构化查询参数）"),
+    zodiac_sign: Optional[str] = Query(default=None, description="可选，临时指定星座（会覆盖设置中的星座）"),
+    goal: Optional[str] = Query(default=None, description="可选，用户本次穿搭目标/场景"),
+    mode: Literal["balanced", "goal_first", "wardrobe_first"] = Query(
+        default="balanced",
+        description="推荐模式：balanced / goal_first / wardrobe_first"
+    ),
+    bypass_cache: bool = Query(default=False, description="跳过 AI 文案缓存，重新生成"),
+):
+    """
+    流式获取AI穿搭推荐（text/event-stream）
+
+    事件顺序: weather、temperature_rule、horoscope、selection、purchase_suggestions，
+    随后是逐段的 token；LLM 失败时发出 fallback（以其中的规则文本替换已收到的内容），
+    最后是 done（完整文案与来源 llm / cache / fallback / basic）。出错时发出 error 并结束。
+    """
+    normalized_location, validation_error = normalize_location_request(
+        location=location,
+        city=city,
+        state=state,
+        country=country,
+    )
+    if validation_error:
+        raise HTTPException(status_code=422, detail=validation_error)
+
+    weather = await get_weather(normalized_location)
+    if not weather:
+        raise HTTPException(status_code=500, detail="获取天气信息失败")
+
+    async def events():
+        try:
+            async for event, data in stream_ai_recommendation(
+                weather, zodiac_sign=zodiac_sign, goal=goal, mode=mode, bypass_cache=bypass_cache
+            ):
+                yield format_sse(event, data)
+        except Exception as exc:
+            print(f"流式推荐失败: {exc}")
+            yield format_sse("error", {"detail": "生成推荐失败"})
+
+    return sse_response(events())
+
+
+@router.get("/recommendation/outfits", response_model=OutfitsResponse)
+async def get_outfit_combinations(
+    k: int = Query(default=3, ge=1, le=OUTFIT_MAX_K, description="返回的组合数量"),
+    location: str = Query(
+        default=DEFAULT_LOCATION_QUERY,
+        description="城市名 或 经纬度坐标(如 '31.23,121.47' 或 '121.47,31.23')"
+    ),
+    city: Optional[str] = Query(default=None, description="城市（结构化查询参数）"),
+    state: Optional[str] = Query(default=None, description="省/州（结构化查询参数）"),
+    country: Optional[str] = Query(default=None, description="国家（结构化查询参数）"),
+    zodiac_sign: Optional[str] = Query(default=None, description="可选，临时指定星座（会覆盖设置中的星座）"),
+    goal: Optional[str] = Query(default=None, description="可选，用户本次穿搭目标/场景"),
+    mode: Literal["balanced", "goal_first", "wardrobe_first"] = Query(
+        default="balanced",
+        description="推荐模式：balanced / goal_first / wardrobe_first"
+    ),
+):
+    """
+    获取得分最高的 k 套完整穿搭（上装 + 下装 + 鞋履）
+
+    单品得分与 /recommendation 相同，另叠加单品之间的配色与风格协调分；不生成 AI 文案。
+    """
+    normalized_location, validation_error = normalize_location_request(
+        location=location,
+        city=city,
+        state=state,
+        country=country,
+    )
+    if validation_error:
+        raise HTTPException(status_code=422, detail=validation_error)
+
+    weather = await get_weather(normalized_location)
+    if not weather:
+        raise HTTPException(status_code=500, detail="获取天气信息失败")
+
+    return await get_outfit_recommendations(
+        weather,
+        k=k,
+        zodiac_sign=zodiac_sign,
+        goal=goal,
+        mode=mode,
+    )
@@ -0,0 +1,127 @@
+"""
+响应编码：JSON 序列化与压缩
+- 优先使用 orjson 序列化（未安装时回退到标准库 json）；每次请求内容都不同的大响应直接用 FastJSONResponse
+- 超过阈值的响应由中间件压缩；安装 brotli-asgi 后优先 Brotli，否则 GZip
+- 内容只随版本变化的大响应可以预先序列化并压缩一次，之后直接返回字节
+- SSE 事件格式化
+"""
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Mapping, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+RESPONSE_COMPRESSION_ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+RESPONSE_COMPRESSION_MIN_SIZE = max(int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024")), 0)
+RESPONSE_GZIP_LEVEL = min(max(int(os.getenv("RESPONSE_GZIP_LEVEL", "6")), 1), 9)
+RESPONSE_BROTLI_QUALITY = min(max(int(os.getenv("RESPONSE_BROTLI_QUALITY", "4")), 0), 11)
+# SSE 等流式接口不压缩，避免事件被缓冲
+COMPRESSION_EXCLUDED_PATHS = [r".*/events$", r".*/stream$"]
+
+
+def install_compression(app: FastAPI) -> None:
+    if not RESPONSE_COMPRESSION_ENABLED:
+        return
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=RESPONSE_BROTLI_QUALITY,
+            minimum_size=RESPONSE_COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+            excluded_handlers=COMPRESSION_EXCLUDED_PATHS,
+        )
+    else:
+        # text/event-stream 默认不在 GZip 的压缩范围内
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=RESPONSE_COMPRESSION_MIN_SIZE,
+            compresslevel=RESPONSE_GZIP_LEVEL,
+        )
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    用 dumps_json 序列化的 JSON 响应。路由直接返回该响应时，FastAPI 跳过 response_model 校验与
+    jsonable_encoder，response_model 只用于生成文档；内容须为 JSON 兼容的 dict / list。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+@dataclass(frozen=True)
+class EncodedJSON:
+    """预先序列化的 JSON，以及（超过压缩阈值时）其 gzip 压缩结果。"""
+    body: bytes
+    gzip_body: Optional[bytes] = None
+
+
+def encode_json(content: Any) -> EncodedJSON:
+    body = dumps_json(content)
+    gzip_body = None
+    if RESPONSE_COMPRESSION_ENABLED and len(body) >= RESPONSE_COMPRESSION_MIN_SIZE:
+        gzip_body = gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+    return EncodedJSON(body=body, gzip_body=gzip_body)
+
+
+def _accepted_encodings(request: Request) -> set[str]:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().lower().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name)
+    return accepted
+
+
+def encoded_json_response(
+    payload: EncodedJSON,
+    request: Request,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    返回预先编码的 JSON。客户端接受 gzip 时直接发送缓存的压缩字节；
+    启用了 Brotli 且客户端支持 br 时交给中间件压缩。
+    """
+    response_headers = dict(headers or {})
+    if payload.gzip_body is not None:
+        response_headers["Vary"] = "Accept-Encoding"
+        accepted = _accepted_encodings(request)
+        prefers_brotli = BrotliMiddleware is not None and "br" in accepted
+        if not prefers_brotli and ("gzip" in accepted or "*" in accepted):
+            response_headers["Content-Encoding"] = "gzip"
+            return Response(content=payload.gzip_body, media_type="application/json", headers=response_headers)
+    return Response(content=payload.body, media_type="application/json", headers=response_headers)
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    """编码一条 SSE 事件（data 为单行 JSON）。"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps_json(data) + b"\n\n"
+
+
+def sse_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    # X-Accel-Buffering 关闭 nginx 的代理缓冲，保证事件逐条到达
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,37 +1,43 @@
 """
 图片上传 API
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
 from pathlib import Path
-import uuid
+from typing import List
 
-from services.segment import remove_background
-from services.removebg import remove_background_api
-from services.openai_compatible import analyze_clothes_openai
-from storage.config_store import load_config
-from domain.clothes import ClothesSemantics, ClothesCreate, ClothesItem, resolve_category_value
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+
+from services.segment import SegmentationBusyError
+from services import upload_pipeline
+from services.upload_pipeline import (
+    UPLOAD_BATCH_MAX_FILES,
+    UPLOAD_BATCH_SEGMENT_CONCURRENCY,
+    UPLOAD_BATCH_ANALYZE_CONCURRENCY,
+)
+from services.upload_jobs import submit_upload_job, get_upload_job_status, subscribe_upload_job
+from domain.clothes import BatchUploadResponse, ClothesItem
+from domain.jobs import JOB_TERMINAL_STATUSES, UploadJobAccepted, UploadJobStatus
 from storage.db import add_clothes, get_clothes_by_id
 
 router = APIRouter()
 
-# 上传目录
-UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-ALLOWED_CATEGORIES = {"top", "bottom", "shoes", "accessory"}
+# SSE 心跳间隔（秒）
+JOB_EVENTS_HEARTBEAT_SECONDS = 15.0
 
 
 @router.post("/upload", response_model=ClothesItem)
-async def upload_image(file: UploadFile = File(...)):
+async def upload_image(response: Response, file: UploadFile = File(...)):
     """
     上传衣物图片
     
     流程：
     1. 接收图片
-    2. 根据配置使用 rembg 或 remove.bg API 去除背景
-    3. 使用 LLM Vision 进行语义分析
-    4. 保存到数据库
-    5. 返回衣物信息
+    2. 计算图片指纹，重复图片跳过 3、4 直接复用已有结果
+    3. 根据配置使用 rembg 或 remove.bg API 去除背景
+    4. 使用 LLM Vision 进行语义分析
+    5. 保存到数据库
+    6. 返回衣物信息（响应头 X-Upload-Dedup: hit / miss）
     """
     # 验证文件类型
     if not file.content_type or not file.content_type.startswith("image/"):
@@ -41,54 +47,9 @@ async def upload_image(file: UploadFile = File(...)):
         # 读取原始图片
         raw_bytes = await file.read()
         
-        # 加载配置
-        config = load_config()
-        
-        # 根据配置选择背景移除方式
-        if config.bg_removal_method == "removebg" and config.removebg_api_key:
-            # 使用 remove.bg API
-            try:
-                processed_bytes = await remove_background_api(
-                    raw_bytes, 
-                    config.removebg_api_key
-                )
-            except ValueError as e:
-                # 如果 remove.bg 失败，回退到本地处理
-                print(f"⚠️ remove.bg API 失败，回退到本地处理: {e}")
-                processed_bytes = remove_background(raw_bytes)
-        else:
-            # 使用本地 rembg
-            processed_bytes = remove_background(raw_bytes)
-        
-        # 使用 OpenAI 兼容 API 进行语义分析
-        semantics: ClothesSemantics = await analyze_clothes_openai(processed_bytes)
-        
-        # 生成文件名并保存
-        filename = f"{uuid.uuid4()}.png"
-        filepath = UPLOAD_DIR / filename
-        
-        with open(filepath, "wb") as f:
-            f.write(processed_bytes)
-        
-        normalized_category = resolve_category_value(
-            semantics.category,
-            semantics.item,
-            semantics.description,
-        )
-        if normalized_category not in ALLOWED_CATEGORIES:
-            normalized_category = "accessory"
-
-        # 保存到数据库
-        clothes_data = ClothesCreate(
-            category=normalized_category,
-            item=semantics.item,
-            style_semantics=semantics.style_semantics,
-            season_semantics=semantics.season_semantics,
-            usage_semantics=semantics.usage_semantics,
-            color_semantics=semantics.color_semantics,
-            description=semantics.description,
-            image_filename=filename
-        )
+        # 去背景 + 语义分析 + 保存图片；重复图片直接复用已有结果
+        clothes_data, reused = await upload_pipeline.process_raw_image(raw_bytes)
+        response.headers["X-Upload-Dedup"] = "hit" if reused else "miss"
         
         clothes_id = await add_clothes(clothes_data)
         
@@ -99,7 +60,99 @@ async def upload_image(file: UploadFile = File(...)):
         
         return clothes
         
+    except SegmentationBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"图片分析失败: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"服务器错误: {str(e)}")
+
+
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_images_batch(
+    files: List[UploadFile] = File(...),
+    segment_concurrency: int = Query(
+        default=UPLOAD_BATCH_SEGMENT_CONCURRENCY, ge=1, le=8, description="去背景阶段并发数"
+    ),
+    analyze_concurrency: int = Query(
+        default=UPLOAD_BATCH_ANALYZE_CONCURRENCY, ge=1, le=16, description="语义分析阶段并发数"
+    ),
+):
+    """
+    批量上传衣物图片
+    
+    去背景与语义分析两个阶段流水线执行，所有成功条目在一个事务中入库；
+    返回每张图片的处理结果，单张失败不影响其他图片。
+    """
+    if len(files) > UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(status_code=422, detail=f"单次最多上传 {UPLOAD_BATCH_MAX_FILES} 张图片")
+
+    images = [(file.filename or "", file.content_type, await file.read()) for file in files]
+    return await upload_pipeline.run_upload_batch(images, segment_concurrency, analyze_concurrency)
+
+
+@router.post("/upload/jobs", response_model=UploadJobAccepted, status_code=202)
+async def create_upload_job(file: UploadFile = File(...)):
+    """
+    异步上传衣物图片：立即返回任务 ID，后台完成去背景 / 语义分析 / 入库
+    
+    通过 GET /api/upload/jobs/{job_id} 轮询，或订阅 /api/upload/jobs/{job_id}/events (SSE)
+    """
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="只支持图片文件")
+
+    raw_bytes = await file.read()
+    suffix = Path(file.filename or "").suffix.lower() or ".img"
+    job_id = await submit_upload_job(raw_bytes, suffix)
+    return UploadJobAccepted(
+        job_id=job_id,
+        status="queued",
+        status_url=f"/api/upload/jobs/{job_id}",
+        events_url=f"/api/upload/jobs/{job_id}/events",
+    )
+
+
+@router.get("/upload/jobs/{job_id}", response_model=UploadJobStatus)
+async def get_upload_job(job_id: str):
+    """查询异步上传任务状态"""
+    job = await get_upload_job_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+
+def _format_job_event(job: UploadJobStatus) -> str:
+    return f"event: status\ndata: {job.model_dump_json()}\n\n"
+
+
+@router.get("/upload/jobs/{job_id}/events")
+async def stream_upload_job_events(job_id: str):
+    """以 SSE 推送异步上传任务的状态变化，任务结束后关闭连接"""
+    if not await get_upload_job_status(job_id):
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def event_stream():
+        # 先订阅再读取状态，避免错过两者之间发生的变化
+        with subscribe_upload_job(job_id) as notifications:
+            job = await get_upload_job_status(job_id)
+            if not job:
+                return
+            yield _format_job_event(job)
+            while job.status not in JOB_TERMINAL_STATUSES:
+                try:
+                    await asyncio.wait_for(notifications.get(), timeout=JOB_EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                latest = await get_upload_job_status(job_id)
+                if not latest:
+                    return
+                if latest != job:
+                    yield _format_job_event(latest)
+                job = latest
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
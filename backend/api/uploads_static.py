@@ -0,0 +1,34 @@
+"""
+/uploads 静态文件：按需生成图片变体，并为变体设置长期不可变缓存头
+"""
+import stat
+
+import anyio
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from domain.image_variants import parse_variant_filename
+from services.image_variants import generate_image_variants_async
+
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class UploadsStaticFiles(StaticFiles):
+    """请求的变体尚不存在但原图存在时，先生成再返回。"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        parsed = parse_variant_filename(path) if "/" not in path else None
+        if parsed is None:
+            return await super().get_response(path, scope)
+
+        original, _ = parsed
+        _, variant_stat = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if variant_stat is None:
+            original_path, original_stat = await anyio.to_thread.run_sync(self.lookup_path, original)
+            if original_stat is not None and stat.S_ISREG(original_stat.st_mode):
+                await generate_image_variants_async(original_path)
+
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = VARIANT_CACHE_CONTROL
+        return response
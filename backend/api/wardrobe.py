@@ -1,56 +1,172 @@
 """
 衣柜 API - 获取和管理衣物
 """
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from domain.clothes import ClothesItem, WardrobeResponse, ClothesCreate
+from domain.clothes import WardrobePageResponse, WardrobeCountsResponse, NearDuplicatesResponse
 from domain.clothes import normalize_category_value
+from domain.tags import canonical_colors, normalize_seasons, usage_tokens
 from storage.db import (
-    get_all_clothes,
-    get_clothes_by_category,
-    get_clothes_by_id,
+    list_clothes_page,
+    count_clothes_by_category,
+    find_clothes_by_tags,
     delete_clothes,
     update_clothes
 )
+from storage.snapshot import WardrobeSnapshot, get_wardrobe_snapshot, get_wardrobe_version
+from api.http_cache import apply_cache_headers, is_not_modified, make_etag, not_modified_response
+from api.responses import EncodedJSON, encode_json, encoded_json_response
+from services.upload_pipeline import IMAGE_NEAR_DUPLICATE_DISTANCE, find_near_duplicate_pairs
 
 router = APIRouter()
 
 
+def _wardrobe_etag(version: int, *scope: object) -> str:
+    return make_etag("wardrobe", version, *scope)
+
+
+# 整个衣柜与各类别列表的 JSON（含 gzip 结果），随快照缓存：同一版本只序列化、压缩一次
+WARDROBE_GROUP_KEYS = {"top": "tops", "bottom": "bottoms", "shoes": "shoes", "accessory": "accessories"}
+
+
+def _build_wardrobe_json(snapshot: WardrobeSnapshot) -> dict[str, EncodedJSON]:
+    dumped = {
+        category: [item.model_dump(mode="json") for item in snapshot.by_category[category]]
+        for category in WARDROBE_GROUP_KEYS
+    }
+    payloads = {category: encode_json(items) for category, items in dumped.items()}
+    payloads["wardrobe"] = encode_json({key: dumped[category] for category, key in WARDROBE_GROUP_KEYS.items()})
+    return payloads
+
+
+def _cached_json_response(snapshot: WardrobeSnapshot, key: str, request: Request, etag: str) -> Response:
+    payload = snapshot.derived("api.wardrobe_json", _build_wardrobe_json)[key]
+    response = encoded_json_response(payload, request)
+    apply_cache_headers(response, etag)
+    return response
+
+
 @router.get("/wardrobe", response_model=WardrobeResponse)
-async def get_wardrobe():
+async def get_wardrobe(request: Request):
     """
     获取整个衣柜
     
     按 top/bottom/shoes/accessory 四类返回所有衣物
     """
-    all_clothes = await get_all_clothes()
-    
-    tops: list[ClothesItem] = []
-    bottoms: list[ClothesItem] = []
-    shoes: list[ClothesItem] = []
-    accessories: list[ClothesItem] = []
-
-    for clothes in all_clothes:
-        category = normalize_category_value(clothes.category)
-        if category == "top":
-            tops.append(clothes)
-        elif category == "bottom":
-            bottoms.append(clothes)
-        elif category == "shoes":
-            shoes.append(clothes)
-        elif category == "accessory":
-            accessories.append(clothes)
-    
-    return WardrobeResponse(
-        tops=tops,
-        bottoms=bottoms,
-        shoes=shoes,
-        accessories=accessories
+    etag = _wardrobe_etag(get_wardrobe_version())
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    snapshot = await get_wardrobe_snapshot()
+    return _cached_json_response(snapshot, "wardrobe", request, _wardrobe_etag(snapshot.version))
+
+
+@router.get("/wardrobe/items", response_model=WardrobePageResponse)
+async def get_wardrobe_items(
+    limit: int = Query(default=50, ge=1, le=200, description="每页数量"),
+    cursor: Optional[str] = Query(default=None, description="上一页返回的 next_cursor"),
+    fields: Optional[str] = Query(
+        default=None,
+        description="逗号分隔的字段列表，默认 id,category,item,color_semantics,image_url,created_at",
+    ),
+    category: Optional[str] = Query(default=None, description="可选，top/bottom/shoes/accessory"),
+):
+    """
+    分页获取衣物列表（按创建时间倒序，keyset 游标翻页）
+    """
+    normalized_category = None
+    if category:
+        normalized_category = normalize_category_value(category)
+        if normalized_category not in ["top", "bottom", "shoes", "accessory"]:
+            raise HTTPException(
+                status_code=400,
+                detail="类别必须是 top, bottom, shoes 或 accessory"
+            )
+
+    requested_fields = None
+    if fields:
+        requested_fields = [name.strip() for name in fields.split(",") if name.strip()]
+
+    try:
+        items, next_cursor = await list_clothes_page(
+            limit=limit,
+            cursor=cursor,
+            fields=requested_fields,
+            category=normalized_category,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return WardrobePageResponse(items=items, next_cursor=next_cursor)
+
+
+@router.get("/wardrobe/counts", response_model=WardrobeCountsResponse)
+async def get_wardrobe_counts():
+    """按类别统计衣物数量（不读取衣物详情）"""
+    counts = WardrobeCountsResponse()
+    for category, total in (await count_clothes_by_category()).items():
+        if category in ("top", "bottom", "shoes", "accessory"):
+            setattr(counts, category, getattr(counts, category) + total)
+        counts.total += total
+    return counts
+
+
+@router.get("/wardrobe/search", response_model=list[ClothesItem])
+async def search_wardrobe(
+    category: Optional[str] = Query(default=None, description="可选，top/bottom/shoes/accessory"),
+    season: List[str] = Query(default=[], description="季节，可重复传入，命中任一即可"),
+    usage: List[str] = Query(default=[], description="使用场景，可重复传入，命中任一即可"),
+    color: List[str] = Query(default=[], description="颜色，可重复传入，命中任一即可"),
+):
+    """
+    按规范化语义标签筛选衣物
+
+    示例:
+        - /api/wardrobe/search?category=top&season=秋&season=冬&usage=通勤
+    """
+    normalized_category = None
+    if category:
+        normalized_category = normalize_category_value(category)
+        if normalized_category not in ["top", "bottom", "shoes", "accessory"]:
+            raise HTTPException(
+                status_code=400,
+                detail="类别必须是 top, bottom, shoes 或 accessory"
+            )
+
+    seasons = normalize_seasons(season)
+    if season and not seasons:
+        return []
+
+    colors: set[str] = set()
+    for value in color:
+        colors |= canonical_colors(value)
+    if color and not colors:
+        return []
+
+    return await find_clothes_by_tags(
+        category=normalized_category,
+        seasons=seasons,
+        usages=usage_tokens(usage),
+        colors=colors,
     )
 
 
+@router.get("/wardrobe/duplicates", response_model=NearDuplicatesResponse)
+async def get_wardrobe_duplicates(
+    max_distance: int = Query(
+        default=IMAGE_NEAR_DUPLICATE_DISTANCE, ge=0, le=32, description="dHash 汉明距离上限"
+    ),
+):
+    """列出原始图片完全相同或感知哈希接近的衣物对（仅含记录了图片指纹的上传）"""
+    pairs = await find_near_duplicate_pairs(max_distance)
+    return NearDuplicatesResponse(max_distance=max_distance, pairs=pairs)
+
+
 @router.get("/wardrobe/{category}", response_model=list[ClothesItem])
-async def get_wardrobe_category(category: str):
+async def get_wardrobe_category(category: str, request: Request):
     """
     按类别获取衣物
     
@@ -63,16 +179,27 @@ async def get_wardrobe_category(category: str):
             status_code=400,
             detail="类别必须是 top, bottom, shoes 或 accessory"
         )
-    
-    return await get_clothes_by_category(category)
+
+    etag = _wardrobe_etag(get_wardrobe_version(), "category", category)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    snapshot = await get_wardrobe_snapshot()
+    return _cached_json_response(snapshot, category, request, _wardrobe_etag(snapshot.version, "category", category))
 
 
 @router.get("/clothes/{clothes_id}", response_model=ClothesItem)
-async def get_clothes(clothes_id: int):
+async def get_clothes(clothes_id: int, request: Request, response: Response):
     """获取单个衣物详情"""
-    clothes = await get_clothes_by_id(clothes_id)
+    etag = _wardrobe_etag(get_wardrobe_version(), "clothes", clothes_id)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    snapshot = await get_wardrobe_snapshot()
+    clothes = snapshot.by_id.get(clothes_id)
     if not clothes:
         raise HTTPException(status_code=404, detail="衣物不存在")
+    apply_cache_headers(response, _wardrobe_etag(snapshot.version, "clothes", clothes_id))
     return clothes
 
 
@@ -2,16 +2,20 @@
 天气 API 路由
 提供天气查询和穿搭建议接口
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional, List
+from api.http_cache import apply_cache_headers, apply_no_store, is_not_modified, make_etag, not_modified_response
 from services.weather import (
-    get_weather,
+    get_weather_with_meta,
+    build_geocode_cache_key,
+    build_weather_cache_bucket,
     get_qweather_now,
     get_season_from_weather,
     get_clothing_suggestion,
     search_city,
     normalize_location_request,
     DEFAULT_LOCATION_QUERY,
+    WeatherCacheInfo,
     WeatherInfo,
     WeatherResponse,
     CityInfo
@@ -20,8 +24,21 @@ from services.weather import (
 router = APIRouter()
 
 
+def _weather_etag(location: str, bucket_start: Optional[str] = None) -> str:
+    """同一地点在同一小时时间桶内返回的是同一条天气缓存。"""
+    return make_etag("weather", build_geocode_cache_key(location), bucket_start or build_weather_cache_bucket())
+
+
+def _apply_weather_cache_status(response: Response, cache_info: WeatherCacheInfo) -> None:
+    """X-Cache: hit|stale|miss|fallback|mock；Age 为数据写入缓存后经过的秒数。"""
+    response.headers["X-Cache"] = cache_info.status
+    response.headers["Age"] = str(cache_info.age)
+
+
 @router.get("/weather", response_model=WeatherInfo)
 async def get_current_weather(
+    request: Request,
+    response: Response,
     location: str = Query(
         default=DEFAULT_LOCATION_QUERY,
         description="城市名 或 经纬度坐标(如 '31.23,121.47' 或 '121.47,31.23')"
@@ -52,11 +69,22 @@ async def get_current_weather(
     if validation_error:
         raise HTTPException(status_code=422, detail=validation_error)
 
-    weather = await get_weather(normalized_location)
+    etag = _weather_etag(normalized_location)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    weather, cache_info = await get_weather_with_meta(normalized_location)
     
     if not weather:
         raise HTTPException(status_code=500, detail="获取天气信息失败")
-    
+
+    # 返回旧时间桶的数据（stale / fallback）时 ETag 也对应旧时间桶，刷新或上游恢复后客户端的条件请求会拿到新数据；
+    # 模拟数据不发 ETag，否则本小时内的条件请求都会命中 304
+    if cache_info.bucket_start:
+        apply_cache_headers(response, _weather_etag(normalized_location, cache_info.bucket_start))
+    else:
+        apply_no_store(response)
+    _apply_weather_cache_status(response, cache_info)
     return weather
 
 
@@ -98,6 +126,7 @@ async def get_raw_weather(
 
 @router.get("/weather/suggestion")
 async def get_weather_suggestion(
+    response: Response,
     location: str = Query(
         default=DEFAULT_LOCATION_QUERY,
         description="城市名 或 经纬度坐标"
@@ -124,10 +153,12 @@ async def get_weather_suggestion(
     if validation_error:
         raise HTTPException(status_code=422, detail=validation_error)
 
-    weather = await get_weather(normalized_location)
+    weather, cache_info = await get_weather_with_meta(normalized_location)
     
     if not weather:
         raise HTTPException(status_code=500, detail="获取天气信息失败")
+
+    _apply_weather_cache_status(response, cache_info)
     
     # 获取穿搭建议
     suggestion = get_clothing_suggestion(weather)
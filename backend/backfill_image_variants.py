@@ -0,0 +1,65 @@
+"""
+为已有上传图片补生成缩略图 / 中图 / WebP 变体
+
+用法:
+    python backfill_image_variants.py [--dir uploads] [--workers 4] [--force]
+
+只处理目录顶层的原图（子目录如 tryon/、demo/ 不处理），已存在的变体默认跳过。
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from domain.image_variants import IMAGE_VARIANTS_ENABLED, ORIGINAL_EXTENSIONS, parse_variant_filename
+from services.image_variants import generate_image_variants
+
+DEFAULT_UPLOAD_DIR = Path(__file__).parent / "uploads"
+
+
+def find_originals(upload_dir: Path) -> list[Path]:
+    return sorted(
+        path for path in upload_dir.iterdir()
+        if path.is_file()
+        and not path.name.startswith(".")
+        and path.suffix.lower() in ORIGINAL_EXTENSIONS
+        and parse_variant_filename(path.name) is None
+    )
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="补生成上传图片变体")
+    parser.add_argument("--dir", type=Path, default=DEFAULT_UPLOAD_DIR)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--force", action="store_true", help="重新生成已存在的变体")
+    args = parser.parse_args()
+
+    if not IMAGE_VARIANTS_ENABLED:
+        print("⚠️  IMAGE_VARIANTS_ENABLED=0，跳过")
+        return
+
+    originals = find_originals(args.dir)
+    print(f"📂 {args.dir}: {len(originals)} 张原图")
+
+    def process(path: Path) -> tuple[Path, int, str | None]:
+        try:
+            return path, len(generate_image_variants(path, force=args.force)), None
+        except Exception as e:
+            return path, 0, str(e)
+
+    started = time.perf_counter()
+    generated = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        for path, count, error in executor.map(process, originals):
+            if error:
+                failed += 1
+                print(f"❌ {path.name}: {error}")
+            else:
+                generated += count
+
+    print(f"✅ 生成 {generated} 个变体，失败 {failed} 张，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,89 @@
+"""
+类别归一化微基准：每次请求重新解析 vs 信任写入时存储的 canonical_category
+
+用法:
+    python bench_category_resolution.py [--items 10000] [--rounds 20]
+"""
+import argparse
+import random
+import time
+
+from domain.clothes import normalize_category_value, resolve_category_value
+
+SAMPLE_ROWS = [
+    ("top", "白衬衫", "简约通勤衬衫"),
+    ("unknown", "连帽拉链卫衣", "休闲风格，适合通勤"),
+    ("外套", "羊毛大衣", "冬季保暖外套"),
+    ("bottom", "直筒牛仔裤", "百搭牛仔裤"),
+    ("unknown", "黑色西裤", "正式场合"),
+    ("shoes", "小白鞋", "日常休闲鞋"),
+    ("footwear", "切尔西短靴", "防水短靴"),
+    ("accessory", "银色项链", "细链项链"),
+    ("unknown", "针织围巾", "秋冬配饰"),
+]
+
+
+def build_items(count: int) -> list[dict]:
+    rng = random.Random(42)
+    items = []
+    for index in range(count):
+        category, name, description = rng.choice(SAMPLE_ROWS)
+        items.append(
+            {
+                "id": index,
+                "category": category,
+                "item": name,
+                "description": description,
+                "canonical_category": resolve_category_value(category, name, description),
+            }
+        )
+    return items
+
+
+def per_request_resolution(items: list[dict]) -> dict[str, int]:
+    # 旧逻辑：推荐按 resolve，衣柜按 normalize，各扫一遍
+    counts: dict[str, int] = {}
+    for item in items:
+        category = resolve_category_value(item["category"], item["item"], item["description"])
+        counts[category] = counts.get(category, 0) + 1
+    for item in items:
+        normalize_category_value(item["category"])
+    return counts
+
+
+def stored_value(items: list[dict]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for item in items:
+        category = item["canonical_category"]
+        counts[category] = counts.get(category, 0) + 1
+    for item in items:
+        item["canonical_category"]
+    return counts
+
+
+def timed(func, items: list[dict], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(items)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="类别归一化微基准")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    items = build_items(args.items)
+    assert per_request_resolution(items) == stored_value(items)
+
+    before = timed(per_request_resolution, items, args.rounds)
+    after = timed(stored_value, items, args.rounds)
+    print(f"items={args.items} rounds={args.rounds}")
+    print(f"per-request resolution: {before:8.2f} ms/request")
+    print(f"stored canonical value: {after:8.2f} ms/request")
+    print(f"speedup: {before / after if after else float('inf'):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+SQLite 读写并发基准：对比 legacy（回滚日志）与 WAL 档位
+
+用法:
+    python bench_db_concurrency.py [--seconds 5] [--readers 8] [--writers 2]
+
+读任务循环执行 get_all_clothes()，写任务循环执行 upsert_weather_cache()，
+模拟天气缓存写入与衣柜读取同时发生的场景。
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import storage.db as db_store
+from domain.clothes import ClothesCreate
+
+
+async def _seed(count: int) -> None:
+    for index in range(count):
+        await db_store.add_clothes(
+            ClothesCreate(
+                category="top",
+                item=f"测试上衣{index}",
+                style_semantics=["休闲", "通勤"],
+                season_semantics=["春", "秋"],
+                usage_semantics=["日常"],
+                color_semantics="黑色",
+                description="基准测试数据",
+                image_filename=f"bench-{index}.png",
+            )
+        )
+
+
+async def _reader(deadline: float, latencies: list[float]) -> int:
+    ops = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await db_store.get_all_clothes()
+        latencies.append(time.perf_counter() - started)
+        ops += 1
+    return ops
+
+
+async def _writer(index: int, deadline: float, latencies: list[float]) -> int:
+    ops = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await db_store.upsert_weather_cache(
+            f"bench-{index}",
+            f"2026-01-01T{ops % 24:02d}",
+            {"temperature": 20.0 + ops % 10, "condition": "晴"},
+        )
+        latencies.append(time.perf_counter() - started)
+        ops += 1
+    return ops
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(len(ordered) * percent), len(ordered) - 1)
+    return ordered[index] * 1000
+
+
+async def run_profile(profile: str, seconds: float, readers: int, writers: int, rows: int) -> dict:
+    backup_path = db_store.DB_PATH
+    backup_profile = db_store.DB_DURABILITY
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_store.DB_PATH = Path(temp_dir) / "bench.db"
+        db_store.DB_DURABILITY = profile
+        try:
+            await db_store.init_db()
+            await db_store.open_pool(readers=readers)
+            await _seed(rows)
+
+            read_latencies: list[float] = []
+            write_latencies: list[float] = []
+            deadline = time.perf_counter() + seconds
+            results = await asyncio.gather(
+                *[_reader(deadline, read_latencies) for _ in range(readers)],
+                *[_writer(index, deadline, write_latencies) for index in range(writers)],
+            )
+            read_ops = sum(results[:readers])
+            write_ops = sum(results[readers:])
+        finally:
+            await db_store.close_pool()
+            db_store.DB_PATH = backup_path
+            db_store.DB_DURABILITY = backup_profile
+
+    return {
+        "profile": profile,
+        "reads_per_sec": read_ops / seconds,
+        "writes_per_sec": write_ops / seconds,
+        "read_p50_ms": _percentile(read_latencies, 0.5),
+        "read_p99_ms": _percentile(read_latencies, 0.99),
+        "write_p50_ms": statistics.median(write_latencies) * 1000 if write_latencies else 0.0,
+        "write_p99_ms": _percentile(write_latencies, 0.99),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite 读写并发基准")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"readers={args.readers} writers={args.writers} rows={args.rows} seconds={args.seconds}")
+    print(f"{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'r p50ms':>10}{'r p99ms':>10}{'w p50ms':>10}{'w p99ms':>10}")
+    for profile in ("legacy", "wal"):
+        result = await run_profile(profile, args.seconds, args.readers, args.writers, args.rows)
+        print(
+            f"{result['profile']:<10}"
+            f"{result['reads_per_sec']:>10.1f}"
+            f"{result['writes_per_sec']:>10.1f}"
+            f"{result['read_p50_ms']:>10.2f}"
+            f"{result['read_p99_ms']:>10.2f}"
+            f"{result['write_p50_ms']:>10.2f}"
+            f"{result['write_p99_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
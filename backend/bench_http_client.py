@@ -0,0 +1,106 @@
+"""
+出站 HTTP 客户端基准：每次调用新建 AsyncClient vs 注册表共享客户端
+
+用法:
+    python bench_http_client.py [--requests 200] [--concurrency 8] [--connect-delay-ms 20]
+
+本地起一个 keep-alive 桩服务，--connect-delay-ms 在每条新连接上模拟 TCP/TLS 握手耗时。
+"""
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from services import http_client as http_client_registry
+
+CONNECT_DELAY_SECONDS = 0.0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体一次写出，避免 Nagle + 延迟 ACK 干扰测量
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def setup(self):
+        super().setup()
+        # 每条新连接只触发一次，模拟握手成本
+        time.sleep(CONNECT_DELAY_SECONDS)
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _run(url: str, total: int, concurrency: int, shared: bool) -> list[float]:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            if shared:
+                async with http_client_registry.http_client("weather") as client:
+                    response = await client.get(url)
+            else:
+                async with httpx.AsyncClient(timeout=10.0) as client:
+                    response = await client.get(url)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one_call() for _ in range(total)])
+    return latencies
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * percent), len(ordered) - 1)] * 1000
+
+
+async def main() -> None:
+    global CONNECT_DELAY_SECONDS
+    parser = argparse.ArgumentParser(description="出站 HTTP 客户端基准")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--connect-delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    CONNECT_DELAY_SECONDS = args.connect_delay_ms / 1000
+
+    server = start_stub_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/stub"
+    print(f"requests={args.requests} concurrency={args.concurrency} connect_delay={args.connect_delay_ms}ms")
+    print(f"{'mode':<12}{'total s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    try:
+        for mode in ("per-call", "shared"):
+            shared = mode == "shared"
+            if shared:
+                await http_client_registry.start_http_clients()
+            started = time.perf_counter()
+            latencies = await _run(url, args.requests, args.concurrency, shared)
+            elapsed = time.perf_counter() - started
+            print(f"{mode:<12}{elapsed:>10.2f}{_percentile(latencies, 0.5):>10.2f}{_percentile(latencies, 0.99):>10.2f}")
+        print(http_client_registry.get_http_client_stats()["upstreams"]["weather"])
+    finally:
+        await http_client_registry.close_http_clients()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+整套组合搜索基准：剪枝 + beam search vs 穷举全部 上装×下装×鞋履 组合
+
+用法:
+    python bench_outfit_search.py [--items 900] [--k 5] [--exhaustive-items 180]
+
+穷举只在较小衣柜（--exhaustive-items）上运行，用来校验 beam search 的前 k 套得分一致；
+大衣柜只统计 beam search 的耗时。
+"""
+import argparse
+import heapq
+import itertools
+import time
+from types import SimpleNamespace
+
+from bench_recommendation_scoring import build_items
+from domain.config import LLMConfig
+from services.outfits import get_snapshot_pair_features, rank_outfits, score_pair
+from services.recommendation import (
+    build_scoring_context,
+    build_temperature_profile,
+    get_snapshot_features,
+    score_features,
+)
+from storage.snapshot import build_snapshot
+
+CATEGORIES = ("top", "bottom", "shoes")
+
+
+def _setup(items: int):
+    snapshot = build_snapshot(1, ":bench:", build_items(items))
+    weather = SimpleNamespace(feelsLike=16.0, condition="小雨")
+    horoscope = {"lucky_color": "藏青色", "zodiac_sign": "virgo"}
+    profile = build_temperature_profile(weather)
+    context = build_scoring_context(horoscope, weather, profile, "commute", "goal_first", config=LLMConfig())
+    return snapshot, context, profile, horoscope
+
+
+def exhaustive_scores(snapshot, context, k: int) -> list[int]:
+    features_by_id = get_snapshot_features(snapshot)
+    pairs = get_snapshot_pair_features(snapshot)
+    pools = [
+        [
+            (score_features(features_by_id[item["id"]], category, context, with_reasons=False)[0], pairs[item["id"]])
+            for item in snapshot.compatible_dicts(category, context.allowed_seasons)
+        ]
+        for category in CATEGORIES
+    ]
+    totals = (
+        top[0] + bottom[0] + shoes[0]
+        + score_pair(top[1], bottom[1])[0] + score_pair(top[1], shoes[1])[0] + score_pair(bottom[1], shoes[1])[0]
+        for top, bottom, shoes in itertools.product(*pools)
+    )
+    return heapq.nlargest(k, totals)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="整套组合搜索基准")
+    parser.add_argument("--items", type=int, default=900)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--exhaustive-items", type=int, default=180)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    snapshot, context, profile, horoscope = _setup(args.exhaustive_items)
+    started = time.perf_counter()
+    expected = exhaustive_scores(snapshot, context, args.k)
+    exhaustive_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    outfits, _ = rank_outfits(snapshot, context, args.k, profile, horoscope)
+    beam_ms = (time.perf_counter() - started) * 1000
+    assert [outfit["score"] for outfit in outfits] == expected, (expected, [o["score"] for o in outfits])
+    combos = 1
+    for category in CATEGORIES:
+        combos *= len(snapshot.compatible_dicts(category, context.allowed_seasons))
+    print(f"items={args.exhaustive_items} combinations={combos} k={args.k}")
+    print(f"exhaustive:  {exhaustive_ms:10.2f} ms")
+    print(f"beam search: {beam_ms:10.2f} ms (same top-{args.k} scores)")
+
+    snapshot, context, profile, horoscope = _setup(args.items)
+    rank_outfits(snapshot, context, args.k, profile, horoscope)  # 预热快照特征
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        rank_outfits(snapshot, context, args.k, profile, horoscope)
+    per_request = (time.perf_counter() - started) / args.rounds * 1000
+    per_category = {category: len(snapshot.compatible_dicts(category, context.allowed_seasons)) for category in CATEGORIES}
+    print(f"items={args.items} candidates={per_category} k={args.k}")
+    print(f"beam search per request: {per_request:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,188 @@
+"""
+推荐排序基准：逐件重复计算（旧 score_item） vs ScoringContext + 快照缓存特征（新），
+以及已安装 numpy 时的向量化引擎
+
+用法:
+    python bench_recommendation_scoring.py [--items 10000] [--rounds 20]
+
+旧写法原样复制在本文件中；每轮都校验各方式选出的单品与理由一致。
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from domain.config import LLMConfig
+from domain.tags import normalize_seasons, usage_tokens
+import services.recommendation as recommendation_service
+from services.recommendation import (
+    ZODIAC_STYLE_HINTS,
+    build_color_tokens,
+    build_scoring_context,
+    build_temperature_profile,
+    get_snapshot_features,
+    get_snapshot_vector_index,
+    pick_best_features,
+    resolve_mode_bonus_weights,
+    select_best_item,
+)
+from services.scoring_numpy import NUMPY_AVAILABLE
+from storage.snapshot import build_snapshot
+from domain.clothes import ClothesItem
+
+CATEGORIES = ("top", "bottom", "shoes")
+NAMES = {
+    "top": ["白衬衫", "藏青针织衫", "红色卫衣", "黑色风衣", "灰色T恤"],
+    "bottom": ["直筒牛仔裤", "黑色西裤", "卡其休闲裤", "灰色运动裤"],
+    "shoes": ["小白鞋", "切尔西短靴", "防水徒步鞋", "乐福鞋", "帆布鞋"],
+}
+COLORS = ["白色", "黑色", "红色", "藏青色", "灰色", "卡其色", "蓝色"]
+STYLES = ["休闲", "通勤", "简约", "运动", "街头", "正式", "优雅", "casual", "business"]
+SEASONS = ["春", "夏", "秋", "冬"]
+USAGES = ["日常", "上班", "约会", "运动", "旅行", "通勤"]
+
+
+def build_items(count: int) -> list[ClothesItem]:
+    rng = random.Random(42)
+    items = []
+    for index in range(count):
+        category = CATEGORIES[index % len(CATEGORIES)]
+        items.append(ClothesItem(
+            id=index + 1,
+            category=category,
+            canonical_category=category,
+            item=rng.choice(NAMES[category]),
+            style_semantics=rng.sample(STYLES, 2),
+            season_semantics=rng.sample(SEASONS, rng.randint(1, 2)),
+            usage_semantics=rng.sample(USAGES, 2),
+            color_semantics=rng.choice(COLORS),
+            description=f"{rng.choice(COLORS)}系单品，适合{rng.choice(USAGES)}",
+            image_url=f"/uploads/{index}.png",
+            created_at="2026-01-01T00:00:00",
+        ))
+    return items
+
+
+def legacy_score_item(item, category, horoscope, weather, temperature_profile, normalized_goal, mode, config=None):
+    """改动前的 score_item：每件衣物都重新解析权重、幸运色与文本。"""
+    score = 5
+    weights = resolve_mode_bonus_weights(mode, config=config)
+    if normalize_seasons(item.get("season_semantics", [])) & temperature_profile["allowed_seasons"]:
+        score += 3
+        reasons = [f"季节标签匹配{temperature_profile['label']}温度策略"]
+    else:
+        reasons = [f"季节标签未完全命中{temperature_profile['label']}策略，作为兜底候选"]
+    lucky_color = horoscope.get("lucky_color", "")
+    color_tokens = build_color_tokens(lucky_color)
+    searchable_text = " ".join([
+        str(item.get("item", "")),
+        str(item.get("color_semantics", "")),
+        str(item.get("description", "")),
+    ]).lower()
+    if color_tokens and any(token in searchable_text for token in color_tokens):
+        score += weights.color_bonus
+        reasons.append(f"颜色接近今日幸运色「{lucky_color}」")
+    style_hints = ZODIAC_STYLE_HINTS.get(horoscope.get("zodiac_sign", ""), set())
+    style_values = {str(v).strip().lower() for v in item.get("style_semantics", []) if str(v).strip()}
+    if style_hints and (style_values & style_hints):
+        score += weights.style_bonus
+        reasons.append("风格与今日星座运势倾向一致")
+    if category == "shoes" and ("雨" in weather.condition or "雪" in weather.condition):
+        if any(keyword in searchable_text for keyword in ("防水", "短靴", "boot", "靴")):
+            score += 2
+            reasons.append("天气有降水，鞋履更注重防滑/防水")
+    if normalized_goal and normalized_goal in usage_tokens(item.get("usage_semantics", [])):
+        score += weights.goal_bonus
+        reasons.append(f"使用场景匹配本次目标「{normalized_goal}」")
+    return score, reasons
+
+
+def legacy_pick(candidates, category, horoscope, weather, temperature_profile, normalized_goal, mode, config):
+    best_item, best_score, best_reasons = None, -1, []
+    for item in candidates:
+        score, reasons = legacy_score_item(item, category, horoscope, weather, temperature_profile, normalized_goal, mode, config)
+        if score > best_score:
+            best_item, best_score, best_reasons = item, score, reasons
+    return best_item, "；".join(best_reasons)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="推荐排序基准")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot = build_snapshot(1, ":bench:", build_items(args.items))
+    config = LLMConfig()
+    weather = SimpleNamespace(feelsLike=16.0, condition="小雨")
+    horoscope = {"lucky_color": "藏青色", "zodiac_sign": "virgo"}
+    temperature_profile = build_temperature_profile(weather)
+    goal, mode = "commute", "goal_first"
+
+    started = time.perf_counter()
+    get_snapshot_features(snapshot)
+    feature_build_ms = (time.perf_counter() - started) * 1000
+    index_build_ms = None
+    if NUMPY_AVAILABLE:
+        started = time.perf_counter()
+        get_snapshot_vector_index(snapshot)
+        index_build_ms = (time.perf_counter() - started) * 1000
+    recommendation_service.RECOMMENDATION_SCORING_ENGINE = "numpy"
+
+    legacy_total = 0.0
+    new_total = 0.0
+    vector_total = 0.0
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        legacy = {
+            category: legacy_pick(snapshot.dicts_by_category[category], category, horoscope, weather,
+                                  temperature_profile, goal, mode, config)
+            for category in CATEGORIES
+        }
+        legacy_total += time.perf_counter() - started
+
+        started = time.perf_counter()
+        context = build_scoring_context(horoscope, weather, temperature_profile, goal, mode, config=config)
+        features_by_id = get_snapshot_features(snapshot)
+        current = {
+            category: pick_best_features(
+                [features_by_id[item["id"]] for item in snapshot.dicts_by_category[category]], category, context
+            )
+            for category in CATEGORIES
+        }
+        new_total += time.perf_counter() - started
+
+        for category in CATEGORIES:
+            assert legacy[category][0]["id"] == current[category][0]["id"], category
+            assert legacy[category][1] == current[category][1], category
+
+        if NUMPY_AVAILABLE:
+            started = time.perf_counter()
+            context = build_scoring_context(horoscope, weather, temperature_profile, goal, mode, config=config)
+            vectorized = {
+                category: select_best_item(snapshot, category, context, season_only=False)
+                for category in CATEGORIES
+            }
+            vector_total += time.perf_counter() - started
+            for category in CATEGORIES:
+                assert vectorized[category] == current[category], category
+
+    legacy_ms = legacy_total / args.rounds * 1000
+    new_ms = new_total / args.rounds * 1000
+    print(f"items={args.items} rounds={args.rounds}")
+    print(f"feature build (once per snapshot): {feature_build_ms:8.2f} ms")
+    print(f"legacy score_item per request:     {legacy_ms:8.2f} ms")
+    print(f"ScoringContext per request:        {new_ms:8.2f} ms")
+    print(f"speedup: {legacy_ms / new_ms if new_ms else float('inf'):.1f}x")
+    if NUMPY_AVAILABLE:
+        vector_ms = vector_total / args.rounds * 1000
+        print(f"vector index build (once):         {index_build_ms:8.2f} ms")
+        print(f"numpy engine per request:          {vector_ms:8.2f} ms")
+        print(f"speedup vs legacy: {legacy_ms / vector_ms if vector_ms else float('inf'):.1f}x, "
+              f"vs ScoringContext: {new_ms / vector_ms if vector_ms else float('inf'):.1f}x")
+    else:
+        print("numpy 未安装，跳过向量化引擎")
+
+
+if __name__ == "__main__":
+    main_cli()
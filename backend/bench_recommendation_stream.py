@@ -0,0 +1,165 @@
+"""
+推荐接口首字节时间（TTFB）基准：/api/recommendation（等待完整文案） vs /api/recommendation/stream（SSE）
+
+用法:
+    python bench_recommendation_stream.py [--tokens 40] [--token-delay 0.05] [--requests 5]
+
+本地启动一个逐段输出的假 LLM 服务（chat/completions 流式 / 非流式两种响应），
+直接以 ASGI 调用应用并记录响应头、首个 body 分片、首个 token 事件与完成的时间；天气与运势使用固定数据。
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import main
+import services.recommendation as recommendation_service
+import storage.db as db_store
+from domain.clothes import ClothesCreate
+from domain.config import LLMConfig
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+        tokens = [f"第{index}段建议。" for index in range(self.server.tokens)]
+        if not payload.get("stream"):
+            time.sleep(self.server.token_delay * len(tokens))
+            body = json.dumps({"choices": [{"message": {"content": "".join(tokens)}}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(self.server.token_delay)
+            chunk = {"choices": [{"delta": {"content": token}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def _timed_get(path: str) -> dict[str, float]:
+    """以 ASGI 直接调用应用，返回各阶段相对请求开始的毫秒数。"""
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        elapsed = (time.perf_counter() - started) * 1000
+        if message["type"] == "http.response.start":
+            timings["headers"] = elapsed
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                timings.setdefault("first_byte", elapsed)
+                if b"event: token" in message["body"]:
+                    timings.setdefault("first_token", elapsed)
+            if not message.get("more_body"):
+                timings["complete"] = elapsed
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    await main.app(scope, receive, send)
+    return timings
+
+
+def _weather(location):
+    return SimpleNamespace(
+        temperature=20.0, feelsLike=19.0, condition="多云", icon="101", humidity=60.0,
+        windDir="东风", windScale="2", location="上海", obsTime="",
+    )
+
+
+async def _run(requests: int) -> dict[str, dict[str, list[float]]]:
+    await db_store.add_clothes_many([
+        ClothesCreate(
+            category=category,
+            item=f"{category}-{index}",
+            style_semantics=["休闲"],
+            season_semantics=["春", "秋"],
+            usage_semantics=["日常"],
+            color_semantics="藏青色",
+            description="基准单品",
+            image_filename=f"{index:08d}-0000-0000-0000-000000000000.png",
+        )
+        for index, category in enumerate(["top", "bottom", "shoes", "accessory"] * 5)
+    ])
+    results: dict[str, dict[str, list[float]]] = {}
+    for path in ("/api/recommendation", "/api/recommendation/stream"):
+        await _timed_get(path)  # 预热
+        for _ in range(requests):
+            for key, value in (await _timed_get(path)).items():
+                results.setdefault(path, {}).setdefault(key, []).append(value)
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="推荐接口 TTFB 基准")
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+    server.daemon_threads = True
+    server.tokens = args.tokens
+    server.token_delay = args.token_delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm_config = LLMConfig(api_base=f"http://127.0.0.1:{server.server_address[1]}", api_key="bench", model="fake")
+    horoscope = {"zodiac_sign": "leo", "zodiac_name": "狮子座", "lucky_color": "红色", "suggestion": ""}
+
+    backup_path = db_store.DB_PATH
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_store.DB_PATH = Path(temp_dir) / "bench.db"
+            with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=_weather)), \
+                    patch.object(recommendation_service, "get_daily_horoscope", new=AsyncMock(return_value=horoscope)), \
+                    patch.object(recommendation_service, "load_config", return_value=llm_config):
+                async def run():
+                    await db_store.init_db()
+                    return await _run(args.requests)
+
+                results = asyncio.run(run())
+    finally:
+        db_store.DB_PATH = backup_path
+        server.shutdown()
+        server.server_close()
+
+    print(f"fake LLM: tokens={args.tokens} delay={args.token_delay * 1000:.0f} ms/token requests={args.requests}")
+    print(f"{'endpoint':<30} {'first byte':>11} {'first token':>12} {'complete':>10}  (median ms)")
+    for path, timings in results.items():
+        def median(key: str) -> str:
+            return f"{statistics.median(timings[key]):.1f}" if key in timings else "-"
+        print(f"{path:<30} {median('first_byte'):>11} {median('first_token'):>12} {median('complete'):>10}")
+
+
+if __name__ == "__main__":
+    main_cli()
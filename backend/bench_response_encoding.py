@@ -0,0 +1,143 @@
+"""
+响应编码基准：衣柜接口每次按响应模型序列化（旧） vs 按快照缓存的 JSON / gzip 字节（新），
+以及各接口压缩前后的 p50 / p99 延迟与传输字节数
+
+用法:
+    python bench_response_encoding.py [--items 400] [--requests 300]
+
+旧写法注册在同一应用的 /bench/legacy 下，与新接口经过相同的中间件；
+推荐接口的天气与推荐结果使用固定数据，不请求外部服务。
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+from fastapi import FastAPI
+
+import main
+import storage.db as db_store
+from domain.clothes import ClothesCreate, WardrobeResponse
+from storage.snapshot import get_wardrobe_snapshot
+
+CATEGORIES = ("top", "bottom", "shoes", "accessory")
+
+
+def _register_legacy_routes(app: FastAPI) -> None:
+    """改动前的写法：返回模型，由 FastAPI 按 response_model 校验并逐次序列化。"""
+
+    @app.get("/bench/legacy/wardrobe", response_model=WardrobeResponse)
+    async def get_wardrobe_legacy():
+        snapshot = await get_wardrobe_snapshot()
+        return WardrobeResponse(
+            tops=list(snapshot.by_category["top"]),
+            bottoms=list(snapshot.by_category["bottom"]),
+            shoes=list(snapshot.by_category["shoes"]),
+            accessories=list(snapshot.by_category["accessory"]),
+        )
+
+
+async def main_recommendation() -> dict:
+    snapshot = await get_wardrobe_snapshot()
+    picks = {category: (snapshot.dicts_by_category[category] or (None,))[0] for category in CATEGORIES}
+    paragraph = "今天气温适中，建议以轻薄针织搭配直筒长裤，鞋履选择包裹性好的休闲鞋，早晚注意添衣。"
+    return {
+        "weather": {"temperature": 20.0, "feelsLike": 19.0, "condition": "多云", "icon": "101",
+                    "humidity": 60.0, "windDir": "东风", "windScale": "2", "location": "上海", "obsTime": ""},
+        "horoscope": {"summary": "平稳", "lucky_color": "蓝色", "lucky_number": 7},
+        "temperature_rule": {"label": "舒适", "allowed_seasons": ["春", "秋"], "advice": "注意早晚温差"},
+        "recommendation_text": "\n\n".join(f"## 建议 {index}\n\n{paragraph * 3}" for index in range(12)),
+        "outfit_summary": "针织衫 + 长裤 + 休闲鞋",
+        "selection_reasons": {category: "季节匹配、颜色协调" for category in CATEGORIES},
+        "suggested_top": picks["top"],
+        "suggested_bottom": picks["bottom"],
+        "suggested_shoes": picks["shoes"],
+        "suggested_accessories": [item for item in snapshot.dicts_by_category["accessory"][:3]],
+        "purchase_suggestions": [],
+        "goal_raw": None,
+        "goal_normalized": None,
+        "mode": "balanced",
+    }
+
+
+async def _fake_ai_recommendation(*args, **kwargs) -> dict:
+    return await main_recommendation()
+
+
+async def _measure(client: httpx.AsyncClient, url: str, requests: int, encoding: str) -> tuple[float, float, int]:
+    latencies = []
+    wire_bytes = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(url, headers={"Accept-Encoding": encoding})
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        wire_bytes = response.num_bytes_downloaded
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies), p99, wire_bytes
+
+
+async def _run(items: int, requests: int) -> list[tuple[str, float, float, int]]:
+    await db_store.add_clothes_many([
+        ClothesCreate(
+            category=CATEGORIES[index % 4],
+            item=f"基准单品{index}",
+            style_semantics=["休闲", "通勤"],
+            season_semantics=["春", "秋"],
+            usage_semantics=["日常", "上班"],
+            color_semantics="藏青色",
+            description="用于响应编码基准测试的衣物描述，长度接近真实数据。" * 2,
+            image_filename=f"{index:08d}-0000-0000-0000-000000000000.png",
+        )
+        for index in range(items)
+    ])
+
+    rows = []
+    _register_legacy_routes(main.app)
+    cases = (
+        ("/bench/legacy/wardrobe", ("identity", "gzip")),
+        ("/api/wardrobe", ("identity", "gzip")),
+        ("/api/recommendation", ("identity", "gzip")),
+    )
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+        for path, encodings in cases:
+            for encoding in encodings:
+                await client.get(path, headers={"Accept-Encoding": encoding})  # 预热快照
+                p50, p99, wire = await _measure(client, path, requests, encoding)
+                rows.append((f"{path} [{encoding}]", p50, p99, wire))
+    return rows
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="响应编码基准")
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    backup_path = db_store.DB_PATH
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_store.DB_PATH = Path(temp_dir) / "bench.db"
+        try:
+            with patch("api.recommendation.get_weather", new=AsyncMock(return_value=object())), \
+                    patch("api.recommendation.get_ai_recommendation", new=_fake_ai_recommendation):
+                async def run():
+                    await db_store.init_db()
+                    return await _run(args.items, args.requests)
+
+                rows = asyncio.run(run())
+        finally:
+            db_store.DB_PATH = backup_path
+
+    print(f"items={args.items} requests={args.requests}")
+    print(f"{'case':<36} {'p50 ms':>8} {'p99 ms':>8} {'wire bytes':>12}")
+    for name, p50, p99, wire in rows:
+        print(f"{name:<36} {p50:8.2f} {p99:8.2f} {wire:12d}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""
+批量上传基准：N 次顺序调用 /api/upload vs 一次 /api/upload/batch
+
+用法:
+    python bench_upload_batch.py [--images 12] [--segment-ms 150] [--analyze-ms 400]
+
+去背景用线程中的 time.sleep 模拟 CPU 耗时，语义分析用 asyncio.sleep 模拟 LLM 网络等待，
+不依赖 rembg 与真实的 LLM 服务。
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+import main
+import storage.db as db_store
+from domain.clothes import ClothesSemantics
+from services import upload_pipeline
+
+
+def _fake_stages(segment_seconds: float, analyze_seconds: float):
+    async def fake_segment(raw_bytes: bytes) -> bytes:
+        await asyncio.to_thread(time.sleep, segment_seconds)
+        return raw_bytes
+
+    async def fake_analyze(processed_bytes: bytes) -> ClothesSemantics:
+        await asyncio.sleep(analyze_seconds)
+        return ClothesSemantics(
+            category="top",
+            item=processed_bytes.decode(),
+            style_semantics=["休闲"],
+            season_semantics=["春"],
+            usage_semantics=["日常"],
+            color_semantics="白色",
+            description="基准测试数据",
+        )
+
+    return fake_segment, fake_analyze
+
+
+async def _run(images: int, segment_concurrency: int, analyze_concurrency: int) -> tuple[float, float]:
+    transport = httpx.ASGITransport(app=main.app)
+    files = [("files", (f"{index}.png", f"item-{index}".encode(), "image/png")) for index in range(images)]
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        for _, single in files:
+            response = await client.post("/api/upload", files={"file": single})
+            response.raise_for_status()
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/upload/batch",
+            params={"segment_concurrency": segment_concurrency, "analyze_concurrency": analyze_concurrency},
+            files=files,
+        )
+        response.raise_for_status()
+        assert response.json()["succeeded"] == images
+        batch = time.perf_counter() - started
+    return sequential, batch
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="批量上传基准")
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--segment-ms", type=float, default=150.0)
+    parser.add_argument("--analyze-ms", type=float, default=400.0)
+    parser.add_argument("--segment-concurrency", type=int, default=1)
+    parser.add_argument("--analyze-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    fake_segment, fake_analyze = _fake_stages(args.segment_ms / 1000, args.analyze_ms / 1000)
+    backup_path = db_store.DB_PATH
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_store.DB_PATH = Path(temp_dir) / "bench.db"
+        try:
+            with patch.object(upload_pipeline, "UPLOAD_DIR", Path(temp_dir)), \
+                    patch.object(upload_pipeline, "segment_image", new=fake_segment), \
+                    patch.object(upload_pipeline, "analyze_image", new=fake_analyze):
+                async def run() -> tuple[float, float]:
+                    await db_store.init_db()
+                    return await _run(args.images, args.segment_concurrency, args.analyze_concurrency)
+
+                sequential, batch = asyncio.run(run())
+        finally:
+            db_store.DB_PATH = backup_path
+
+    print(
+        f"images={args.images} segment={args.segment_ms}ms analyze={args.analyze_ms}ms "
+        f"segment_concurrency={args.segment_concurrency} analyze_concurrency={args.analyze_concurrency}"
+    )
+    print(f"sequential /api/upload: {sequential:8.2f} s")
+    print(f"/api/upload/batch:      {batch:8.2f} s")
+    print(f"speedup: {sequential / batch if batch else float('inf'):.1f}x")
+
+
+if __name__ == "__main__":
+    main_cli()
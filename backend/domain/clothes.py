@@ -1,10 +1,12 @@
 """
 服装语义数据结构定义
 """
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, computed_field
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 
+from domain.image_variants import UPLOADS_URL_PREFIX, build_image_variants
+
 CATEGORY_ALIASES = {
     "top": {"top", "tops", "上衣", "上装", "外套"},
     "bottom": {"bottom", "bottoms", "裤子", "下装", "裙子"},
@@ -76,6 +78,7 @@ class ClothesItem(BaseModel):
     """衣柜中的单个衣物"""
     id: int
     category: str
+    canonical_category: str = ""  # 写入时归一化的 top/bottom/shoes/accessory
     item: str
     style_semantics: List[str]
     season_semantics: List[str]
@@ -85,6 +88,15 @@ class ClothesItem(BaseModel):
     image_url: str
     created_at: datetime
 
+    @computed_field
+    @property
+    def image_variants(self) -> Dict[str, str]:
+        """thumb / medium / webp -> URL，由原图 URL 推导（子目录中的图片没有变体）。"""
+        prefix, _, filename = self.image_url.rpartition("/")
+        if prefix != UPLOADS_URL_PREFIX:
+            return {}
+        return build_image_variants(filename, url_prefix=prefix)
+
 
 class ClothesCreate(BaseModel):
     """创建衣物的请求体"""
@@ -104,3 +116,49 @@ class WardrobeResponse(BaseModel):
     bottoms: List[ClothesItem]
     shoes: List[ClothesItem]
     accessories: List[ClothesItem]
+
+
+class WardrobePageResponse(BaseModel):
+    """衣柜分页列表响应（条目只包含 fields 指定的字段）"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+class WardrobeCountsResponse(BaseModel):
+    """衣柜分类计数响应"""
+    top: int = 0
+    bottom: int = 0
+    shoes: int = 0
+    accessory: int = 0
+    total: int = 0
+
+
+class BatchUploadItemResult(BaseModel):
+    """批量上传中单张图片的处理结果"""
+    index: int
+    filename: str
+    status: Literal["succeeded", "failed"]
+    clothes: Optional[ClothesItem] = None
+    error: Optional[str] = None
+    reused: bool = False  # 与已上传图片完全相同，复用了已有的处理结果
+
+
+class BatchUploadResponse(BaseModel):
+    """批量上传响应"""
+    items: List[BatchUploadItemResult]
+    succeeded: int = 0
+    failed: int = 0
+
+
+class NearDuplicatePair(BaseModel):
+    """疑似重复的两件衣物"""
+    clothes_id: int
+    duplicate_of: int
+    distance: int  # dHash 汉明距离，0 表示感知上一致
+    exact: bool  # 原始图片字节完全相同
+
+
+class NearDuplicatesResponse(BaseModel):
+    """近似重复检测结果"""
+    max_distance: int
+    pairs: List[NearDuplicatePair]
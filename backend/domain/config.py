@@ -2,7 +2,7 @@
 API 配置模型
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Dict, Optional, List, Literal
 
 
 class ModeBonusWeights(BaseModel):
@@ -21,6 +21,17 @@ class RecommendationModeWeights(BaseModel):
     )
 
 
+class VisionImageSettings(BaseModel):
+    """发送给视觉模型前的图片预处理设置"""
+    enabled: bool = True
+    crop_to_alpha: bool = True  # 按透明通道裁剪到衣物外接矩形
+    padding: int = Field(default=8, ge=0, le=256)  # 裁剪后保留的边距（像素）
+    max_edge: int = Field(default=768, ge=64, le=4096)  # 长边上限
+    format: Literal["jpeg", "webp", "png"] = "jpeg"
+    quality: int = Field(default=85, ge=30, le=100)
+    background: str = "#FFFFFF"  # jpeg/webp 无透明通道，透明区域铺底色
+
+
 class LLMConfig(BaseModel):
     """LLM API 配置"""
     api_base: str = "https://api.openai.com/v1"
@@ -40,6 +51,13 @@ class LLMConfig(BaseModel):
     zodiac_sign: str = ""
     # 推荐模式权重
     recommendation_mode_weights: RecommendationModeWeights = Field(default_factory=RecommendationModeWeights)
+    # 视觉模型图片预处理，可按模型 ID 覆盖
+    vision_image: VisionImageSettings = Field(default_factory=VisionImageSettings)
+    vision_image_overrides: Dict[str, VisionImageSettings] = Field(default_factory=dict)
+
+    def vision_image_for(self, model: Optional[str] = None) -> VisionImageSettings:
+        """获取指定模型（默认当前模型）的图片预处理设置。"""
+        return self.vision_image_overrides.get(model or self.model, self.vision_image)
 
 
 class LLMConfigUpdate(BaseModel):
@@ -56,6 +74,8 @@ class LLMConfigUpdate(BaseModel):
     weather_location: Optional[str] = None
     zodiac_sign: Optional[str] = None
     recommendation_mode_weights: Optional[RecommendationModeWeights] = None
+    vision_image: Optional[VisionImageSettings] = None
+    vision_image_overrides: Optional[Dict[str, VisionImageSettings]] = None
 
 
 class AvailableModel(BaseModel):
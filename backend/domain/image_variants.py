@@ -0,0 +1,65 @@
+"""
+上传图片派生尺寸（缩略图 / 中图 / WebP 原尺寸）的命名约定
+派生文件与原图放在同一目录，命名为 <原图名>.<variant>.<ext>；这里只负责文件名与 URL，
+生成派生文件见 services.image_variants。
+"""
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from PIL import features
+
+UPLOADS_URL_PREFIX = "/uploads"
+
+IMAGE_VARIANTS_ENABLED = os.getenv("IMAGE_VARIANTS_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+IMAGE_THUMB_EDGE = max(int(os.getenv("IMAGE_THUMB_EDGE", "256")), 16)
+IMAGE_MEDIUM_EDGE = max(int(os.getenv("IMAGE_MEDIUM_EDGE", "768")), 16)
+
+# Pillow 未编译 WebP 支持时退回 PNG，并且不提供 webp 变体
+WEBP_SUPPORTED = features.check("webp")
+VARIANT_EXTENSION = "webp" if WEBP_SUPPORTED else "png"
+
+# 原图可能的扩展名（上传流水线写 .png，演示数据可能是其他格式）
+ORIGINAL_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    name: str
+    max_edge: Optional[int]  # None 表示保持原尺寸
+
+
+VARIANT_SPECS: tuple[VariantSpec, ...] = (
+    VariantSpec("thumb", IMAGE_THUMB_EDGE),
+    VariantSpec("medium", IMAGE_MEDIUM_EDGE),
+) + ((VariantSpec("webp", None),) if WEBP_SUPPORTED else ())
+VARIANT_NAMES = tuple(spec.name for spec in VARIANT_SPECS)
+
+_VARIANT_PATTERN = re.compile(
+    rf"^(?P<original>.+)\.(?P<variant>{'|'.join(VARIANT_NAMES)})\.{VARIANT_EXTENSION}$"
+)
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    return f"{filename}.{variant}.{VARIANT_EXTENSION}"
+
+
+def build_image_variants(filename: str, url_prefix: str = UPLOADS_URL_PREFIX) -> dict[str, str]:
+    """根据原图文件名生成各变体的 URL（不访问磁盘，缺失的变体在首次请求时生成）。"""
+    if not IMAGE_VARIANTS_ENABLED or not filename or "/" in filename:
+        return {}
+    if Path(filename).suffix.lower() not in ORIGINAL_EXTENSIONS:
+        return {}
+    return {name: f"{url_prefix}/{variant_filename(filename, name)}" for name in VARIANT_NAMES}
+
+
+def parse_variant_filename(filename: str) -> Optional[tuple[str, str]]:
+    """解析变体文件名，返回 (原图文件名, 变体名)；不是变体时返回 None。"""
+    if not IMAGE_VARIANTS_ENABLED:
+        return None
+    match = _VARIANT_PATTERN.match(filename)
+    if not match or Path(match.group("original")).suffix.lower() not in ORIGINAL_EXTENSIONS:
+        return None
+    return match.group("original"), match.group("variant")
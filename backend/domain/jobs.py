@@ -0,0 +1,31 @@
+"""
+后台任务数据结构定义
+"""
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from domain.clothes import ClothesItem
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+JOB_TERMINAL_STATUSES = {"succeeded", "failed"}
+
+
+class UploadJobAccepted(BaseModel):
+    """异步上传受理结果"""
+    job_id: str
+    status: JobStatus
+    status_url: str
+    events_url: str
+
+
+class UploadJobStatus(BaseModel):
+    """异步上传任务状态"""
+    job_id: str
+    status: JobStatus
+    stage: Optional[str] = None  # segment / analyze / save
+    error: Optional[str] = None
+    attempts: int = 0
+    clothes: Optional[ClothesItem] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
@@ -0,0 +1,91 @@
+"""
+衣物语义标签归一化
+季节 / 使用场景 / 颜色的别名表与规范化函数，供推荐服务与标签索引表共用
+"""
+from typing import Iterable
+
+SEASON_ALIASES = {
+    "春": {"春", "春季", "spring"},
+    "夏": {"夏", "夏季", "summer"},
+    "秋": {"秋", "秋季", "autumn", "fall"},
+    "冬": {"冬", "冬季", "winter"},
+}
+
+GOAL_ALIASES = {
+    "commute": {"commute", "work", "office", "通勤", "上班", "工作", "出勤"},
+    "date": {"date", "dating", "约会", "聚会", "见面"},
+    "sport": {"sport", "gym", "workout", "run", "运动", "健身", "跑步", "训练"},
+    "formal": {"formal", "business", "meeting", "interview", "商务", "正式", "面试", "会议"},
+    "daily": {"daily", "casual", "weekend", "日常", "休闲", "周末", "出街"},
+    "travel": {"travel", "trip", "旅行", "出游", "旅游"},
+}
+
+COLOR_ALIASES = {
+    "red": {"red", "红", "红色"},
+    "blue": {"blue", "蓝", "蓝色"},
+    "green": {"green", "绿", "绿色"},
+    "yellow": {"yellow", "黄", "黄色"},
+    "purple": {"purple", "紫", "紫色"},
+    "pink": {"pink", "粉", "粉色"},
+    "orange": {"orange", "橙", "橙色"},
+    "black": {"black", "黑", "黑色"},
+    "white": {"white", "白", "白色"},
+    "gray": {"gray", "grey", "灰", "灰色"},
+    "brown": {"brown", "棕", "棕色", "咖"},
+}
+
+# clothes_tags.kind 取值
+TAG_KIND_SEASON = "season"
+TAG_KIND_USAGE = "usage"
+TAG_KIND_COLOR = "color"
+
+
+def normalize_seasons(raw_values: list[str]) -> set[str]:
+    normalized: set[str] = set()
+    for value in raw_values or []:
+        token = (value or "").strip().lower()
+        if not token:
+            continue
+        for canonical, aliases in SEASON_ALIASES.items():
+            if token in aliases:
+                normalized.add(canonical)
+                break
+    return normalized
+
+
+def usage_tokens(values: list[str]) -> set[str]:
+    normalized: set[str] = set()
+    for value in values or []:
+        token = (value or "").strip().lower()
+        if not token:
+            continue
+        normalized.add(token)
+        for canonical, aliases in GOAL_ALIASES.items():
+            if token in aliases:
+                normalized.add(canonical)
+                break
+    return normalized
+
+
+def canonical_colors(text: str) -> set[str]:
+    """从颜色描述文本中提取规范色名（如 "黑色系" -> black）。"""
+    lowered = (text or "").strip().lower()
+    if not lowered:
+        return set()
+    return {
+        canonical
+        for canonical, aliases in COLOR_ALIASES.items()
+        if any(alias in lowered for alias in aliases)
+    }
+
+
+def build_clothes_tags(
+    season_semantics: Iterable[str],
+    usage_semantics: Iterable[str],
+    color_semantics: str,
+) -> set[tuple[str, str]]:
+    """生成写入 clothes_tags 的 (kind, canonical_value) 集合。"""
+    tags = {(TAG_KIND_SEASON, value) for value in normalize_seasons(list(season_semantics))}
+    tags |= {(TAG_KIND_USAGE, value) for value in usage_tokens(list(usage_semantics))}
+    tags |= {(TAG_KIND_COLOR, value) for value in canonical_colors(color_semantics)}
+    return tags
@@ -15,7 +15,26 @@ from api.weather import router as weather_router
 from api.recommendation import router as recommendation_router
 from api.horoscope import router as horoscope_router
 from api.tryon import router as tryon_router
-from storage.db import init_db
+from api.uploads_static import UploadsStaticFiles
+from api.responses import install_compression
+from storage.db import (
+    init_db,
+    open_pool,
+    close_pool,
+    get_pool_stats,
+    start_db_maintenance,
+    stop_db_maintenance,
+    get_db_maintenance_stats,
+)
+from storage.snapshot import get_snapshot_stats
+from services.weather import get_geocoding_breaker_stats, get_weather_cache_stats, stop_weather_revalidation
+from services.http_client import start_http_clients, close_http_clients, get_http_client_stats
+from services.segment import start_segment_executor, shutdown_segment_executor, get_segment_stats
+from services.upload_jobs import start_upload_workers, stop_upload_workers, get_upload_job_stats
+from services.vision_image import get_vision_image_stats
+from services.llm_text_cache import get_llm_text_cache_stats
+from services.singleflight import get_singleflight_stats
+from services.prewarm import start_prewarm_scheduler, stop_prewarm_scheduler, get_prewarm_status
 
 # 上传目录
 UPLOAD_DIR = Path(__file__).parent / "uploads"
@@ -28,8 +47,21 @@ async def lifespan(app: FastAPI):
     # 启动时初始化数据库
     await init_db()
     print("✅ 数据库初始化完成")
+    await open_pool()
+    start_db_maintenance()
+    await start_http_clients()
+    start_segment_executor()
+    await start_upload_workers()
+    start_prewarm_scheduler()
     yield
-    # 关闭时的清理工作（如需要）
+    # 关闭时的清理工作
+    await stop_prewarm_scheduler()
+    await stop_weather_revalidation()
+    await stop_upload_workers()
+    shutdown_segment_executor()
+    await close_http_clients()
+    await stop_db_maintenance()
+    await close_pool()
     print("👋 应用关闭")
 
 
@@ -49,8 +81,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 静态文件 - 用于访问上传的图片
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# 响应压缩（GZip / Brotli）
+install_compression(app)
+
+# 静态文件 - 用于访问上传的图片（含按需生成的缩略图等变体）
+app.mount("/uploads", UploadsStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 # 注册路由
 app.include_router(upload_router, prefix="/api", tags=["上传"])
@@ -70,20 +105,57 @@ async def api_info():
         "docs": "/docs",
         "endpoints": {
             "upload": "POST /api/upload",
+            "upload_batch": "POST /api/upload/batch",
+            "upload_job": "POST /api/upload/jobs",
+            "upload_job_status": "GET /api/upload/jobs/{job_id}",
+            "upload_job_events": "GET /api/upload/jobs/{job_id}/events (SSE)",
             "wardrobe": "GET /api/wardrobe",
+            "wardrobe_items": "GET /api/wardrobe/items?limit=&cursor=&fields=",
+            "wardrobe_counts": "GET /api/wardrobe/counts",
+            "wardrobe_duplicates": "GET /api/wardrobe/duplicates?max_distance=",
+            "wardrobe_search": "GET /api/wardrobe/search?category=&season=&usage=&color=",
             "wardrobe_by_category": "GET /api/wardrobe/{category}",
             "clothes_detail": "GET /api/clothes/{id}",
             "delete_clothes": "DELETE /api/clothes/{id}",
             "weather": "GET /api/weather",
             "weather_suggestion": "GET /api/weather/suggestion",
             "ai_recommendation": "GET /api/recommendation",
+            "ai_recommendation_stream": "GET /api/recommendation/stream (SSE)",
+            "outfit_recommendations": "GET /api/recommendation/outfits?k=",
             "daily_horoscope": "GET /api/horoscope/daily",
             "install_rembg": "POST /api/install-rembg",
-            "tryon": "POST /api/tryon"
+            "tryon": "POST /api/tryon",
+            "stats": "GET /api/stats",
+            "prewarm_status": "GET /api/prewarm/status"
         }
     }
 
 
+@app.get("/api/stats")
+async def runtime_stats():
+    """运行时统计（连接池等）"""
+    return {
+        "db_pool": get_pool_stats(),
+        "db_maintenance": get_db_maintenance_stats(),
+        "wardrobe_snapshot": get_snapshot_stats(),
+        "geocoding_breakers": get_geocoding_breaker_stats(),
+        "weather_cache": get_weather_cache_stats(),
+        "http_clients": get_http_client_stats(),
+        "segmentation": get_segment_stats(),
+        "upload_jobs": get_upload_job_stats(),
+        "vision_image": get_vision_image_stats(),
+        "llm_text_cache": get_llm_text_cache_stats(),
+        "singleflight": get_singleflight_stats(),
+        "prewarm": get_prewarm_status(),
+    }
+
+
+@app.get("/api/prewarm/status")
+async def prewarm_status():
+    """后台缓存预热状态（下次执行时间、最近一次各地点 / 星座的结果）"""
+    return get_prewarm_status()
+
+
 @app.get("/health")
 async def health_check():
     """健康检查"""
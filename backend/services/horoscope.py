@@ -7,18 +7,22 @@ import os
 from datetime import datetime
 from typing import Optional
 
-import httpx
-
 from storage.config_store import load_config
 from storage.db import (
     get_horoscope_record,
+    get_horoscope_record_version,
     upsert_horoscope_source,
     update_horoscope_inference,
 )
+from services.http_client import http_client
+from services.singleflight import get_singleflight
 from services.weather import WeatherInfo
 
 AZTRO_API_URL = os.getenv("AZTRO_API_URL", "https://aztro.sameerkumar.website").rstrip("/")
 
+# 按 (类型, 日期, 星座) 合并并发的源数据拉取与 LLM 推理
+_horoscope_flight = get_singleflight("horoscope")
+
 ZODIAC_NAMES = {
     "aries": "白羊座",
     "taurus": "金牛座",
@@ -190,10 +194,10 @@ async def fetch_aztro_horoscope(sign_key: str, today: str, weather: WeatherInfo)
     """获取 aztro 今日运势。"""
     url = f"{AZTRO_API_URL}/?sign={sign_key}&day=today"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, headers={"Accept": "application/json"})
+        async with http_client("horoscope") as client:
+            response = await client.post(url, headers={"Accept": "application/json"}, timeout=10.0)
             if response.status_code in (404, 405):
-                response = await client.get(url, headers={"Accept": "application/json"})
+                response = await client.get(url, headers={"Accept": "application/json"}, timeout=10.0)
 
         if response.status_code != 200:
             print(f"aztro 请求失败: {response.status_code} {response.text[:200]}")
@@ -268,7 +272,7 @@ aztro 原始数据：
     }
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with http_client("llm") as client:
             response = await client.post(
                 f"{api_base}/chat/completions",
                 headers={
@@ -276,6 +280,7 @@ aztro 原始数据：
                     "Content-Type": "application/json",
                 },
                 json=payload,
+                timeout=15.0,
             )
 
         if response.status_code != 200:
@@ -340,16 +345,101 @@ def build_horoscope_response(
     }
 
 
+def get_horoscope_date() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def resolve_zodiac_sign(zodiac_sign: Optional[str] = None) -> Optional[str]:
+    """请求参数优先，其次使用设置中的星座。"""
+    return normalize_zodiac_sign(zodiac_sign) or normalize_zodiac_sign(load_config().zodiac_sign)
+
+
+async def get_daily_horoscope_version(
+    zodiac_sign: Optional[str] = None,
+    include_inference: bool = True,
+) -> Optional[dict]:
+    """
+    今日运势记录的版本信息，供 HTTP ETag 使用（不请求天气、不执行推理）。
+    未设置星座、尚无记录，或本次请求还需要执行推理时返回 None。
+    """
+    sign_key = resolve_zodiac_sign(zodiac_sign)
+    if not sign_key:
+        return None
+    today = get_horoscope_date()
+    version = await get_horoscope_record_version(record_date=today, zodiac_sign=sign_key)
+    if not version or (include_inference and version["llm_status"] == "pending"):
+        return None
+    return {"date": today, "zodiac_sign": sign_key, **version}
+
+
+async def _ensure_horoscope_source(sign_key: str, zodiac_name: str, today: str, weather: WeatherInfo) -> dict:
+    """当天记录不存在时拉取源数据（aztro，失败用兜底）并写入，返回记录。"""
+    record = await get_horoscope_record(record_date=today, zodiac_sign=sign_key)
+    if record:
+        return record
+
+    source_payload = await fetch_aztro_horoscope(sign_key=sign_key, today=today, weather=weather)
+    source_provider = "aztro"
+    if not source_payload:
+        source_payload = fallback_horoscope_source(sign_key=sign_key, weather=weather, today=today)
+        source_provider = "fallback"
+
+    record_id = await upsert_horoscope_source(
+        record_date=today,
+        zodiac_sign=sign_key,
+        zodiac_name=zodiac_name,
+        source_provider=source_provider,
+        source_payload=source_payload,
+    )
+    return {
+        "id": record_id,
+        "source_payload": source_payload,
+        "source_provider": source_provider,
+        "llm_status": "pending",
+        "llm_reasoning": "",
+    }
+
+
+async def _run_horoscope_inference(
+    record_id: int,
+    sign_key: str,
+    zodiac_name: str,
+    today: str,
+    weather: WeatherInfo,
+    source_payload: dict,
+) -> tuple[str, str]:
+    """执行当天的 LLM 推理并写回，返回 (llm_status, llm_reasoning)；已被其他请求完成时直接返回结果。"""
+    record = await get_horoscope_record(record_date=today, zodiac_sign=sign_key)
+    if record and record.get("llm_status", "pending") != "pending":
+        return record.get("llm_status", ""), record.get("llm_reasoning", "")
+
+    llm_reasoning = ""
+    reasoning, status, err = await generate_llm_reasoning(
+        sign_key=sign_key,
+        zodiac_name=zodiac_name,
+        weather=weather,
+        source_payload=source_payload,
+    )
+    if reasoning:
+        llm_reasoning = reasoning
+
+    await update_horoscope_inference(
+        record_id=record_id,
+        llm_status=status,
+        llm_reasoning=llm_reasoning,
+        llm_error=err,
+    )
+    return status, llm_reasoning
+
+
 async def get_daily_horoscope(
     weather: WeatherInfo,
     zodiac_sign: Optional[str] = None,
     include_inference: bool = True,
 ) -> dict:
     """获取今日星座运势（先源数据，后可选推理）。"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    config = load_config()
-
-    sign_key = normalize_zodiac_sign(zodiac_sign) or normalize_zodiac_sign(config.zodiac_sign)
+    today = get_horoscope_date()
+    sign_key = resolve_zodiac_sign(zodiac_sign)
     if not sign_key:
         return {
             "date": today,
@@ -368,47 +458,23 @@ async def get_daily_horoscope(
 
     zodiac_name = ZODIAC_NAMES.get(sign_key, sign_key)
 
-    cached = await get_horoscope_record(record_date=today, zodiac_sign=sign_key)
-    if cached:
-        source_payload = cached.get("source_payload") or {}
-        source_provider = cached.get("source_provider", "cached")
-        llm_status = cached.get("llm_status", "pending")
-        llm_reasoning = cached.get("llm_reasoning", "")
-        record_id = int(cached["id"])
-    else:
-        source_payload = await fetch_aztro_horoscope(sign_key=sign_key, today=today, weather=weather)
-        source_provider = "aztro"
-        if not source_payload:
-            source_payload = fallback_horoscope_source(sign_key=sign_key, weather=weather, today=today)
-            source_provider = "fallback"
-
-        record_id = await upsert_horoscope_source(
-            record_date=today,
-            zodiac_sign=sign_key,
-            zodiac_name=zodiac_name,
-            source_provider=source_provider,
-            source_payload=source_payload,
+    record = await get_horoscope_record(record_date=today, zodiac_sign=sign_key)
+    if not record:
+        # 新的一天首批并发请求只拉取一次源数据
+        record = await _horoscope_flight.do(
+            ("source", today, sign_key),
+            lambda: _ensure_horoscope_source(sign_key, zodiac_name, today, weather),
         )
-        llm_status = "pending"
-        llm_reasoning = ""
+    source_payload = record.get("source_payload") or {}
+    source_provider = record.get("source_provider", "cached")
+    llm_status = record.get("llm_status", "pending")
+    llm_reasoning = record.get("llm_reasoning", "")
 
-    # 每天只推理一次：只有当天首次记录的 pending 状态才执行推理
+    # 每天只推理一次：只有当天首次记录的 pending 状态才执行推理；并发请求共享同一次推理
     if include_inference and llm_status == "pending":
-        reasoning, status, err = await generate_llm_reasoning(
-            sign_key=sign_key,
-            zodiac_name=zodiac_name,
-            weather=weather,
-            source_payload=source_payload,
-        )
-        if reasoning:
-            llm_reasoning = reasoning
-        llm_status = status
-
-        await update_horoscope_inference(
-            record_id=record_id,
-            llm_status=llm_status,
-            llm_reasoning=llm_reasoning,
-            llm_error=err,
+        llm_status, llm_reasoning = await _horoscope_flight.do(
+            ("inference", today, sign_key),
+            lambda: _run_horoscope_inference(int(record["id"]), sign_key, zodiac_name, today, weather, source_payload),
         )
 
     return build_horoscope_response(
@@ -0,0 +1,135 @@
+"""
+出站 HTTP 客户端注册表
+按上游划分共享的 httpx.AsyncClient（连接池 / 超时 / HTTP/2），由应用 lifespan 统一创建与关闭。
+未启动注册表时（脚本、单元测试）退化为每次调用新建临时客户端。
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+
+# h2 由 requirements.txt 中的 httpx[http2] 安装；未安装时退化为 HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "1").strip().lower() not in ("0", "false", "no", "off")
+HTTP_CLIENT_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", "30"))
+
+
+@dataclass(frozen=True)
+class UpstreamProfile:
+    timeout: float
+    max_connections: int
+    max_keepalive_connections: int
+    http2: bool = True
+
+
+# 各上游的默认连接池与超时，调用方仍可按请求传入 timeout 覆盖
+UPSTREAM_PROFILES: dict[str, UpstreamProfile] = {
+    "geocoding": UpstreamProfile(timeout=10.0, max_connections=10, max_keepalive_connections=5),
+    "weather": UpstreamProfile(timeout=10.0, max_connections=10, max_keepalive_connections=5),
+    "horoscope": UpstreamProfile(timeout=15.0, max_connections=10, max_keepalive_connections=5),
+    "llm": UpstreamProfile(timeout=60.0, max_connections=20, max_keepalive_connections=10),
+    "removebg": UpstreamProfile(timeout=60.0, max_connections=4, max_keepalive_connections=2),
+    "tryon": UpstreamProfile(timeout=120.0, max_connections=4, max_keepalive_connections=2),
+}
+
+
+def _new_client_stats() -> dict[str, int]:
+    return {"requests": 0, "new_connections": 0}
+
+
+_CLIENTS: dict[str, httpx.AsyncClient] = {}
+_CLIENTS_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_CLIENT_STATS: dict[str, dict[str, int]] = {name: _new_client_stats() for name in UPSTREAM_PROFILES}
+_EPHEMERAL_CLIENTS = 0
+
+
+def _stats_for(name: str) -> dict[str, int]:
+    return _CLIENT_STATS.setdefault(name, _new_client_stats())
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    profile = UPSTREAM_PROFILES.get(name) or UPSTREAM_PROFILES["weather"]
+    stats = _stats_for(name)
+
+    async def trace(event_name: str, info: dict[str, Any]) -> None:
+        # httpcore 仅在新建 TCP 连接时触发 connect_tcp；复用的连接不会触发
+        if event_name == "connection.connect_tcp.complete":
+            stats["new_connections"] += 1
+
+    async def on_request(request: httpx.Request) -> None:
+        stats["requests"] += 1
+        request.extensions["trace"] = trace
+
+    return httpx.AsyncClient(
+        timeout=profile.timeout,
+        limits=httpx.Limits(
+            max_connections=profile.max_connections,
+            max_keepalive_connections=profile.max_keepalive_connections,
+            keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        ),
+        http2=profile.http2 and HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE,
+        event_hooks={"request": [on_request]},
+    )
+
+
+async def start_http_clients() -> None:
+    """创建所有上游的共享客户端（在应用启动时调用）。"""
+    global _CLIENTS_LOOP
+    await close_http_clients()
+    _CLIENTS_LOOP = asyncio.get_running_loop()
+    for name in UPSTREAM_PROFILES:
+        _CLIENTS[name] = _build_client(name)
+    http2_note = "启用" if HTTP2_AVAILABLE and HTTP_CLIENT_HTTP2 else "未启用"
+    print(f"✅ 出站 HTTP 客户端已就绪（{len(_CLIENTS)} 个上游，HTTP/2 {http2_note}）")
+
+
+async def close_http_clients() -> None:
+    global _CLIENTS_LOOP
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    _CLIENTS_LOOP = None
+    for client in clients:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def http_client(name: str) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    获取指定上游的客户端：注册表已启动且在同一事件循环时复用共享客户端，
+    否则创建临时客户端并在退出时关闭。
+    """
+    global _EPHEMERAL_CLIENTS
+    client = _CLIENTS.get(name)
+    if client is not None and _CLIENTS_LOOP is asyncio.get_running_loop():
+        yield client
+        return
+
+    _EPHEMERAL_CLIENTS += 1
+    async with _build_client(name) as ephemeral:
+        yield ephemeral
+
+
+def get_http_client_stats() -> dict[str, Any]:
+    upstreams = {}
+    for name, stats in _CLIENT_STATS.items():
+        requests = stats["requests"]
+        new_connections = stats["new_connections"]
+        upstreams[name] = {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused_connections": max(requests - new_connections, 0),
+        }
+    return {
+        "shared": bool(_CLIENTS),
+        "http2": HTTP2_AVAILABLE and HTTP_CLIENT_HTTP2,
+        "ephemeral_clients": _EPHEMERAL_CLIENTS,
+        "upstreams": upstreams,
+    }
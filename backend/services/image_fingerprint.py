@@ -0,0 +1,45 @@
+"""
+图片指纹：原始字节的 SHA-256（完全相同）与 dHash 感知哈希（近似重复）
+"""
+import hashlib
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+
+# dHash 尺寸：9x8 灰度图，比较相邻像素得到 64 位
+DHASH_SIZE = 8
+
+
+@dataclass(frozen=True)
+class ImageFingerprint:
+    sha256: str
+    dhash: Optional[str]  # 16 位十六进制；无法解码图片时为 None
+
+
+def compute_dhash(image_bytes: bytes) -> Optional[str]:
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            grayscale = image.convert("L").resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+            pixels = grayscale.tobytes()
+    except Exception:
+        return None
+
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for column in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return f"{value:016x}"
+
+
+def compute_fingerprint(image_bytes: bytes) -> ImageFingerprint:
+    return ImageFingerprint(
+        sha256=hashlib.sha256(image_bytes).hexdigest(),
+        dhash=compute_dhash(image_bytes),
+    )
+
+
+def hamming_distance(left: str, right: str) -> int:
+    return (int(left, 16) ^ int(right, 16)).bit_count()
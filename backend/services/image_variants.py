@@ -0,0 +1,78 @@
+"""
+生成上传图片的派生尺寸（缩略图 / 中图 / WebP 原尺寸）
+派生文件内容只由原图决定，原图文件名是 UUID、写入后不再修改，因此派生文件可以长期缓存。
+文件命名约定见 domain.image_variants。
+"""
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from domain.image_variants import (
+    IMAGE_VARIANTS_ENABLED,
+    VARIANT_EXTENSION,
+    VARIANT_SPECS,
+    VariantSpec,
+    variant_filename,
+)
+
+IMAGE_VARIANT_QUALITY = min(max(int(os.getenv("IMAGE_VARIANT_QUALITY", "80")), 1), 100)
+
+
+def _encode_variant(image: Image.Image, spec: VariantSpec, target: Path) -> None:
+    variant = image.copy()
+    if spec.max_edge and max(variant.size) > spec.max_edge:
+        variant.thumbnail((spec.max_edge, spec.max_edge), Image.LANCZOS)
+
+    # 先写临时文件再原子替换，并发生成同一变体时不会读到半个文件
+    temp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        if VARIANT_EXTENSION == "webp":
+            variant.save(temp_path, format="WEBP", quality=IMAGE_VARIANT_QUALITY, method=4)
+        else:
+            variant.save(temp_path, format="PNG", optimize=True)
+        os.replace(temp_path, target)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def generate_image_variants(original_path: Path, variants: Optional[tuple[str, ...]] = None, force: bool = False) -> list[Path]:
+    """
+    同步生成原图的派生文件（CPU 密集，调用方应放到线程中执行）。
+    已存在的变体默认跳过，返回本次新生成的文件路径。
+    """
+    original_path = Path(original_path)
+    wanted = [spec for spec in VARIANT_SPECS if variants is None or spec.name in variants]
+    pending = [
+        (spec, original_path.with_name(variant_filename(original_path.name, spec.name)))
+        for spec in wanted
+    ]
+    if not force:
+        pending = [(spec, target) for spec, target in pending if not target.exists()]
+    if not pending:
+        return []
+
+    with Image.open(original_path) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    generated: list[Path] = []
+    for spec, target in pending:
+        _encode_variant(image, spec, target)
+        generated.append(target)
+    return generated
+
+
+async def generate_image_variants_async(original_path: Path, variants: Optional[tuple[str, ...]] = None) -> list[Path]:
+    """在线程中生成派生文件；失败只记录日志，不影响上传本身。"""
+    if not IMAGE_VARIANTS_ENABLED:
+        return []
+    try:
+        return await asyncio.to_thread(generate_image_variants, original_path, variants)
+    except Exception as e:
+        print(f"⚠️  生成图片变体失败 {Path(original_path).name}: {e}")
+        return []
@@ -0,0 +1,70 @@
+"""
+LLM 推荐文案缓存
+以「规范化的提示词输入 + 模型名」的哈希为键，把生成成功的文案存入 SQLite，
+相同输入在 TTL 内直接复用，避免重复的付费调用；超过行数上限时淘汰最早写入的记录。
+"""
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from storage.db import cleanup_llm_text_cache, get_llm_text_cache, upsert_llm_text_cache
+
+LLM_TEXT_CACHE_ENABLED = os.getenv("LLM_TEXT_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+LLM_TEXT_CACHE_TTL = max(int(os.getenv("LLM_TEXT_CACHE_TTL", "3600")), 1)
+LLM_TEXT_CACHE_MAX_ROWS = max(int(os.getenv("LLM_TEXT_CACHE_MAX_ROWS", "500")), 1)
+# 提示词模板变化时递增，使旧缓存失效
+LLM_TEXT_CACHE_VERSION = 1
+
+_CACHE_STATS = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evicted": 0, "errors": 0}
+
+
+def build_cache_key(inputs: dict[str, Any], model: str) -> str:
+    canonical = json.dumps(
+        {"version": LLM_TEXT_CACHE_VERSION, "model": model, "inputs": inputs},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def get_cached_text(cache_key: str, bypass_cache: bool = False) -> Optional[str]:
+    """命中且未过期时返回文案；bypass_cache 时跳过读取（生成结果仍会写回）。"""
+    if not LLM_TEXT_CACHE_ENABLED:
+        return None
+    if bypass_cache:
+        _CACHE_STATS["bypassed"] += 1
+        return None
+    try:
+        text = await get_llm_text_cache(cache_key, LLM_TEXT_CACHE_TTL)
+    except Exception as exc:
+        _CACHE_STATS["errors"] += 1
+        print(f"⚠️  读取 LLM 文案缓存失败: {exc}")
+        return None
+    _CACHE_STATS["hits" if text is not None else "misses"] += 1
+    return text
+
+
+async def store_text(cache_key: str, model: str, text: str) -> None:
+    if not LLM_TEXT_CACHE_ENABLED or not text:
+        return
+    try:
+        await upsert_llm_text_cache(cache_key, model, text)
+        _CACHE_STATS["stores"] += 1
+        _CACHE_STATS["evicted"] += await cleanup_llm_text_cache(LLM_TEXT_CACHE_TTL, LLM_TEXT_CACHE_MAX_ROWS)
+    except Exception as exc:
+        _CACHE_STATS["errors"] += 1
+        print(f"⚠️  写入 LLM 文案缓存失败: {exc}")
+
+
+def get_llm_text_cache_stats() -> dict[str, Any]:
+    lookups = _CACHE_STATS["hits"] + _CACHE_STATS["misses"]
+    return {
+        "enabled": LLM_TEXT_CACHE_ENABLED,
+        "ttl_seconds": LLM_TEXT_CACHE_TTL,
+        "max_rows": LLM_TEXT_CACHE_MAX_ROWS,
+        "hit_rate": round(_CACHE_STATS["hits"] / lookups, 4) if lookups else 0.0,
+        **_CACHE_STATS,
+    }
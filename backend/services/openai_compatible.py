@@ -2,7 +2,6 @@
 OpenAI 兼容 API 服务
 支持任何 OpenAI 风格的 API 接口
 """
-import httpx
 import base64
 import json
 import re
@@ -10,6 +9,8 @@ from typing import List, Optional
 from storage.config_store import load_config
 from domain.prompts import CLOTHES_SEMANTIC_PROMPT
 from domain.clothes import ClothesSemantics
+from services.http_client import http_client
+from services.vision_image import prepare_vision_image_async
 
 
 async def fetch_available_models() -> List[dict]:
@@ -29,9 +30,10 @@ async def fetch_available_models() -> List[dict]:
     url = f"{api_base}/models"
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client("llm") as client:
             response = await client.get(
                 url,
+                timeout=30.0,
                 headers={
                     "Authorization": f"Bearer {config.api_key}",
                     "Content-Type": "application/json",
@@ -108,8 +110,9 @@ async def analyze_clothes_openai(image_bytes: bytes) -> ClothesSemantics:
     
     url = f"{api_base}/chat/completions"
     
-    # 将图片转换为 base64
-    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+    # 裁剪 / 缩放 / 压缩后再转换为 base64
+    prepared = await prepare_vision_image_async(image_bytes, config.vision_image_for(config.model))
+    image_base64 = base64.b64encode(prepared.data).decode("utf-8")
     
     # 构建请求体
     payload = {
@@ -125,7 +128,7 @@ async def analyze_clothes_openai(image_bytes: bytes) -> ClothesSemantics:
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{image_base64}"
+                            "url": f"{prepared.data_url_prefix}{image_base64}"
                         }
                     }
                 ]
@@ -134,9 +137,10 @@ async def analyze_clothes_openai(image_bytes: bytes) -> ClothesSemantics:
         "max_tokens": 1000
     }
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with http_client("llm") as client:
         response = await client.post(
             url,
+            timeout=60.0,
             headers={
                 "Authorization": f"Bearer {config.api_key}",
                 "Content-Type": "application/json"
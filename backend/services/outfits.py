@@ -0,0 +1,296 @@
+"""
+整套穿搭组合搜索
+在单品得分（score_features）之上叠加单品之间的配色与风格协调分，
+用剪枝 + beam search 找出得分最高的 K 套上装 / 下装 / 鞋履组合。
+"""
+import heapq
+import os
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from domain.tags import canonical_colors
+from services.horoscope import get_daily_horoscope
+from services.recommendation import (
+    ItemFeatures,
+    ScoringContext,
+    build_purchase_suggestion,
+    build_recommendation_summary,
+    build_scoring_context,
+    build_temperature_profile,
+    build_temperature_rule,
+    build_weather_payload,
+    get_snapshot_features,
+    get_snapshot_vector_index,
+    normalize_goal,
+    score_features,
+    use_vector_engine,
+)
+from services.weather import WeatherInfo
+from storage.config_store import load_config
+from storage.snapshot import WardrobeSnapshot, get_wardrobe_snapshot
+
+OUTFIT_CATEGORIES = ("top", "bottom", "shoes")
+OUTFIT_MAX_K = max(int(os.getenv("OUTFIT_MAX_K", "20")), 1)
+# 中间层保留的部分组合数量（不小于 k）
+OUTFIT_BEAM_WIDTH = max(int(os.getenv("OUTFIT_BEAM_WIDTH", "64")), 1)
+
+# 黑白灰棕视为中性色，与任何颜色都协调
+NEUTRAL_COLORS = frozenset({"black", "white", "gray", "brown"})
+COLOR_HARMONY_BONUS = 1
+COLOR_CLASH_PENALTY = -1
+STYLE_COHERENCE_BONUS = 2
+STYLE_CLASH_PENALTY = -2
+SPORTY_STYLES = frozenset({"运动", "sport", "sporty", "athleisure"})
+FORMAL_STYLES = frozenset({"正式", "商务", "formal", "business"})
+# 单对单品协调分的上下界，用于剪枝
+PAIR_MAX = COLOR_HARMONY_BONUS + STYLE_COHERENCE_BONUS
+PAIR_MIN = COLOR_CLASH_PENALTY + STYLE_CLASH_PENALTY
+
+
+@dataclass(frozen=True)
+class PairFeatures:
+    """单品参与两两协调打分所需的特征。"""
+    colors: frozenset[str]
+    accents: frozenset[str]
+    style_values: frozenset[str]
+    sporty: bool
+    formal: bool
+
+
+def build_pair_features(features: ItemFeatures) -> PairFeatures:
+    colors = frozenset(canonical_colors(str(features.item.get("color_semantics", ""))))
+    return PairFeatures(
+        colors=colors,
+        accents=colors - NEUTRAL_COLORS,
+        style_values=features.style_values,
+        sporty=not features.style_values.isdisjoint(SPORTY_STYLES),
+        formal=not features.style_values.isdisjoint(FORMAL_STYLES),
+    )
+
+
+def _build_snapshot_pair_features(snapshot: WardrobeSnapshot) -> dict[int, PairFeatures]:
+    features_by_id = get_snapshot_features(snapshot)
+    return {item_id: build_pair_features(features) for item_id, features in features_by_id.items()}
+
+
+def get_snapshot_pair_features(snapshot: WardrobeSnapshot) -> dict[int, PairFeatures]:
+    return snapshot.derived("outfits.pair_features", _build_snapshot_pair_features)
+
+
+def score_pair(first: PairFeatures, second: PairFeatures, with_reasons: bool = False) -> tuple[int, list[str]]:
+    """两件单品之间的协调分：配色（中性色 / 同色系加分，撞色扣分）+ 风格（一致加分，运动与正式冲突扣分）。"""
+    score = 0
+    reasons: list[str] = []
+
+    if first.colors and second.colors:
+        if not first.accents or not second.accents or not first.accents.isdisjoint(second.accents):
+            score += COLOR_HARMONY_BONUS
+            if with_reasons:
+                reasons.append("配色协调")
+        else:
+            score += COLOR_CLASH_PENALTY
+            if with_reasons:
+                reasons.append("彩色单品撞色")
+
+    if not first.style_values.isdisjoint(second.style_values):
+        score += STYLE_COHERENCE_BONUS
+        if with_reasons:
+            reasons.append("风格统一")
+    elif (first.sporty and second.formal) or (first.formal and second.sporty):
+        score += STYLE_CLASH_PENALTY
+        if with_reasons:
+            reasons.append("运动与正式风格冲突")
+
+    return score, reasons
+
+
+@dataclass(frozen=True)
+class _Candidate:
+    score: int
+    order: int
+    features: ItemFeatures
+    pair: PairFeatures
+
+
+def _category_candidates(
+    snapshot: WardrobeSnapshot,
+    category: str,
+    context: ScoringContext,
+    season_only: bool,
+) -> list[tuple[int, ItemFeatures]]:
+    """该类别候选的 (单品得分, 特征)，保持衣柜顺序。"""
+    if use_vector_engine(snapshot):
+        index = get_snapshot_vector_index(snapshot)
+        return [
+            (score, index.features[row])
+            for row, score in index.candidate_scores(category, context, season_only=season_only)
+        ]
+    features_by_id = get_snapshot_features(snapshot)
+    if season_only:
+        items = snapshot.compatible_dicts(category, context.allowed_seasons)
+    else:
+        items = snapshot.dicts_by_category.get(category, ())
+    candidates = []
+    for item in items:
+        features = features_by_id[item["id"]]
+        candidates.append((score_features(features, category, context, with_reasons=False)[0], features))
+    return candidates
+
+
+def _prune_candidates(candidates: list[_Candidate], k: int) -> list[_Candidate]:
+    """
+    按单品得分降序排列，并剪掉不可能进入前 k 的单品：
+    若至少有 k 件同类单品比它高出 2 * (PAIR_MAX - PAIR_MIN) 以上，
+    把它换成其中任意一件都能得到更高分的组合，因此它不会出现在前 k 套中。
+    """
+    ordered = sorted(candidates, key=lambda candidate: (-candidate.score, candidate.order))
+    if len(ordered) <= k:
+        return ordered
+    threshold = ordered[k - 1].score - 2 * (PAIR_MAX - PAIR_MIN)
+    return [candidate for candidate in ordered if candidate.score >= threshold]
+
+
+def search_outfits(
+    slots: dict[str, list[_Candidate]],
+    k: int,
+    beam_width: int = OUTFIT_BEAM_WIDTH,
+) -> list[tuple[int, dict[str, _Candidate]]]:
+    """
+    逐类别扩展部分组合，每层只保留得分最高的 beam_width 个（最后一层保留 k 个）。
+    同分时按各单品在候选列表中的先后排序，结果确定。
+    """
+    categories = [category for category in OUTFIT_CATEGORIES if slots.get(category)]
+    if not categories:
+        return []
+    beam_width = max(beam_width, k)
+    states: list[tuple[int, tuple[_Candidate, ...], tuple[int, ...]]] = [(0, (), ())]
+
+    for level, category in enumerate(categories):
+        width = k if level == len(categories) - 1 else beam_width
+        # 小顶堆：堆顶是当前保留集合中最差的组合
+        heap: list[tuple[int, tuple[int, ...], tuple[_Candidate, ...]]] = []
+        max_pair_gain = level * PAIR_MAX
+        for state_score, picks, ranks in states:
+            for rank, candidate in enumerate(slots[category]):
+                # 候选按单品得分降序：乐观估计都进不了堆时，后面的候选更不可能
+                if len(heap) >= width and state_score + candidate.score + max_pair_gain < heap[0][0]:
+                    break
+                score = state_score + candidate.score
+                for picked in picks:
+                    score += score_pair(picked.pair, candidate.pair)[0]
+                entry = (score, tuple(-value for value in ranks + (rank,)), picks + (candidate,))
+                if len(heap) < width:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+        ordered = sorted(heap, key=lambda entry: entry[:2], reverse=True)
+        states = [(score, picks, tuple(-value for value in neg_ranks)) for score, neg_ranks, picks in ordered]
+
+    return [(score, dict(zip(categories, picks))) for score, picks, _ in states]
+
+
+def _build_outfit(
+    rank: int,
+    total: int,
+    picks: dict[str, _Candidate],
+    context: ScoringContext,
+    purchase_suggestions: list[dict],
+) -> dict[str, Any]:
+    selected: dict[str, dict | None] = {category: None for category in OUTFIT_CATEGORIES}
+    selection_reasons: dict[str, str] = {}
+    item_score = 0
+    for category, candidate in picks.items():
+        score, reasons = score_features(candidate.features, category, context)
+        selected[category] = candidate.features.item
+        selection_reasons[category] = "；".join(reasons)
+        item_score += score
+
+    compatibility_reasons: list[str] = []
+    chosen = list(picks.values())
+    for index, first in enumerate(chosen):
+        for second in chosen[index + 1:]:
+            _, reasons = score_pair(first.pair, second.pair, with_reasons=True)
+            if reasons:
+                names = f"{first.features.item.get('item', '')} + {second.features.item.get('item', '')}"
+                compatibility_reasons.append(f"{names}：{'、'.join(reasons)}")
+
+    return {
+        "rank": rank,
+        "score": total,
+        "item_score": item_score,
+        "compatibility_score": total - item_score,
+        "top": selected["top"],
+        "bottom": selected["bottom"],
+        "shoes": selected["shoes"],
+        "selection_reasons": selection_reasons,
+        "compatibility_reasons": compatibility_reasons,
+        "outfit_summary": build_recommendation_summary(selected, purchase_suggestions),
+    }
+
+
+def rank_outfits(
+    snapshot: WardrobeSnapshot,
+    context: ScoringContext,
+    k: int,
+    temperature_profile: dict[str, Any],
+    horoscope: dict,
+) -> tuple[list[dict[str, Any]], list[dict]]:
+    """返回前 k 套组合，以及衣柜缺少的类别的购买建议。"""
+    pair_features = get_snapshot_pair_features(snapshot)
+    slots: dict[str, list[_Candidate]] = {}
+    purchase_suggestions: list[dict] = []
+    for category in OUTFIT_CATEGORIES:
+        raw = _category_candidates(snapshot, category, context, season_only=True)
+        if not raw and category == "shoes":
+            # 与单套推荐一致：无季节匹配的鞋履时从全部鞋履中选择
+            raw = _category_candidates(snapshot, category, context, season_only=False)
+            if raw:
+                purchase_suggestions.append(build_purchase_suggestion(category, temperature_profile, horoscope))
+        if not raw:
+            purchase_suggestions.append(build_purchase_suggestion(category, temperature_profile, horoscope))
+            continue
+        slots[category] = _prune_candidates(
+            [
+                _Candidate(score=score, order=order, features=features, pair=pair_features[features.item["id"]])
+                for order, (score, features) in enumerate(raw)
+            ],
+            k,
+        )
+
+    outfits = [
+        _build_outfit(rank, total, picks, context, purchase_suggestions)
+        for rank, (total, picks) in enumerate(search_outfits(slots, k), start=1)
+    ]
+    return outfits, purchase_suggestions
+
+
+async def get_outfit_recommendations(
+    weather: WeatherInfo,
+    k: int = 3,
+    zodiac_sign: str | None = None,
+    goal: str | None = None,
+    mode: Literal["balanced", "goal_first", "wardrobe_first"] = "balanced",
+) -> dict:
+    """按天气 / 运势 / 目标返回得分最高的 k 套完整穿搭（不生成 LLM 文案）。"""
+    config = load_config()
+    snapshot = await get_wardrobe_snapshot()
+    horoscope = await get_daily_horoscope(weather=weather, zodiac_sign=zodiac_sign, include_inference=False)
+    goal_raw, goal_normalized = normalize_goal(goal)
+    temperature_profile = build_temperature_profile(weather)
+    context = build_scoring_context(horoscope, weather, temperature_profile, goal_normalized, mode, config=config)
+
+    effective_k = min(k, OUTFIT_MAX_K)
+    outfits, purchase_suggestions = rank_outfits(
+        snapshot, context, effective_k, temperature_profile, horoscope
+    )
+    return {
+        "weather": build_weather_payload(weather),
+        "horoscope": horoscope,
+        "temperature_rule": build_temperature_rule(temperature_profile),
+        "k": effective_k,
+        "outfits": outfits,
+        "purchase_suggestions": purchase_suggestions,
+        "goal_raw": goal_raw,
+        "goal_normalized": goal_normalized,
+        "mode": mode,
+    }
@@ -0,0 +1,233 @@
+"""
+后台缓存预热
+1) 每个天气时间桶（整点）切换前，为设置中的城市与最近请求过的地点提前写入下一时间桶的天气缓存
+2) 每天零点后，为设置中的星座（可选全部 12 个）提前拉取运势源数据并完成 LLM 推理
+调度时间带随机抖动，任务并发数受限；与用户请求共用 single-flight，不会重复请求上游。
+"""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from storage.config_store import load_config
+from services.horoscope import ZODIAC_NAMES, get_daily_horoscope, normalize_zodiac_sign
+from services.weather import (
+    build_weather_cache_bucket,
+    build_weather_cache_key,
+    get_recent_locations,
+    get_weather,
+    prewarm_weather,
+    resolve_location,
+)
+
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+# 在整点前多少秒预热下一时间桶的天气
+PREWARM_WEATHER_LEAD_SECONDS = max(float(os.getenv("PREWARM_WEATHER_LEAD_SECONDS", "120")), 0.0)
+# 零点后多少秒预热当天运势
+PREWARM_HOROSCOPE_DELAY_SECONDS = max(float(os.getenv("PREWARM_HOROSCOPE_DELAY_SECONDS", "300")), 0.0)
+# 每次调度额外增加 0~N 秒随机延迟，避免多实例同时请求上游
+PREWARM_JITTER_SECONDS = max(float(os.getenv("PREWARM_JITTER_SECONDS", "30")), 0.0)
+PREWARM_CONCURRENCY = max(int(os.getenv("PREWARM_CONCURRENCY", "2")), 1)
+# 最近多少秒内请求过的地点参与天气预热、最多预热多少个
+PREWARM_RECENT_WINDOW_SECONDS = max(float(os.getenv("PREWARM_RECENT_WINDOW_SECONDS", str(24 * 3600))), 0.0)
+PREWARM_MAX_LOCATIONS = max(int(os.getenv("PREWARM_MAX_LOCATIONS", "8")), 1)
+PREWARM_ALL_ZODIAC_SIGNS = os.getenv("PREWARM_ALL_ZODIAC_SIGNS", "0").strip().lower() in ("1", "true", "yes", "on")
+
+_TASKS: list[asyncio.Task] = []
+_STATUS: dict[str, Any] = {
+    "next_weather_run": None,
+    "next_horoscope_run": None,
+    "last_weather_run": None,
+    "last_horoscope_run": None,
+}
+_STATS = {"weather_runs": 0, "weather_warmed": 0, "weather_failed": 0, "horoscope_runs": 0, "horoscope_warmed": 0, "horoscope_failed": 0}
+
+
+def next_weather_run(now: datetime, lead_seconds: float = PREWARM_WEATHER_LEAD_SECONDS) -> tuple[datetime, datetime]:
+    """返回 (预热时间, 下一时间桶起点)；已过本小时预热点时顺延到下一小时。"""
+    boundary = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    run_at = boundary - timedelta(seconds=lead_seconds)
+    if run_at <= now:
+        boundary += timedelta(hours=1)
+        run_at += timedelta(hours=1)
+    return run_at, boundary
+
+
+def next_horoscope_run(now: datetime, delay_seconds: float = PREWARM_HOROSCOPE_DELAY_SECONDS) -> datetime:
+    run_at = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=delay_seconds)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return run_at
+
+
+def _jitter() -> float:
+    return random.uniform(0, PREWARM_JITTER_SECONDS) if PREWARM_JITTER_SECONDS else 0.0
+
+
+async def _sleep_until(run_at: datetime) -> None:
+    # 分段休眠，系统时间调整后也能按墙钟时间触发
+    while True:
+        remaining = (run_at - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, 300))
+
+
+async def _gather_limited(jobs: dict[str, Any]) -> dict[str, Any]:
+    semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+    async def run(job):
+        async with semaphore:
+            try:
+                return await job
+            except Exception as exc:
+                return exc
+
+    results = await asyncio.gather(*(run(job) for job in jobs.values()))
+    return dict(zip(jobs.keys(), results))
+
+
+async def prewarm_locations() -> list[str]:
+    """设置中的城市 + 最近请求过的地点，按解析后的坐标去重。"""
+    candidates = [load_config().weather_location] + get_recent_locations(PREWARM_RECENT_WINDOW_SECONDS)
+    locations: list[str] = []
+    seen: set[str] = set()
+    for location in candidates:
+        if not (location or "").strip():
+            continue
+        try:
+            resolved, _ = await resolve_location(location)
+        except ValueError:
+            continue
+        key = build_weather_cache_key(resolved)
+        if key in seen:
+            continue
+        seen.add(key)
+        locations.append(location)
+        if len(locations) >= PREWARM_MAX_LOCATIONS:
+            break
+    return locations
+
+
+async def run_weather_prewarm(bucket_start: Optional[str] = None) -> dict[str, Any]:
+    """为指定时间桶（默认当前）预热天气缓存，返回每个地点的结果。"""
+    bucket_start = bucket_start or build_weather_cache_bucket()
+    started = time.perf_counter()
+    locations = await prewarm_locations()
+    results = await _gather_limited({location: prewarm_weather(location, bucket_start) for location in locations})
+
+    outcome: dict[str, str] = {}
+    for location, result in results.items():
+        if isinstance(result, Exception):
+            outcome[location] = f"failed: {result}"
+            _STATS["weather_failed"] += 1
+        elif result is None:
+            outcome[location] = "cached"
+        elif result:
+            outcome[location] = "warmed"
+            _STATS["weather_warmed"] += 1
+        else:
+            outcome[location] = "failed: upstream unavailable"
+            _STATS["weather_failed"] += 1
+    _STATS["weather_runs"] += 1
+    _STATUS["last_weather_run"] = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "bucket_start": bucket_start,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "locations": outcome,
+    }
+    return _STATUS["last_weather_run"]
+
+
+def prewarm_zodiac_signs() -> list[str]:
+    if PREWARM_ALL_ZODIAC_SIGNS:
+        return list(ZODIAC_NAMES)
+    sign_key = normalize_zodiac_sign(load_config().zodiac_sign)
+    return [sign_key] if sign_key else []
+
+
+async def run_horoscope_prewarm() -> dict[str, Any]:
+    """拉取当天运势源数据并完成推理（已完成的星座直接读取记录）。"""
+    started = time.perf_counter()
+    signs = prewarm_zodiac_signs()
+    outcome: dict[str, str] = {}
+    if signs:
+        weather = await get_weather(load_config().weather_location)
+        results = await _gather_limited({
+            sign_key: get_daily_horoscope(weather=weather, zodiac_sign=sign_key, include_inference=True)
+            for sign_key in signs
+        })
+        for sign_key, result in results.items():
+            if isinstance(result, Exception):
+                outcome[sign_key] = f"failed: {result}"
+                _STATS["horoscope_failed"] += 1
+            else:
+                outcome[sign_key] = result.get("llm_status", "")
+                _STATS["horoscope_warmed"] += 1
+    _STATS["horoscope_runs"] += 1
+    _STATUS["last_horoscope_run"] = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "signs": outcome,
+    }
+    return _STATUS["last_horoscope_run"]
+
+
+async def _weather_loop() -> None:
+    while True:
+        run_at, boundary = next_weather_run(datetime.now())
+        # 抖动只往前提，保证在整点前完成
+        run_at -= timedelta(seconds=_jitter())
+        _STATUS["next_weather_run"] = run_at.isoformat(timespec="seconds")
+        await _sleep_until(run_at)
+        try:
+            await run_weather_prewarm(build_weather_cache_bucket(boundary))
+        except Exception as exc:
+            print(f"⚠️  天气预热失败: {exc}")
+        # 同一小时内不重复触发
+        await _sleep_until(boundary)
+
+
+async def _horoscope_loop() -> None:
+    # 启动时先补齐当天的运势，之后每天零点后执行
+    await asyncio.sleep(_jitter())
+    while True:
+        try:
+            await run_horoscope_prewarm()
+        except Exception as exc:
+            print(f"⚠️  运势预热失败: {exc}")
+        run_at = next_horoscope_run(datetime.now()) + timedelta(seconds=_jitter())
+        _STATUS["next_horoscope_run"] = run_at.isoformat(timespec="seconds")
+        await _sleep_until(run_at)
+
+
+def start_prewarm_scheduler() -> None:
+    """启动后台预热任务（在应用 lifespan 中调用）。"""
+    if not PREWARM_ENABLED or _TASKS:
+        return
+    _TASKS.extend([asyncio.create_task(_weather_loop()), asyncio.create_task(_horoscope_loop())])
+    print(f"✅ 缓存预热已启动（天气提前 {PREWARM_WEATHER_LEAD_SECONDS:.0f}s，并发 {PREWARM_CONCURRENCY}）")
+
+
+async def stop_prewarm_scheduler() -> None:
+    tasks = list(_TASKS)
+    _TASKS.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def get_prewarm_status() -> dict[str, Any]:
+    return {
+        "enabled": PREWARM_ENABLED,
+        "running": any(not task.done() for task in _TASKS),
+        "weather_lead_seconds": PREWARM_WEATHER_LEAD_SECONDS,
+        "horoscope_delay_seconds": PREWARM_HOROSCOPE_DELAY_SECONDS,
+        "jitter_seconds": PREWARM_JITTER_SECONDS,
+        "concurrency": PREWARM_CONCURRENCY,
+        "all_zodiac_signs": PREWARM_ALL_ZODIAC_SIGNS,
+        **_STATUS,
+        **_STATS,
+    }
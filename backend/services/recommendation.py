@@ -2,22 +2,28 @@
 AI穿搭推荐服务
 基于天气、星座运势和衣橱数据生成个性化推荐
 """
-import httpx
-from typing import Any, Literal
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Literal, Sequence
 
 from domain.config import ModeBonusWeights
-from domain.clothes import resolve_category_value
+from domain.tags import (
+    COLOR_ALIASES,
+    GOAL_ALIASES,
+    SEASON_ALIASES,
+    normalize_seasons,
+    usage_tokens,
+)
 from services.horoscope import get_daily_horoscope
+from services.http_client import http_client
+from services.llm_text_cache import build_cache_key, get_cached_text, store_text
+from services.scoring_numpy import NUMPY_AVAILABLE, VectorScoringIndex, build_vector_index
+from services.singleflight import get_singleflight
 from services.weather import WeatherInfo
 from storage.config_store import load_config
-from storage.db import get_all_clothes
-
-SEASON_ALIASES = {
-    "春": {"春", "春季", "spring"},
-    "夏": {"夏", "夏季", "summer"},
-    "秋": {"秋", "秋季", "autumn", "fall"},
-    "冬": {"冬", "冬季", "winter"},
-}
+from storage.snapshot import WardrobeSnapshot, get_wardrobe_snapshot
 
 ZODIAC_STYLE_HINTS = {
     "aries": {"运动", "街头", "休闲", "sport", "casual"},
@@ -34,46 +40,21 @@ ZODIAC_STYLE_HINTS = {
     "pisces": {"柔和", "文艺", "轻盈", "vintage", "casual"},
 }
 
-GOAL_ALIASES = {
-    "commute": {"commute", "work", "office", "通勤", "上班", "工作", "出勤"},
-    "date": {"date", "dating", "约会", "聚会", "见面"},
-    "sport": {"sport", "gym", "workout", "run", "运动", "健身", "跑步", "训练"},
-    "formal": {"formal", "business", "meeting", "interview", "商务", "正式", "面试", "会议"},
-    "daily": {"daily", "casual", "weekend", "日常", "休闲", "周末", "出街"},
-    "travel": {"travel", "trip", "旅行", "出游", "旅游"},
-}
-
 ACCESSORY_KEYWORDS = {
     "围巾", "帽", "手套", "项链", "耳环", "手链", "戒指", "腰带", "领带", "墨镜",
     "scarf", "hat", "cap", "glove", "necklace", "earring", "bracelet", "ring", "belt", "tie", "sunglasses",
 }
 
-COLOR_ALIASES = {
-    "red": {"red", "红", "红色"},
-    "blue": {"blue", "蓝", "蓝色"},
-    "green": {"green", "绿", "绿色"},
-    "yellow": {"yellow", "黄", "黄色"},
-    "purple": {"purple", "紫", "紫色"},
-    "pink": {"pink", "粉", "粉色"},
-    "orange": {"orange", "橙", "橙色"},
-    "black": {"black", "黑", "黑色"},
-    "white": {"white", "白", "白色"},
-    "gray": {"gray", "grey", "灰", "灰色"},
-    "brown": {"brown", "棕", "棕色", "咖"},
-}
-
-def normalize_seasons(raw_values: list[str]) -> set[str]:
-    normalized: set[str] = set()
-    for value in raw_values or []:
-        token = (value or "").strip().lower()
-        if not token:
-            continue
-        for canonical, aliases in SEASON_ALIASES.items():
-            if token in aliases:
-                normalized.add(canonical)
-                break
-    return normalized
+# 雨雪天气时鞋履加分的关键词
+WATERPROOF_KEYWORDS = ("防水", "短靴", "boot", "靴")
 
+# 打分引擎：auto（衣物数达到阈值且已安装 numpy 时向量化）/ python / numpy
+RECOMMENDATION_SCORING_ENGINE = os.getenv("RECOMMENDATION_SCORING_ENGINE", "auto").strip().lower()
+RECOMMENDATION_VECTOR_MIN_ITEMS = max(int(os.getenv("RECOMMENDATION_VECTOR_MIN_ITEMS", "1000")), 0)
+# 推荐文案 LLM 请求超时（秒）；流式请求按相邻两段输出之间的间隔计算
+LLM_TIMEOUT = 20.0
+# 按文案缓存键合并并发的 LLM 调用
+_llm_text_flight = get_singleflight("recommendation_text")
 
 def build_temperature_profile(weather: WeatherInfo) -> dict[str, Any]:
     feels_like = weather.feelsLike
@@ -139,13 +120,6 @@ def build_temperature_profile(weather: WeatherInfo) -> dict[str, Any]:
     }
 
 
-def is_temperature_compatible(item: dict, allowed_seasons: set[str]) -> bool:
-    item_seasons = normalize_seasons(item.get("season_semantics", []))
-    if not item_seasons:
-        return False
-    return bool(item_seasons & allowed_seasons)
-
-
 def normalize_goal(goal: str | None) -> tuple[str, str]:
     raw_goal = (goal or "").strip()
     if not raw_goal:
@@ -163,20 +137,6 @@ def normalize_goal(goal: str | None) -> tuple[str, str]:
     return raw_goal, lowered
 
 
-def usage_tokens(values: list[str]) -> set[str]:
-    normalized: set[str] = set()
-    for value in values or []:
-        token = (value or "").strip().lower()
-        if not token:
-            continue
-        normalized.add(token)
-        for canonical, aliases in GOAL_ALIASES.items():
-            if token in aliases:
-                normalized.add(canonical)
-                break
-    return normalized
-
-
 def build_color_tokens(lucky_color: str) -> set[str]:
     token = (lucky_color or "").strip().lower()
     if not token:
@@ -204,67 +164,134 @@ def resolve_mode_bonus_weights(
     return mode_weights.balanced
 
 
-def score_item(
-    item: dict,
-    category: str,
+@dataclass(frozen=True)
+class ItemFeatures:
+    """单件衣物与请求无关的打分特征，随衣柜快照缓存。"""
+    item: dict
+    searchable_text: str
+    seasons: frozenset[str]
+    style_values: frozenset[str]
+    usage_tokens: frozenset[str]
+    waterproof_hint: bool
+    accessory_like: bool
+
+
+@dataclass(frozen=True)
+class ScoringContext:
+    """一次推荐请求内不变的打分参数，只构建一次。"""
+    allowed_seasons: frozenset[str]
+    temperature_label: str
+    goal_bonus: int
+    color_bonus: int
+    style_bonus: int
+    lucky_color: str
+    color_tokens: tuple[str, ...]
+    style_hints: frozenset[str]
+    wet_weather: bool
+    normalized_goal: str
+
+
+def build_item_features(item: dict) -> ItemFeatures:
+    searchable_text = " ".join([
+        str(item.get("item", "")),
+        str(item.get("color_semantics", "")),
+        str(item.get("description", "")),
+    ]).lower()
+    accessory_text = f"{item.get('item', '')} {item.get('description', '')}".lower()
+    return ItemFeatures(
+        item=item,
+        searchable_text=searchable_text,
+        seasons=frozenset(normalize_seasons(item.get("season_semantics", []))),
+        style_values=frozenset(
+            str(v).strip().lower()
+            for v in item.get("style_semantics", [])
+            if str(v).strip()
+        ),
+        usage_tokens=frozenset(usage_tokens(item.get("usage_semantics", []))),
+        waterproof_hint=any(keyword in searchable_text for keyword in WATERPROOF_KEYWORDS),
+        accessory_like=any(keyword in accessory_text for keyword in ACCESSORY_KEYWORDS),
+    )
+
+
+def _build_snapshot_features(snapshot: WardrobeSnapshot) -> dict[int, ItemFeatures]:
+    return {item["id"]: build_item_features(item) for item in snapshot.item_dicts}
+
+
+def get_snapshot_features(snapshot: WardrobeSnapshot) -> dict[int, ItemFeatures]:
+    """衣物 id -> 打分特征；同一版本快照只计算一次。"""
+    return snapshot.derived("recommendation.item_features", _build_snapshot_features)
+
+
+def build_scoring_context(
     horoscope: dict,
     weather: WeatherInfo,
     temperature_profile: dict[str, Any],
     normalized_goal: str,
     mode: Literal["balanced", "goal_first", "wardrobe_first"],
     config: Any | None = None,
-) -> tuple[int, list[str]]:
-    score = 5
+) -> ScoringContext:
     weights = resolve_mode_bonus_weights(mode, config=config)
-    goal_bonus = weights.goal_bonus
-    color_bonus = weights.color_bonus
-    style_bonus = weights.style_bonus
+    lucky_color = horoscope.get("lucky_color", "")
+    return ScoringContext(
+        allowed_seasons=frozenset(temperature_profile["allowed_seasons"]),
+        temperature_label=temperature_profile["label"],
+        goal_bonus=weights.goal_bonus,
+        color_bonus=weights.color_bonus,
+        style_bonus=weights.style_bonus,
+        lucky_color=lucky_color,
+        color_tokens=tuple(sorted(build_color_tokens(lucky_color))),
+        style_hints=frozenset(ZODIAC_STYLE_HINTS.get(horoscope.get("zodiac_sign", ""), set())),
+        wet_weather="雨" in weather.condition or "雪" in weather.condition,
+        normalized_goal=normalized_goal,
+    )
 
-    if is_temperature_compatible(item, temperature_profile["allowed_seasons"]):
-        score += 3
-        reasons = [f"季节标签匹配{temperature_profile['label']}温度策略"]
-    else:
-        reasons = [f"季节标签未完全命中{temperature_profile['label']}策略，作为兜底候选"]
 
-    lucky_color = horoscope.get("lucky_color", "")
-    color_tokens = build_color_tokens(lucky_color)
-    searchable_text = " ".join([
-        str(item.get("item", "")),
-        str(item.get("color_semantics", "")),
-        str(item.get("description", "")),
-    ]).lower()
+def score_features(
+    features: ItemFeatures,
+    category: str,
+    context: ScoringContext,
+    with_reasons: bool = True,
+) -> tuple[int, list[str]]:
+    """按预计算特征打分；排序时可关闭 with_reasons，只为最终入选的单品生成理由。"""
+    reasons: list[str] = []
+    score = 5
 
-    if color_tokens and any(token in searchable_text for token in color_tokens):
-        score += color_bonus
-        reasons.append(f"颜色接近今日幸运色「{lucky_color}」")
+    if not features.seasons.isdisjoint(context.allowed_seasons):
+        score += 3
+        if with_reasons:
+            reasons.append(f"季节标签匹配{context.temperature_label}温度策略")
+    elif with_reasons:
+        reasons.append(f"季节标签未完全命中{context.temperature_label}策略，作为兜底候选")
+
+    if context.color_tokens:
+        text = features.searchable_text
+        for token in context.color_tokens:
+            if token in text:
+                score += context.color_bonus
+                if with_reasons:
+                    reasons.append(f"颜色接近今日幸运色「{context.lucky_color}」")
+                break
 
-    sign_key = horoscope.get("zodiac_sign", "")
-    style_hints = ZODIAC_STYLE_HINTS.get(sign_key, set())
-    style_values = {
-        str(v).strip().lower()
-        for v in item.get("style_semantics", [])
-        if str(v).strip()
-    }
-    if style_hints and (style_values & style_hints):
-        score += style_bonus
-        reasons.append("风格与今日星座运势倾向一致")
+    if context.style_hints and not features.style_values.isdisjoint(context.style_hints):
+        score += context.style_bonus
+        if with_reasons:
+            reasons.append("风格与今日星座运势倾向一致")
 
-    if category == "shoes" and ("雨" in weather.condition or "雪" in weather.condition):
-        if any(keyword in searchable_text for keyword in ("防水", "短靴", "boot", "靴")):
-            score += 2
+    if category == "shoes" and context.wet_weather and features.waterproof_hint:
+        score += 2
+        if with_reasons:
             reasons.append("天气有降水，鞋履更注重防滑/防水")
 
-    if normalized_goal:
-        item_usage = usage_tokens(item.get("usage_semantics", []))
-        if normalized_goal in item_usage:
-            score += goal_bonus
-            reasons.append(f"使用场景匹配本次目标「{normalized_goal}」")
+    if context.normalized_goal and context.normalized_goal in features.usage_tokens:
+        score += context.goal_bonus
+        if with_reasons:
+            reasons.append(f"使用场景匹配本次目标「{context.normalized_goal}」")
 
     return score, reasons
 
 
-def pick_best_item(
-    candidates: list[dict],
+def score_item(
+    item: dict,
     category: str,
     horoscope: dict,
     weather: WeatherInfo,
@@ -272,31 +299,47 @@ def pick_best_item(
     normalized_goal: str,
     mode: Literal["balanced", "goal_first", "wardrobe_first"],
     config: Any | None = None,
-) -> tuple[dict | None, str]:
-    if not candidates:
-        return None, ""
+) -> tuple[int, list[str]]:
+    """单件打分（兼容接口）；批量排序请使用 ScoringContext + 快照特征。"""
+    context = build_scoring_context(horoscope, weather, temperature_profile, normalized_goal, mode, config=config)
+    return score_features(build_item_features(item), category, context)
+
 
-    best_item = None
+def pick_best_features(
+    candidates: Sequence[ItemFeatures],
+    category: str,
+    context: ScoringContext,
+) -> tuple[dict | None, str]:
+    """返回得分最高的单品（同分取先出现者）及其理由。"""
+    best: ItemFeatures | None = None
     best_score = -1
-    best_reasons: list[str] = []
-
-    for item in candidates:
-        score, reasons = score_item(
-            item,
-            category,
-            horoscope,
-            weather,
-            temperature_profile,
-            normalized_goal,
-            mode,
-            config=config,
-        )
+    for features in candidates:
+        score, _ = score_features(features, category, context, with_reasons=False)
         if score > best_score:
             best_score = score
-            best_item = item
-            best_reasons = reasons
+            best = features
 
-    return best_item, "；".join(best_reasons)
+    if best is None:
+        return None, ""
+    _, reasons = score_features(best, category, context)
+    return best.item, "；".join(reasons)
+
+
+def pick_best_item(
+    candidates: list[dict],
+    category: str,
+    horoscope: dict,
+    weather: WeatherInfo,
+    temperature_profile: dict[str, Any],
+    normalized_goal: str,
+    mode: Literal["balanced", "goal_first", "wardrobe_first"],
+    config: Any | None = None,
+) -> tuple[dict | None, str]:
+    """兼容接口：按字典候选挑选最优单品。"""
+    if not candidates:
+        return None, ""
+    context = build_scoring_context(horoscope, weather, temperature_profile, normalized_goal, mode, config=config)
+    return pick_best_features([build_item_features(item) for item in candidates], category, context)
 
 
 def build_purchase_suggestion(
@@ -321,21 +364,6 @@ def build_purchase_suggestion(
     }
 
 
-def extract_wardrobe_accessories(
-    all_clothes: list[dict],
-    categories: list[str],
-) -> list[dict]:
-    accessories = []
-    for item, category in zip(all_clothes, categories):
-        if category == "accessory":
-            accessories.append(item)
-            continue
-        text = f"{item.get('item', '')} {item.get('description', '')}".lower()
-        if any(keyword in text for keyword in ACCESSORY_KEYWORDS):
-            accessories.append(item)
-    return accessories
-
-
 def build_purchase_accessories(
     temperature_profile: dict[str, Any],
     horoscope: dict,
@@ -370,32 +398,161 @@ def build_recommendation_summary(
     return summary
 
 
-async def get_ai_recommendation(
+def build_weather_payload(weather: WeatherInfo) -> dict[str, Any]:
+    return {
+        "temperature": weather.temperature,
+        "feelsLike": weather.feelsLike,
+        "condition": weather.condition,
+        "icon": weather.icon,
+        "humidity": weather.humidity,
+        "windDir": weather.windDir,
+        "windScale": weather.windScale,
+        "location": weather.location,
+        "obsTime": weather.obsTime,
+    }
+
+
+def build_temperature_rule(temperature_profile: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "label": temperature_profile["label"],
+        "allowed_seasons": sorted(list(temperature_profile["allowed_seasons"])),
+        "advice": temperature_profile["advice"],
+    }
+
+
+def _build_snapshot_vector_index(snapshot: WardrobeSnapshot) -> VectorScoringIndex:
+    features_by_id = get_snapshot_features(snapshot)
+    return build_vector_index(snapshot.item_dicts, [features_by_id[item["id"]] for item in snapshot.item_dicts])
+
+
+def get_snapshot_vector_index(snapshot: WardrobeSnapshot) -> VectorScoringIndex:
+    """快照的向量化打分索引；同一版本快照只构建一次。"""
+    return snapshot.derived("recommendation.vector_index", _build_snapshot_vector_index)
+
+
+def use_vector_engine(snapshot: WardrobeSnapshot) -> bool:
+    if not NUMPY_AVAILABLE or RECOMMENDATION_SCORING_ENGINE == "python":
+        return False
+    if RECOMMENDATION_SCORING_ENGINE == "numpy":
+        return True
+    return len(snapshot.item_dicts) >= RECOMMENDATION_VECTOR_MIN_ITEMS
+
+
+def _explain_features(features: ItemFeatures, category: str, context: ScoringContext) -> tuple[dict, str]:
+    _, reasons = score_features(features, category, context)
+    return features.item, "；".join(reasons)
+
+
+def select_best_item(
+    snapshot: WardrobeSnapshot,
+    category: str,
+    context: ScoringContext,
+    season_only: bool = True,
+) -> tuple[dict | None, str]:
+    """
+    在快照中为某个类别挑选得分最高的单品。
+    season_only=True 时只考虑季节匹配的衣物；大衣柜走向量化引擎，结果与逐件打分一致。
+    """
+    features_by_id = get_snapshot_features(snapshot)
+    if use_vector_engine(snapshot):
+        row = get_snapshot_vector_index(snapshot).pick_best(category, context, season_only=season_only)
+        if row is None:
+            return None, ""
+        return _explain_features(features_by_id[snapshot.item_dicts[row]["id"]], category, context)
+
+    # 类别已在写入时归一化，季节在快照中预先分桶
+    if season_only:
+        candidates = snapshot.compatible_dicts(category, context.allowed_seasons)
+    else:
+        candidates = snapshot.dicts_by_category.get(category, ())
+    return pick_best_features([features_by_id[item["id"]] for item in candidates], category, context)
+
+
+def select_accessories(snapshot: WardrobeSnapshot, context: ScoringContext, limit: int = 2) -> list[tuple[dict, str]]:
+    """挑选得分最高的 limit 件饰品（同分保持衣柜顺序），返回 (衣物, 理由) 列表。"""
+    if use_vector_engine(snapshot):
+        index = get_snapshot_vector_index(snapshot)
+        rows = index.top_k(index.accessory_mask(context), "accessory", context, limit)
+        return [_explain_features(index.features[row], "accessory", context) for row in rows]
+
+    features_by_id = get_snapshot_features(snapshot)
+    scored = []
+    for item in snapshot.item_dicts:
+        features = features_by_id[item["id"]]
+        if item["canonical_category"] != "accessory" and not features.accessory_like:
+            continue
+        # 饰品优先按季节匹配；无季节标签时保留可选。
+        if features.seasons & context.allowed_seasons or not item.get("season_semantics"):
+            score, _ = score_features(features, "accessory", context, with_reasons=False)
+            scored.append((score, features))
+    scored.sort(key=lambda value: value[0], reverse=True)
+    return [_explain_features(features, "accessory", context) for _, features in scored[:limit]]
+
+
+@dataclass(frozen=True)
+class RecommendationPlan:
+    """推荐中不依赖 LLM 文案的部分：天气、运势、选品、补购与饰品建议。"""
+    weather: WeatherInfo
+    horoscope: dict
+    temperature_profile: dict[str, Any]
+    selected: dict[str, dict | None]
+    selection_reasons: dict[str, str]
+    purchase_suggestions: list[dict]
+    suggested_accessories: list[dict[str, Any]]
+    goal_raw: str
+    goal_normalized: str
+    mode: str
+
+    def text_inputs(self) -> dict[str, Any]:
+        """生成推荐文案（LLM 或规则版）所需的参数。"""
+        return {
+            "weather": self.weather,
+            "horoscope": self.horoscope,
+            "temperature_profile": self.temperature_profile,
+            "selected": self.selected,
+            "selection_reasons": self.selection_reasons,
+            "purchase_suggestions": self.purchase_suggestions,
+            "suggested_accessories": self.suggested_accessories,
+            "goal_raw": self.goal_raw,
+            "goal_normalized": self.goal_normalized,
+        }
+
+    def selection_payload(self) -> dict[str, Any]:
+        return {
+            "outfit_summary": build_recommendation_summary(self.selected, self.purchase_suggestions),
+            "selection_reasons": self.selection_reasons,
+            "suggested_top": self.selected.get("top"),
+            "suggested_bottom": self.selected.get("bottom"),
+            "suggested_shoes": self.selected.get("shoes"),
+            "suggested_accessories": self.suggested_accessories,
+            "goal_raw": self.goal_raw,
+            "goal_normalized": self.goal_normalized,
+            "mode": self.mode,
+        }
+
+    def to_response(self, recommendation_text: str) -> dict[str, Any]:
+        return {
+            "weather": build_weather_payload(self.weather),
+            "horoscope": self.horoscope,
+            "temperature_rule": build_temperature_rule(self.temperature_profile),
+            "recommendation_text": recommendation_text,
+            "purchase_suggestions": self.purchase_suggestions,
+            **self.selection_payload(),
+        }
+
+
+async def build_recommendation_plan(
     weather: WeatherInfo,
     zodiac_sign: str | None = None,
     goal: str | None = None,
     mode: Literal["balanced", "goal_first", "wardrobe_first"] = "balanced",
-) -> dict:
+) -> RecommendationPlan:
     """
-    根据天气和星座运势获取AI穿搭推荐。
+    获取运势并从衣柜选品。
     温度约束为硬条件：衣柜单品必须满足温度策略，不满足时给出购买兜底。
     """
     config = load_config()
-    all_clothes_items = await get_all_clothes()
-    all_clothes = [
-        {
-            "id": item.id,
-            "category": item.category,
-            "item": item.item,
-            "style_semantics": item.style_semantics,
-            "season_semantics": item.season_semantics,
-            "usage_semantics": item.usage_semantics,
-            "color_semantics": item.color_semantics,
-            "description": item.description,
-            "image_url": item.image_url,
-        }
-        for item in all_clothes_items
-    ]
+    snapshot = await get_wardrobe_snapshot()
 
     horoscope = await get_daily_horoscope(
         weather=weather,
@@ -405,49 +562,24 @@ async def get_ai_recommendation(
     goal_raw, goal_normalized = normalize_goal(goal)
     temperature_profile = build_temperature_profile(weather)
 
-    by_category: dict[str, list[dict]] = {"top": [], "bottom": [], "shoes": []}
-    all_by_category: dict[str, list[dict]] = {"top": [], "bottom": [], "shoes": []}
-    normalized_categories: list[str] = []
-    for item in all_clothes:
-        category = resolve_category_value(
-            str(item.get("category", "")),
-            str(item.get("item", "")),
-            str(item.get("description", "")),
-        )
-        normalized_categories.append(category)
-        if category not in by_category:
-            continue
-        all_by_category[category].append(item)
-        if is_temperature_compatible(item, temperature_profile["allowed_seasons"]):
-            by_category[category].append(item)
+    context = build_scoring_context(
+        horoscope,
+        weather,
+        temperature_profile,
+        goal_normalized,
+        mode,
+        config=config,
+    )
 
     selected: dict[str, dict | None] = {}
     selection_reasons: dict[str, str] = {}
     purchase_suggestions: list[dict] = []
 
     for category in ("top", "bottom", "shoes"):
-        chosen, reason = pick_best_item(
-            by_category[category],
-            category=category,
-            horoscope=horoscope,
-            weather=weather,
-            temperature_profile=temperature_profile,
-            normalized_goal=goal_normalized,
-            mode=mode,
-            config=config,
-        )
+        chosen, reason = select_best_item(snapshot, category, context)
         used_fallback = False
-        if chosen is None and category == "shoes" and all_by_category["shoes"]:
-            fallback_item, fallback_reason = pick_best_item(
-                all_by_category["shoes"],
-                category=category,
-                horoscope=horoscope,
-                weather=weather,
-                temperature_profile=temperature_profile,
-                normalized_goal=goal_normalized,
-                mode=mode,
-                config=config,
-            )
+        if chosen is None and category == "shoes" and snapshot.dicts_by_category["shoes"]:
+            fallback_item, fallback_reason = select_best_item(snapshot, category, context, season_only=False)
             if fallback_item is not None:
                 chosen = fallback_item
                 fallback_prefix = "衣柜暂无完全匹配当前温度策略的鞋履，已从现有鞋履中选择最合适的一双"
@@ -465,30 +597,10 @@ async def get_ai_recommendation(
                 build_purchase_suggestion(category, temperature_profile, horoscope)
             )
 
-    accessory_candidates = extract_wardrobe_accessories(all_clothes, normalized_categories)
-    compatible_accessories = []
-    for item in accessory_candidates:
-        # 饰品优先按季节匹配；无季节标签时保留可选。
-        if is_temperature_compatible(item, temperature_profile["allowed_seasons"]) or not item.get("season_semantics"):
-            compatible_accessories.append(item)
-
     suggested_accessories: list[dict[str, Any]] = []
-    if compatible_accessories:
-        scored = []
-        for item in compatible_accessories:
-            score, reasons = score_item(
-                item,
-                category="accessory",
-                horoscope=horoscope,
-                weather=weather,
-                temperature_profile=temperature_profile,
-                normalized_goal=goal_normalized,
-                mode=mode,
-                config=config,
-            )
-            scored.append((score, item, "；".join(reasons)))
-        scored.sort(key=lambda value: value[0], reverse=True)
-        for _, item, reason in scored[:2]:
+    wardrobe_accessories = select_accessories(snapshot, context)
+    if wardrobe_accessories:
+        for item, reason in wardrobe_accessories:
             suggested_accessories.append(
                 {
                     "name": item.get("item", "饰品"),
@@ -501,7 +613,7 @@ async def get_ai_recommendation(
     else:
         suggested_accessories = build_purchase_accessories(temperature_profile, horoscope)
 
-    recommendation_text = await get_llm_recommendation(
+    return RecommendationPlan(
         weather=weather,
         horoscope=horoscope,
         temperature_profile=temperature_profile,
@@ -511,41 +623,51 @@ async def get_ai_recommendation(
         suggested_accessories=suggested_accessories,
         goal_raw=goal_raw,
         goal_normalized=goal_normalized,
+        mode=mode,
     )
 
-    return {
-        "weather": {
-            "temperature": weather.temperature,
-            "feelsLike": weather.feelsLike,
-            "condition": weather.condition,
-            "icon": weather.icon,
-            "humidity": weather.humidity,
-            "windDir": weather.windDir,
-            "windScale": weather.windScale,
-            "location": weather.location,
-            "obsTime": weather.obsTime,
-        },
-        "horoscope": horoscope,
-        "temperature_rule": {
-            "label": temperature_profile["label"],
-            "allowed_seasons": sorted(list(temperature_profile["allowed_seasons"])),
-            "advice": temperature_profile["advice"],
-        },
-        "recommendation_text": recommendation_text,
-        "outfit_summary": build_recommendation_summary(selected, purchase_suggestions),
-        "selection_reasons": selection_reasons,
-        "suggested_top": selected.get("top"),
-        "suggested_bottom": selected.get("bottom"),
-        "suggested_shoes": selected.get("shoes"),
-        "suggested_accessories": suggested_accessories,
-        "purchase_suggestions": purchase_suggestions,
-        "goal_raw": goal_raw,
-        "goal_normalized": goal_normalized,
-        "mode": mode,
-    }
 
+async def get_ai_recommendation(
+    weather: WeatherInfo,
+    zodiac_sign: str | None = None,
+    goal: str | None = None,
+    mode: Literal["balanced", "goal_first", "wardrobe_first"] = "balanced",
+    bypass_cache: bool = False,
+) -> dict:
+    """
+    根据天气和星座运势获取AI穿搭推荐。
+    温度约束为硬条件：衣柜单品必须满足温度策略，不满足时给出购买兜底。
+    """
+    plan = await build_recommendation_plan(weather, zodiac_sign=zodiac_sign, goal=goal, mode=mode)
+    recommendation_text = await get_llm_recommendation(**plan.text_inputs(), bypass_cache=bypass_cache)
+    return plan.to_response(recommendation_text)
 
-async def get_llm_recommendation(
+
+async def stream_ai_recommendation(
+    weather: WeatherInfo,
+    zodiac_sign: str | None = None,
+    goal: str | None = None,
+    mode: Literal["balanced", "goal_first", "wardrobe_first"] = "balanced",
+    bypass_cache: bool = False,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    流式推荐：按 (事件名, 数据) 依次产出
+    weather、temperature_rule → horoscope、selection、purchase_suggestions → token* / fallback → done。
+    确定性的部分先发出，文案随 LLM 生成逐段发出。
+    """
+    yield "weather", build_weather_payload(weather)
+    yield "temperature_rule", build_temperature_rule(build_temperature_profile(weather))
+
+    plan = await build_recommendation_plan(weather, zodiac_sign=zodiac_sign, goal=goal, mode=mode)
+    yield "horoscope", plan.horoscope
+    yield "selection", plan.selection_payload()
+    yield "purchase_suggestions", {"purchase_suggestions": plan.purchase_suggestions}
+
+    async for event in stream_llm_recommendation(**plan.text_inputs(), bypass_cache=bypass_cache):
+        yield event
+
+
+def build_llm_prompt(
     weather: WeatherInfo,
     horoscope: dict,
     temperature_profile: dict[str, Any],
@@ -556,23 +678,6 @@ async def get_llm_recommendation(
     goal_raw: str,
     goal_normalized: str,
 ) -> str:
-    """
-    使用 LLM 生成推荐文案，失败时回退到规则文本。
-    """
-    config = load_config()
-    if not config.api_key:
-        return generate_basic_recommendation(
-            weather=weather,
-            horoscope=horoscope,
-            temperature_profile=temperature_profile,
-            selected=selected,
-            selection_reasons=selection_reasons,
-            purchase_suggestions=purchase_suggestions,
-            suggested_accessories=suggested_accessories,
-            goal_raw=goal_raw,
-            goal_normalized=goal_normalized,
-        )
-
     def item_name(category: str) -> str:
         item = selected.get(category)
         return item["item"] if item else "缺失"
@@ -627,63 +732,278 @@ async def get_llm_recommendation(
 3. 补充1条与星座运势相关的饰品搭配建议
 4. 不要输出代码块
 """
+    return prompt
 
-    try:
-        api_base = config.api_base.rstrip("/")
-        if not api_base.endswith("/v1"):
-            api_base = f"{api_base}/v1"
 
-        payload = {
-            "model": config.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "你是专业穿搭顾问，强调可执行建议和温度适配。",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": 0.6,
-        }
+def build_llm_request(config: Any, prompt: str, stream: bool = False) -> tuple[str, dict[str, str], dict[str, Any]]:
+    """返回 chat/completions 的 (url, headers, payload)。"""
+    api_base = config.api_base.rstrip("/")
+    if not api_base.endswith("/v1"):
+        api_base = f"{api_base}/v1"
+
+    payload = {
+        "model": config.model,
+        "messages": [
+            {
+                "role": "system",
+                "content": "你是专业穿搭顾问，强调可执行建议和温度适配。",
+            },
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.6,
+    }
+    if stream:
+        payload["stream"] = True
+    headers = {
+        "Authorization": f"Bearer {config.api_key}",
+        "Content-Type": "application/json",
+    }
+    return f"{api_base}/chat/completions", headers, payload
 
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.post(
-                f"{api_base}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {config.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-            )
+
+def build_llm_cache_inputs(
+    weather: WeatherInfo,
+    horoscope: dict,
+    temperature_profile: dict[str, Any],
+    selected: dict[str, dict | None],
+    selection_reasons: dict[str, str],
+    purchase_suggestions: list[dict],
+    suggested_accessories: list[dict],
+    goal_raw: str,
+    goal_normalized: str,
+) -> dict[str, Any]:
+    """
+    提示词用到的输入的规范形式，作为文案缓存的键。
+    单品只取 id 与名称；温度按整数度、湿度按 10% 取整，避免小数波动导致缓存失效。
+    """
+    def item_key(item: dict | None) -> list | None:
+        return [item.get("id"), item.get("item", "")] if item else None
+
+    return {
+        "weather": [
+            round(float(weather.temperature)),
+            round(float(weather.feelsLike)),
+            weather.condition,
+            round(float(weather.humidity) / 10) * 10,
+            str(weather.windScale),
+        ],
+        "horoscope": [horoscope.get(key, "") for key in ("zodiac_name", "mood", "lucky_color", "summary")],
+        "temperature": [
+            temperature_profile["label"],
+            sorted(temperature_profile["allowed_seasons"]),
+            temperature_profile["advice"],
+        ],
+        "selected": {category: item_key(selected.get(category)) for category in ("top", "bottom", "shoes")},
+        "selection_reasons": {category: selection_reasons.get(category, "") for category in ("top", "bottom", "shoes")},
+        "purchase": [[entry.get("title", ""), list(entry.get("keywords", []))] for entry in purchase_suggestions],
+        "accessories": [
+            [entry.get("name", ""), bool(entry.get("from_wardrobe")), entry.get("reason", "")]
+            for entry in suggested_accessories
+        ],
+        "goal": [goal_raw or "", goal_normalized or ""],
+    }
+
+
+async def get_llm_recommendation(
+    weather: WeatherInfo,
+    horoscope: dict,
+    temperature_profile: dict[str, Any],
+    selected: dict[str, dict | None],
+    selection_reasons: dict[str, str],
+    purchase_suggestions: list[dict],
+    suggested_accessories: list[dict],
+    goal_raw: str,
+    goal_normalized: str,
+    bypass_cache: bool = False,
+) -> str:
+    """
+    使用 LLM 生成推荐文案，失败时回退到规则文本。
+    相同输入的成功结果按 TTL 缓存；bypass_cache 时强制重新生成并刷新缓存。
+    """
+    text_inputs = {
+        "weather": weather,
+        "horoscope": horoscope,
+        "temperature_profile": temperature_profile,
+        "selected": selected,
+        "selection_reasons": selection_reasons,
+        "purchase_suggestions": purchase_suggestions,
+        "suggested_accessories": suggested_accessories,
+        "goal_raw": goal_raw,
+        "goal_normalized": goal_normalized,
+    }
+    config = load_config()
+    if not config.api_key:
+        return generate_basic_recommendation(**text_inputs)
+
+    cache_key = build_cache_key(build_llm_cache_inputs(**text_inputs), config.model)
+    cached = await get_cached_text(cache_key, bypass_cache=bypass_cache)
+    if cached is not None:
+        return cached
+
+    # 相同输入的并发请求共享同一次 LLM 调用
+    text = await _llm_text_flight.do(cache_key, lambda: _generate_llm_text(config, text_inputs, cache_key))
+    if text is None:
+        return generate_basic_recommendation(**text_inputs)
+    return text
+
+
+async def _generate_llm_text(config: Any, text_inputs: dict[str, Any], cache_key: str) -> str | None:
+    """请求 LLM 生成文案并写入缓存；失败返回 None。"""
+    try:
+        url, headers, payload = build_llm_request(config, build_llm_prompt(**text_inputs))
+        async with http_client("llm") as client:
+            response = await client.post(url, headers=headers, json=payload, timeout=LLM_TIMEOUT)
 
         if response.status_code != 200:
             print(f"LLM API请求失败: {response.status_code}")
-            return generate_basic_recommendation(
-                weather=weather,
-                horoscope=horoscope,
-                temperature_profile=temperature_profile,
-                selected=selected,
-                selection_reasons=selection_reasons,
-                purchase_suggestions=purchase_suggestions,
-                suggested_accessories=suggested_accessories,
-                goal_raw=goal_raw,
-                goal_normalized=goal_normalized,
-            )
+            return None
 
         data = response.json()
-        return data["choices"][0]["message"]["content"].strip()
+        text = data["choices"][0]["message"]["content"].strip()
     except Exception as exc:
         print(f"调用LLM失败: {exc}")
-        return generate_basic_recommendation(
-            weather=weather,
-            horoscope=horoscope,
-            temperature_profile=temperature_profile,
-            selected=selected,
-            selection_reasons=selection_reasons,
-            purchase_suggestions=purchase_suggestions,
-            suggested_accessories=suggested_accessories,
-            goal_raw=goal_raw,
-            goal_normalized=goal_normalized,
-        )
+        return None
+
+    await store_text(cache_key, config.model, text)
+    return text
+
+
+def _parse_stream_delta(line: str) -> str | None:
+    """解析 chat/completions 流式响应的一行；返回增量文本，"[DONE]" 返回 None。"""
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+    chunk = json.loads(data)
+    choices = chunk.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+async def stream_llm_recommendation(
+    weather: WeatherInfo,
+    horoscope: dict,
+    temperature_profile: dict[str, Any],
+    selected: dict[str, dict | None],
+    selection_reasons: dict[str, str],
+    purchase_suggestions: list[dict],
+    suggested_accessories: list[dict],
+    goal_raw: str,
+    goal_normalized: str,
+    bypass_cache: bool = False,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    流式生成推荐文案，依次产出 ("token", {"text"}) 事件，最后产出 ("done", {"recommendation_text", "source"})。
+    未配置 API Key 或命中文案缓存时一次性发出全文；请求失败（包括已输出部分内容后中断）时发出
+    ("fallback", {"text", "reason"})，客户端应以规则文本替换已收到的内容。
+    """
+    text_inputs = {
+        "weather": weather,
+        "horoscope": horoscope,
+        "temperature_profile": temperature_profile,
+        "selected": selected,
+        "selection_reasons": selection_reasons,
+        "purchase_suggestions": purchase_suggestions,
+        "suggested_accessories": suggested_accessories,
+        "goal_raw": goal_raw,
+        "goal_normalized": goal_normalized,
+    }
+    config = load_config()
+    if not config.api_key:
+        text = generate_basic_recommendation(**text_inputs)
+        yield "token", {"text": text}
+        yield "done", {"recommendation_text": text, "source": "basic"}
+        return
+
+    cache_key = build_cache_key(build_llm_cache_inputs(**text_inputs), config.model)
+    cached = await get_cached_text(cache_key, bypass_cache=bypass_cache)
+    if cached is not None:
+        yield "token", {"text": cached}
+        yield "done", {"recommendation_text": cached, "source": "cache"}
+        return
+
+    # 与 get_llm_recommendation 共用 single-flight：发起调用的请求逐段转发增量文本，
+    # 相同输入的并发请求（流式或非流式）等待同一次调用的完整文案
+    deltas: asyncio.Queue[str] = asyncio.Queue()
+    outcome = {"error": ""}
+    shared = asyncio.ensure_future(_llm_text_flight.do(
+        cache_key, lambda: _stream_llm_text(config, text_inputs, cache_key, deltas, outcome)
+    ))
+    streamed = False
+    try:
+        async for delta in _forward_deltas(deltas, shared):
+            streamed = True
+            yield "token", {"text": delta}
+        text = shared.result()
+    finally:
+        # 客户端断开时只取消本请求的等待，共享调用继续完成并写入缓存
+        if not shared.done():
+            shared.cancel()
+
+    if text is None:
+        error = outcome["error"] or "共享的 LLM 请求失败"
+        text = generate_basic_recommendation(**text_inputs)
+        yield "fallback", {"text": text, "reason": error}
+        yield "done", {"recommendation_text": text, "source": "fallback"}
+        return
+    if not streamed:
+        yield "token", {"text": text}
+    yield "done", {"recommendation_text": text, "source": "llm"}
+
+
+async def _forward_deltas(deltas: asyncio.Queue, shared: asyncio.Future) -> AsyncIterator[str]:
+    """在共享调用结束前持续取出增量文本；加入他人发起的调用时队列始终为空。"""
+    while not shared.done():
+        getter = asyncio.ensure_future(deltas.get())
+        try:
+            await asyncio.wait({getter, shared}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            yield getter.result()
+    while not deltas.empty():
+        yield deltas.get_nowait()
+
+
+async def _stream_llm_text(
+    config: Any,
+    text_inputs: dict[str, Any],
+    cache_key: str,
+    deltas: asyncio.Queue,
+    outcome: dict[str, str],
+) -> str | None:
+    """流式请求 LLM，增量文本放入 deltas，成功后写入缓存；失败返回 None，原因写入 outcome["error"]。"""
+    parts: list[str] = []
+    error = ""
+    try:
+        url, headers, payload = build_llm_request(config, build_llm_prompt(**text_inputs), stream=True)
+        async with http_client("llm") as client:
+            async with client.stream("POST", url, headers=headers, json=payload, timeout=LLM_TIMEOUT) as response:
+                if response.status_code != 200:
+                    error = f"LLM API请求失败: {response.status_code}"
+                else:
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        delta = _parse_stream_delta(line)
+                        if delta is None:
+                            break
+                        if delta:
+                            parts.append(delta)
+                            deltas.put_nowait(delta)
+    except Exception as exc:
+        error = f"调用LLM失败: {exc}"
+
+    text = "".join(parts).strip()
+    if not error and not text:
+        error = "LLM 未返回内容"
+    if error:
+        print(error)
+        outcome["error"] = error
+        return None
+    await store_text(cache_key, config.model, text)
+    return text
 
 
 def generate_basic_recommendation(
@@ -1,9 +1,10 @@
 """
 remove.bg API 背景移除服务
 """
-import httpx
 from typing import Optional
 
+from services.http_client import http_client
+
 
 async def remove_background_api(
     image_bytes: bytes,
@@ -41,9 +42,10 @@ async def remove_background_api(
         "size": size
     }
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with http_client("removebg") as client:
         response = await client.post(
             url,
+            timeout=60.0,
             headers=headers,
             files=files,
             data=data
@@ -0,0 +1,146 @@
+"""
+推荐打分的 NumPy 向量化实现（可选）
+把快照中每件衣物的季节 / 风格 / 场景编码为位图与 one-hot 矩阵，
+一次向量运算算出某个类别全部候选的得分，再用 argmax / 稳定排序选出结果。
+打分规则与 services.recommendation.score_features 完全一致；未安装 numpy 时不可用。
+"""
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from domain.tags import SEASON_ALIASES
+
+if TYPE_CHECKING:
+    from services.recommendation import ItemFeatures, ScoringContext
+
+NUMPY_AVAILABLE = np is not None
+
+# 季节 -> 位
+SEASON_BITS = {season: 1 << index for index, season in enumerate(SEASON_ALIASES)}
+# 每个索引缓存的幸运色匹配结果数量（幸运色种类有限）
+COLOR_MATCH_CACHE_SIZE = 32
+
+
+def _vocabulary_matrix(values: Sequence[frozenset[str]]) -> tuple[dict[str, int], "np.ndarray"]:
+    vocabulary: dict[str, int] = {}
+    for tokens in values:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    matrix = np.zeros((len(values), max(len(vocabulary), 1)), dtype=bool)
+    for row, tokens in enumerate(values):
+        for token in tokens:
+            matrix[row, vocabulary[token]] = True
+    return vocabulary, matrix
+
+
+class VectorScoringIndex:
+    """某一版本快照的向量化打分索引，行顺序与 snapshot.item_dicts 一致。"""
+
+    def __init__(self, items: Sequence[dict], features: Sequence["ItemFeatures"]):
+        self.items = tuple(items)
+        self.features = tuple(features)
+        self.categories = np.array([item.get("canonical_category", "") for item in self.items], dtype=object)
+        self.season_bits = np.array(
+            [sum(SEASON_BITS.get(season, 0) for season in item_features.seasons) for item_features in self.features],
+            dtype=np.uint8,
+        )
+        self.waterproof = np.array([item_features.waterproof_hint for item_features in self.features], dtype=bool)
+        self.accessory_like = np.array([item_features.accessory_like for item_features in self.features], dtype=bool)
+        self.has_season_tags = np.array([bool(item.get("season_semantics")) for item in self.items], dtype=bool)
+        self.style_vocabulary, self.style_matrix = _vocabulary_matrix([f.style_values for f in self.features])
+        self.usage_vocabulary, self.usage_matrix = _vocabulary_matrix([f.usage_tokens for f in self.features])
+        self.texts = np.array([item_features.searchable_text for item_features in self.features], dtype=str)
+        self._category_masks: dict[str, "np.ndarray"] = {}
+        self._color_matches: OrderedDict[tuple[str, ...], "np.ndarray"] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def category_mask(self, category: str) -> "np.ndarray":
+        mask = self._category_masks.get(category)
+        if mask is None:
+            mask = self.categories == category
+            self._category_masks[category] = mask
+        return mask
+
+    def season_match(self, context: "ScoringContext") -> "np.ndarray":
+        allowed = sum(SEASON_BITS.get(season, 0) for season in context.allowed_seasons)
+        return (self.season_bits & allowed) != 0
+
+    def _any_token(self, vocabulary: dict[str, int], matrix: "np.ndarray", tokens) -> "np.ndarray":
+        columns = [vocabulary[token] for token in tokens if token in vocabulary]
+        if not columns:
+            return np.zeros(len(self.items), dtype=bool)
+        return matrix[:, columns].any(axis=1)
+
+    def color_match(self, color_tokens: tuple[str, ...]) -> "np.ndarray":
+        cached = self._color_matches.get(color_tokens)
+        if cached is not None:
+            self._color_matches.move_to_end(color_tokens)
+            return cached
+        matched = np.zeros(len(self.items), dtype=bool)
+        for token in color_tokens:
+            matched |= np.char.find(self.texts, token) >= 0
+        self._color_matches[color_tokens] = matched
+        if len(self._color_matches) > COLOR_MATCH_CACHE_SIZE:
+            self._color_matches.popitem(last=False)
+        return matched
+
+    def scores(self, category: str, context: "ScoringContext") -> "np.ndarray":
+        """全部衣物按 category 规则计算的得分（int32），与 score_features 一致。"""
+        scores = np.full(len(self.items), 5, dtype=np.int32)
+        scores += 3 * self.season_match(context)
+        if context.color_tokens:
+            scores += context.color_bonus * self.color_match(context.color_tokens)
+        if context.style_hints:
+            scores += context.style_bonus * self._any_token(self.style_vocabulary, self.style_matrix, context.style_hints)
+        if category == "shoes" and context.wet_weather:
+            scores += 2 * self.waterproof
+        if context.normalized_goal:
+            scores += context.goal_bonus * self._any_token(
+                self.usage_vocabulary, self.usage_matrix, (context.normalized_goal,)
+            )
+        return scores
+
+    def candidate_scores(self, category: str, context: "ScoringContext", season_only: bool = True) -> list[tuple[int, int]]:
+        """该类别候选的 (行号, 得分) 列表，保持衣柜顺序。"""
+        mask = self.category_mask(category)
+        if season_only:
+            mask = mask & self.season_match(context)
+        rows = np.flatnonzero(mask)
+        scores = self.scores(category, context)[rows]
+        return list(zip(rows.tolist(), scores.tolist()))
+
+    def pick_best(self, category: str, context: "ScoringContext", season_only: bool = True) -> Optional[int]:
+        """返回该类别中得分最高的行号（同分取先出现者）；season_only 时只考虑季节匹配的候选。"""
+        mask = self.category_mask(category)
+        if season_only:
+            mask = mask & self.season_match(context)
+        if not mask.any():
+            return None
+        scores = np.where(mask, self.scores(category, context), -1)
+        return int(np.argmax(scores))
+
+    def top_k(self, mask: "np.ndarray", category: str, context: "ScoringContext", k: int) -> list[int]:
+        """mask 内得分最高的 k 个行号，同分保持原顺序。"""
+        rows = np.flatnonzero(mask)
+        if rows.size == 0 or k <= 0:
+            return []
+        scores = self.scores(category, context)[rows]
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [int(rows[position]) for position in order]
+
+    def accessory_mask(self, context: "ScoringContext") -> "np.ndarray":
+        """饰品候选：类别为饰品或名称含饰品关键词，且季节匹配或没有季节标签。"""
+        candidates = self.category_mask("accessory") | self.accessory_like
+        return candidates & (self.season_match(context) | ~self.has_season_tags)
+
+
+def build_vector_index(items: Sequence[dict], features: Sequence["ItemFeatures"]) -> VectorScoringIndex:
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("未安装 numpy，无法使用向量化打分")
+    return VectorScoringIndex(items, features)
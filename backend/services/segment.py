@@ -1,8 +1,17 @@
 """
 rembg 背景移除服务
+抠图是 CPU 密集的同步调用，统一放到专用执行器（线程池或进程池）中运行，
+模型 session 只加载一次并复用；同时提交到执行器的任务数有上限，超出时调用方按先后顺序等待空位，
+等待超过时限才拒绝，避免请求无限堆积。
 """
-from PIL import Image
+import asyncio
 import io
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Optional
+
+from PIL import Image
 
 
 try:
@@ -10,10 +19,65 @@ try:
 except ImportError:
     rembg_remove = None
 
+try:
+    from rembg import new_session as rembg_new_session
+except ImportError:
+    rembg_new_session = None
+
+# thread：与应用同进程的线程池（onnxruntime 推理会释放 GIL）；process：独立进程池
+SEGMENT_EXECUTOR = os.getenv("SEGMENT_EXECUTOR", "thread").strip().lower()
+SEGMENT_WORKERS = max(int(os.getenv("SEGMENT_WORKERS", "1")), 1)
+# 正在执行 + 排队中的抠图任务上限
+SEGMENT_QUEUE_SIZE = max(int(os.getenv("SEGMENT_QUEUE_SIZE", "4")), 1)
+# 队列已满时等待空位的默认时限（秒），0 表示不等待直接拒绝
+SEGMENT_WAIT_SECONDS = max(float(os.getenv("SEGMENT_WAIT_SECONDS", "15")), 0.0)
+SEGMENT_MODEL = os.getenv("SEGMENT_MODEL", "u2net")
+
+
+class SegmentationBusyError(RuntimeError):
+    """抠图队列已满且在等待时限内没有空位"""
+
+
+_SESSION: Any = None
+_SESSION_LOCK = threading.Lock()
+_EXECUTOR: Optional[Executor] = None
+_EXECUTOR_LOCK = threading.Lock()
+# 进程池模式下模型 session 在子进程中加载，父进程只能通过预热任务的结果得知
+_WARMUP: Optional[Future] = None
+# 执行器空位（按事件循环创建，等待者先到先得）
+_SLOTS: Optional[asyncio.Semaphore] = None
+_SLOTS_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SEGMENT_STATS = {
+    "in_flight": 0,
+    "waiting": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+}
+
+
+def _get_session() -> Any:
+    """加载（仅一次）并返回 rembg 模型 session；rembg 不支持 session 时返回 None。"""
+    global _SESSION
+    if _SESSION is not None or rembg_new_session is None:
+        return _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = rembg_new_session(SEGMENT_MODEL)
+    return _SESSION
+
+
+def _warm_session() -> bool:
+    try:
+        return _get_session() is not None
+    except Exception as e:
+        print(f"⚠️  rembg 模型预热失败: {e}")
+        return False
+
 
 def remove_background(image_bytes: bytes) -> bytes:
     """
-    使用 rembg 移除图片背景
+    使用 rembg 移除图片背景（同步执行，会阻塞调用线程）
 
     Args:
         image_bytes: 原始图片的字节数据
@@ -33,8 +97,114 @@ def remove_background(image_bytes: bytes) -> bytes:
             )
 
     input_img = Image.open(io.BytesIO(image_bytes))
-    output = rembg_remove(input_img)
+    session = _get_session()
+    if session is not None:
+        output = rembg_remove(input_img, session=session)
+    else:
+        output = rembg_remove(input_img)
 
     buf = io.BytesIO()
     output.save(buf, format="PNG")
     return buf.getvalue()
+
+
+def _get_executor() -> Executor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                if SEGMENT_EXECUTOR == "process":
+                    _EXECUTOR = ProcessPoolExecutor(max_workers=SEGMENT_WORKERS, initializer=_warm_session)
+                else:
+                    _EXECUTOR = ThreadPoolExecutor(max_workers=SEGMENT_WORKERS, thread_name_prefix="segment")
+    return _EXECUTOR
+
+
+def start_segment_executor() -> None:
+    """创建抠图执行器并在后台预热模型 session（不阻塞启动）。"""
+    global _WARMUP
+    executor = _get_executor()
+    if rembg_new_session is None:
+        print("ℹ️  未安装 rembg，跳过抠图模型预热")
+        return
+    _WARMUP = executor.submit(_warm_session)
+    print(f"✅ 抠图执行器已启动（{SEGMENT_EXECUTOR} × {SEGMENT_WORKERS}，队列上限 {SEGMENT_QUEUE_SIZE}）")
+
+
+def shutdown_segment_executor() -> None:
+    global _EXECUTOR, _WARMUP
+    with _EXECUTOR_LOCK:
+        executor = _EXECUTOR
+        _EXECUTOR = None
+        _WARMUP = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _SLOTS, _SLOTS_LOOP
+    loop = asyncio.get_running_loop()
+    if _SLOTS is None or _SLOTS_LOOP is not loop:
+        _SLOTS = asyncio.Semaphore(SEGMENT_QUEUE_SIZE)
+        _SLOTS_LOOP = loop
+    return _SLOTS
+
+
+async def _acquire_slot(slots: asyncio.Semaphore, wait_timeout: float) -> None:
+    """等待执行器空位；超过 wait_timeout 秒仍无空位时抛出 SegmentationBusyError。"""
+    if wait_timeout <= 0 and slots.locked():
+        _SEGMENT_STATS["rejected"] += 1
+        raise SegmentationBusyError("抠图任务繁忙，请稍后重试")
+
+    _SEGMENT_STATS["waiting"] += 1
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=wait_timeout if wait_timeout > 0 else None)
+    except asyncio.TimeoutError:
+        _SEGMENT_STATS["rejected"] += 1
+        raise SegmentationBusyError("抠图任务繁忙，请稍后重试") from None
+    finally:
+        _SEGMENT_STATS["waiting"] -= 1
+
+
+async def remove_background_async(image_bytes: bytes, wait_timeout: Optional[float] = None) -> bytes:
+    """
+    在专用执行器中移除背景，事件循环不被阻塞。
+    执行中 + 排队中的任务达到 SEGMENT_QUEUE_SIZE 时按先后顺序等待空位，
+    wait_timeout 秒（默认 SEGMENT_WAIT_SECONDS）内仍无空位则抛出 SegmentationBusyError。
+    """
+    slots = _get_slots()
+    await _acquire_slot(slots, SEGMENT_WAIT_SECONDS if wait_timeout is None else wait_timeout)
+
+    _SEGMENT_STATS["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_executor(), remove_background, image_bytes)
+    except Exception:
+        _SEGMENT_STATS["failed"] += 1
+        raise
+    finally:
+        _SEGMENT_STATS["in_flight"] -= 1
+        slots.release()
+    _SEGMENT_STATS["completed"] += 1
+    return result
+
+
+def _session_loaded() -> bool:
+    if SEGMENT_EXECUTOR != "process":
+        return _SESSION is not None
+    # 子进程的 session 对父进程不可见：以预热任务在子进程中成功加载为准
+    warmup = _WARMUP
+    if warmup is None or not warmup.done() or warmup.cancelled() or warmup.exception() is not None:
+        return False
+    return bool(warmup.result())
+
+
+def get_segment_stats() -> dict[str, Any]:
+    return {
+        "executor": SEGMENT_EXECUTOR,
+        "workers": SEGMENT_WORKERS,
+        "queue_size": SEGMENT_QUEUE_SIZE,
+        "wait_seconds": SEGMENT_WAIT_SECONDS,
+        "session_loaded": _session_loaded(),
+        **_SEGMENT_STATS,
+    }
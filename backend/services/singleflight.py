@@ -0,0 +1,67 @@
+"""
+异步 single-flight：相同 key 的并发调用只执行一次上游请求，其余调用者等待并共享同一结果（或异常）。
+用于缓存未命中瞬间的并发去重（天气、地理编码、运势源数据与推理、AI 文案）。
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按 key 合并进行中的调用；调用完成后立即移除，之后的调用会重新执行。"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._stats = {"executed": 0, "shared": 0, "failed": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 fn() 或加入同 key 正在进行的调用。
+        上游调用在独立任务中运行：某个调用者被取消（如客户端断开）不会影响其余等待者。
+        """
+        task = self._calls.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._stats["executed"] += 1
+            task.add_done_callback(lambda finished, key=key: self._finish(key, finished))
+        else:
+            self._stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 取出异常，避免所有等待者都已取消时出现 "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["failed"] += 1
+
+    async def cancel_all(self) -> None:
+        """取消并等待所有进行中的调用（应用关闭时使用，避免其在共享客户端 / 连接池关闭后继续运行）。"""
+        tasks = list(self._calls.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict[str, Any]:
+        return {"in_flight": self.in_flight(), **self._stats}
+
+
+_GROUPS: dict[str, SingleFlight] = {}
+
+
+def get_singleflight(name: str) -> SingleFlight:
+    group = _GROUPS.get(name)
+    if group is None:
+        group = SingleFlight(name)
+        _GROUPS[name] = group
+    return group
+
+
+def get_singleflight_stats() -> dict[str, Any]:
+    return {name: group.stats() for name, group in _GROUPS.items()}
@@ -6,8 +6,7 @@ from __future__ import annotations
 import base64
 from typing import Any
 
-import httpx
-
+from services.http_client import http_client
 from storage.config_store import load_config
 
 
@@ -52,8 +51,14 @@ async def run_tryon(person_image_bytes: bytes, garment_image_bytes: bytes, categ
     if config.tryon_model:
         data["model"] = config.tryon_model
 
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(config.tryon_api_url, headers=headers, files=files, data=data)
+    async with http_client("tryon") as client:
+        response = await client.post(
+            config.tryon_api_url,
+            headers=headers,
+            files=files,
+            data=data,
+            timeout=120.0,
+        )
 
     if response.status_code >= 400:
         detail = response.text.strip()
@@ -0,0 +1,235 @@
+"""
+异步上传任务队列
+上传接口只负责落盘原始图片并创建任务，后台 worker 依次执行去背景 / 语义分析 / 入库，
+各阶段有独立的并发上限；任务状态持久化在 jobs 表，进程重启后自动恢复未完成的任务。
+"""
+import asyncio
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import storage.db as db_store
+from domain.jobs import JOB_TERMINAL_STATUSES, UploadJobStatus
+from services import upload_pipeline
+
+UPLOAD_JOB_KIND = "upload"
+UPLOAD_JOB_WORKERS = max(int(os.getenv("UPLOAD_JOB_WORKERS", "4")), 1)
+UPLOAD_SEGMENT_CONCURRENCY = max(int(os.getenv("UPLOAD_SEGMENT_CONCURRENCY", "2")), 1)
+UPLOAD_ANALYZE_CONCURRENCY = max(int(os.getenv("UPLOAD_ANALYZE_CONCURRENCY", "4")), 1)
+# 重启恢复时的最大尝试次数，超过后标记为失败
+UPLOAD_JOB_MAX_ATTEMPTS = max(int(os.getenv("UPLOAD_JOB_MAX_ATTEMPTS", "3")), 1)
+
+
+class _UploadWorkerRuntime:
+    """绑定到某个事件循环的队列、阶段信号量与 worker 任务。"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.segment_semaphore = asyncio.Semaphore(UPLOAD_SEGMENT_CONCURRENCY)
+        self.analyze_semaphore = asyncio.Semaphore(UPLOAD_ANALYZE_CONCURRENCY)
+        self.active_stages = {"segment": 0, "analyze": 0, "save": 0}
+        self.tasks = [loop.create_task(_worker(self)) for _ in range(UPLOAD_JOB_WORKERS)]
+
+
+_RUNTIME: Optional[_UploadWorkerRuntime] = None
+# job_id -> 订阅该任务状态变化的队列（SSE）
+_SUBSCRIBERS: dict[str, set[asyncio.Queue]] = {}
+_JOB_STATS = {"submitted": 0, "succeeded": 0, "failed": 0, "recovered": 0}
+
+
+def job_input_dir() -> Path:
+    """原始图片与数据库放在一起，保证重启后仍能找到。"""
+    return Path(db_store.DB_PATH).parent / "upload_jobs"
+
+
+def _ensure_runtime() -> _UploadWorkerRuntime:
+    global _RUNTIME
+    loop = asyncio.get_running_loop()
+    if _RUNTIME is None or _RUNTIME.loop is not loop:
+        _RUNTIME = _UploadWorkerRuntime(loop)
+    return _RUNTIME
+
+
+def _publish(job_id: str) -> None:
+    for queue in list(_SUBSCRIBERS.get(job_id, ())):
+        queue.put_nowait(job_id)
+
+
+@contextmanager
+def subscribe_upload_job(job_id: str) -> Iterator[asyncio.Queue]:
+    """订阅任务状态变化；每次变化会向队列放入一个通知，调用方自行重新读取状态。"""
+    queue: asyncio.Queue = asyncio.Queue()
+    _SUBSCRIBERS.setdefault(job_id, set()).add(queue)
+    try:
+        yield queue
+    finally:
+        subscribers = _SUBSCRIBERS.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                _SUBSCRIBERS.pop(job_id, None)
+
+
+def _write_file(filepath: Path, data: bytes) -> None:
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "wb") as f:
+        f.write(data)
+
+
+async def submit_upload_job(raw_bytes: bytes, suffix: str = ".img") -> str:
+    """落盘原始图片、创建任务并加入队列，返回任务 ID。"""
+    job_id = uuid.uuid4().hex
+    input_path = job_input_dir() / f"{job_id}{suffix}"
+    await asyncio.to_thread(_write_file, input_path, raw_bytes)
+    await db_store.create_job(job_id, UPLOAD_JOB_KIND, str(input_path))
+    _JOB_STATS["submitted"] += 1
+    _ensure_runtime().queue.put_nowait(job_id)
+    return job_id
+
+
+async def get_upload_job_status(job_id: str) -> Optional[UploadJobStatus]:
+    job = await db_store.get_job(job_id)
+    if not job or job["kind"] != UPLOAD_JOB_KIND:
+        return None
+
+    clothes = None
+    clothes_id = (job["result"] or {}).get("clothes_id")
+    if job["status"] == "succeeded" and clothes_id is not None:
+        clothes = await db_store.get_clothes_by_id(int(clothes_id))
+
+    return UploadJobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        stage=job["stage"],
+        error=job["error"],
+        attempts=job["attempts"],
+        clothes=clothes,
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+    )
+
+
+async def _set_stage(job_id: str, stage: str) -> None:
+    await db_store.update_job(job_id, "running", stage=stage)
+    _publish(job_id)
+
+
+def _discard_input(input_path: Optional[str]) -> None:
+    """任务进入终态（成功或失败）后原始图片不再需要；失败的任务不会自动重试。"""
+    if not input_path:
+        return
+    try:
+        Path(input_path).unlink()
+    except OSError:
+        pass
+
+
+async def _fail(job_id: str, error: str, input_path: Optional[str]) -> None:
+    await db_store.update_job(job_id, "failed", error=error)
+    _JOB_STATS["failed"] += 1
+    _publish(job_id)
+    _discard_input(input_path)
+
+
+async def _run_stage(runtime: _UploadWorkerRuntime, job_id: str, stage: str, awaitable):
+    await _set_stage(job_id, stage)
+    runtime.active_stages[stage] += 1
+    try:
+        return await awaitable
+    finally:
+        runtime.active_stages[stage] -= 1
+
+
+async def _process_job(runtime: _UploadWorkerRuntime, job_id: str) -> None:
+    job = await db_store.get_job(job_id)
+    if not job or job["status"] in JOB_TERMINAL_STATUSES:
+        return
+
+    input_path = Path(job["input_path"] or "")
+    try:
+        raw_bytes = await asyncio.to_thread(input_path.read_bytes)
+    except OSError:
+        await _fail(job_id, "原始图片已丢失", job["input_path"])
+        return
+
+    try:
+        fingerprint = await upload_pipeline.fingerprint_image(raw_bytes)
+        clothes = await upload_pipeline.find_processed_duplicate(fingerprint)
+        if clothes is None:
+            async with runtime.segment_semaphore:
+                processed_bytes = await _run_stage(
+                    runtime, job_id, "segment", upload_pipeline.segment_image_when_available(raw_bytes)
+                )
+            async with runtime.analyze_semaphore:
+                semantics = await _run_stage(runtime, job_id, "analyze", upload_pipeline.analyze_image(processed_bytes))
+            filename = await _run_stage(runtime, job_id, "save", upload_pipeline.save_processed_image(processed_bytes))
+            clothes = upload_pipeline.build_clothes_create(semantics, filename)
+            await upload_pipeline.remember_processed_image(fingerprint, clothes)
+        await db_store.complete_upload_job(job_id, clothes)
+    except ValueError as e:
+        await _fail(job_id, f"图片分析失败: {str(e)}", job["input_path"])
+        return
+    except Exception as e:
+        await _fail(job_id, f"服务器错误: {str(e)}", job["input_path"])
+        return
+
+    _JOB_STATS["succeeded"] += 1
+    _publish(job_id)
+    _discard_input(job["input_path"])
+
+
+async def _worker(runtime: _UploadWorkerRuntime) -> None:
+    while True:
+        job_id = await runtime.queue.get()
+        try:
+            await _process_job(runtime, job_id)
+        except Exception as e:
+            print(f"⚠️  上传任务 {job_id} 处理异常: {e}")
+        finally:
+            runtime.queue.task_done()
+
+
+async def recover_upload_jobs() -> int:
+    """将未完成的任务（含上次进程中断时正在执行的）重新入队，返回恢复数量。"""
+    runtime = _ensure_runtime()
+    recovered = 0
+    for job in await db_store.list_unfinished_jobs(UPLOAD_JOB_KIND):
+        attempts = await db_store.requeue_job(job["id"])
+        if attempts > UPLOAD_JOB_MAX_ATTEMPTS:
+            await _fail(job["id"], "任务多次中断，已放弃", job["input_path"])
+            continue
+        runtime.queue.put_nowait(job["id"])
+        recovered += 1
+    _JOB_STATS["recovered"] += recovered
+    return recovered
+
+
+async def start_upload_workers() -> None:
+    """启动上传 worker 并恢复未完成的任务（在应用启动时调用）。"""
+    recovered = await recover_upload_jobs()
+    print(f"✅ 上传任务队列已启动（{UPLOAD_JOB_WORKERS} 个 worker，恢复 {recovered} 个任务）")
+
+
+async def stop_upload_workers() -> None:
+    global _RUNTIME
+    runtime = _RUNTIME
+    _RUNTIME = None
+    if runtime is None:
+        return
+    for task in runtime.tasks:
+        task.cancel()
+    # 被中断的任务保持 running 状态，下次启动时恢复
+    await asyncio.gather(*runtime.tasks, return_exceptions=True)
+
+
+def get_upload_job_stats() -> dict[str, Any]:
+    runtime = _RUNTIME
+    return {
+        "workers": UPLOAD_JOB_WORKERS if runtime else 0,
+        "queued": runtime.queue.qsize() if runtime else 0,
+        "active_stages": dict(runtime.active_stages) if runtime else {},
+        **_JOB_STATS,
+    }
@@ -0,0 +1,252 @@
+"""
+上传处理流水线的各个阶段
+同步上传、后台上传任务与批量上传共用：去背景 -> 语义分析 -> 保存图片 -> 组装入库数据
+"""
+import asyncio
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from domain.clothes import (
+    BatchUploadItemResult,
+    BatchUploadResponse,
+    ClothesCreate,
+    ClothesSemantics,
+    NearDuplicatePair,
+    resolve_category_value,
+)
+from services.image_fingerprint import ImageFingerprint, compute_fingerprint, hamming_distance
+from services.image_variants import generate_image_variants_async
+from services.openai_compatible import analyze_clothes_openai
+from services.removebg import remove_background_api
+from services.segment import remove_background_async
+from storage.config_store import load_config
+from storage.db import (
+    add_clothes_many,
+    get_clothes_by_ids,
+    get_image_hash,
+    upsert_image_hash,
+    list_clothes_image_hashes,
+)
+
+# 上传目录
+UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+UPLOAD_DIR.mkdir(exist_ok=True)
+
+ALLOWED_CATEGORIES = {"top", "bottom", "shoes", "accessory"}
+
+# 批量上传：单次最多图片数与各阶段默认并发
+UPLOAD_BATCH_MAX_FILES = max(int(os.getenv("UPLOAD_BATCH_MAX_FILES", "50")), 1)
+UPLOAD_BATCH_SEGMENT_CONCURRENCY = max(int(os.getenv("UPLOAD_BATCH_SEGMENT_CONCURRENCY", "2")), 1)
+UPLOAD_BATCH_ANALYZE_CONCURRENCY = max(int(os.getenv("UPLOAD_BATCH_ANALYZE_CONCURRENCY", "4")), 1)
+# 重复图片复用已处理结果（0 关闭）；近似重复判定的 dHash 汉明距离上限
+IMAGE_DEDUP_ENABLED = os.getenv("IMAGE_DEDUP_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+IMAGE_NEAR_DUPLICATE_DISTANCE = int(os.getenv("IMAGE_NEAR_DUPLICATE_DISTANCE", "6"))
+# 后台/批量场景下抠图执行器繁忙时的最长等待时间（秒）
+SEGMENT_BUSY_MAX_WAIT_SECONDS = 120.0
+
+
+async def fingerprint_image(raw_bytes: bytes) -> ImageFingerprint:
+    return await asyncio.to_thread(compute_fingerprint, raw_bytes)
+
+
+async def find_processed_duplicate(fingerprint: ImageFingerprint) -> Optional[ClothesCreate]:
+    """同一张原始图片已处理过且结果文件仍在时，返回可直接入库的数据（跳过去背景与 LLM）。"""
+    if not IMAGE_DEDUP_ENABLED:
+        return None
+    cached = await get_image_hash(fingerprint.sha256)
+    if not cached or not (UPLOAD_DIR / cached["processed_filename"]).exists():
+        return None
+    return cached["clothes"]
+
+
+async def remember_processed_image(fingerprint: ImageFingerprint, clothes: ClothesCreate) -> None:
+    if not IMAGE_DEDUP_ENABLED:
+        return
+    try:
+        await upsert_image_hash(fingerprint.sha256, fingerprint.dhash, clothes)
+    except Exception as e:
+        print(f"⚠️  记录图片指纹失败: {e}")
+
+
+async def process_raw_image(raw_bytes: bytes) -> tuple[ClothesCreate, bool]:
+    """
+    完整处理一张原始图片，返回 (入库数据, 是否复用了重复图片的结果)。
+    供不需要分阶段限流的调用方使用。
+    """
+    fingerprint = await fingerprint_image(raw_bytes)
+    duplicate = await find_processed_duplicate(fingerprint)
+    if duplicate is not None:
+        return duplicate, True
+
+    processed_bytes = await segment_image(raw_bytes)
+    semantics = await analyze_image(processed_bytes)
+    filename = await save_processed_image(processed_bytes)
+    clothes = build_clothes_create(semantics, filename)
+    await remember_processed_image(fingerprint, clothes)
+    return clothes, False
+
+
+async def segment_image(raw_bytes: bytes, wait_timeout: Optional[float] = None) -> bytes:
+    """
+    根据配置使用 remove.bg API 或本地 rembg 去除背景。
+    wait_timeout 为本地抠图排队等待空位的时限（默认 SEGMENT_WAIT_SECONDS）。
+    """
+    config = load_config()
+
+    if config.bg_removal_method == "removebg" and config.removebg_api_key:
+        # 使用 remove.bg API
+        try:
+            return await remove_background_api(raw_bytes, config.removebg_api_key)
+        except ValueError as e:
+            # 如果 remove.bg 失败，回退到本地处理
+            print(f"⚠️ remove.bg API 失败，回退到本地处理: {e}")
+
+    # 使用本地 rembg
+    return await remove_background_async(raw_bytes, wait_timeout=wait_timeout)
+
+
+async def segment_image_when_available(raw_bytes: bytes) -> bytes:
+    """后台/批量场景下，抠图执行器繁忙时按先后顺序排队等待（最长 SEGMENT_BUSY_MAX_WAIT_SECONDS），而不是直接失败。"""
+    return await segment_image(raw_bytes, wait_timeout=SEGMENT_BUSY_MAX_WAIT_SECONDS)
+
+
+async def analyze_image(processed_bytes: bytes) -> ClothesSemantics:
+    """使用 OpenAI 兼容 API 进行语义分析。"""
+    return await analyze_clothes_openai(processed_bytes)
+
+
+def _write_file(filepath: Path, data: bytes) -> None:
+    with open(filepath, "wb") as f:
+        f.write(data)
+
+
+async def save_processed_image(processed_bytes: bytes) -> str:
+    """保存去背景后的图片并生成缩略图等变体，返回文件名。"""
+    filename = f"{uuid.uuid4()}.png"
+    await asyncio.to_thread(_write_file, UPLOAD_DIR / filename, processed_bytes)
+    await generate_image_variants_async(UPLOAD_DIR / filename)
+    return filename
+
+
+def build_clothes_create(semantics: ClothesSemantics, filename: str) -> ClothesCreate:
+    normalized_category = resolve_category_value(
+        semantics.category,
+        semantics.item,
+        semantics.description,
+    )
+    if normalized_category not in ALLOWED_CATEGORIES:
+        normalized_category = "accessory"
+
+    return ClothesCreate(
+        category=normalized_category,
+        item=semantics.item,
+        style_semantics=semantics.style_semantics,
+        season_semantics=semantics.season_semantics,
+        usage_semantics=semantics.usage_semantics,
+        color_semantics=semantics.color_semantics,
+        description=semantics.description,
+        image_filename=filename
+    )
+
+
+def _describe_error(error: Exception) -> str:
+    if isinstance(error, ValueError):
+        return f"图片分析失败: {str(error)}"
+    return f"服务器错误: {str(error)}"
+
+
+async def run_upload_batch(
+    images: list[tuple[str, Optional[str], bytes]],
+    segment_concurrency: int = UPLOAD_BATCH_SEGMENT_CONCURRENCY,
+    analyze_concurrency: int = UPLOAD_BATCH_ANALYZE_CONCURRENCY,
+) -> BatchUploadResponse:
+    """
+    批量处理图片 (文件名, content_type, 原始字节)。
+    每张图片依次经过去背景与语义分析，两个阶段分别限流，
+    因此第 N+1 张的去背景与第 N 张的 LLM 分析可以重叠执行；
+    全部成功的条目最后在一个事务中入库。
+    """
+    segment_semaphore = asyncio.Semaphore(max(segment_concurrency, 1))
+    analyze_semaphore = asyncio.Semaphore(max(analyze_concurrency, 1))
+
+    reused_indexes: set[int] = set()
+
+    async def process(index: int, content_type: Optional[str], raw_bytes: bytes) -> ClothesCreate:
+        if not content_type or not content_type.startswith("image/"):
+            raise ValueError("只支持图片文件")
+        fingerprint = await fingerprint_image(raw_bytes)
+        duplicate = await find_processed_duplicate(fingerprint)
+        if duplicate is not None:
+            reused_indexes.add(index)
+            return duplicate
+        async with segment_semaphore:
+            processed_bytes = await segment_image_when_available(raw_bytes)
+        async with analyze_semaphore:
+            semantics = await analyze_image(processed_bytes)
+        filename = await save_processed_image(processed_bytes)
+        clothes = build_clothes_create(semantics, filename)
+        await remember_processed_image(fingerprint, clothes)
+        return clothes
+
+    outcomes = await asyncio.gather(
+        *[process(index, content_type, raw_bytes) for index, (_, content_type, raw_bytes) in enumerate(images)],
+        return_exceptions=True,
+    )
+
+    results = [
+        BatchUploadItemResult(index=index, filename=images[index][0], status="failed")
+        for index in range(len(images))
+    ]
+    ready = [(index, outcome) for index, outcome in enumerate(outcomes) if isinstance(outcome, ClothesCreate)]
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, Exception):
+                raise outcome
+            results[index].error = _describe_error(outcome)
+
+    if ready:
+        try:
+            clothes_ids = await add_clothes_many([clothes for _, clothes in ready])
+            saved = await get_clothes_by_ids(clothes_ids)
+        except Exception as e:
+            for index, _ in ready:
+                results[index].error = f"保存失败: {str(e)}"
+        else:
+            for (index, _), clothes_id in zip(ready, clothes_ids):
+                results[index].status = "succeeded"
+                results[index].clothes = saved.get(clothes_id)
+                results[index].reused = index in reused_indexes
+
+    succeeded = sum(1 for result in results if result.status == "succeeded")
+    return BatchUploadResponse(items=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+async def find_near_duplicate_pairs(max_distance: int = IMAGE_NEAR_DUPLICATE_DISTANCE) -> list[NearDuplicatePair]:
+    """
+    找出原始图片完全相同或 dHash 汉明距离不超过 max_distance 的衣物对。
+    duplicate_of 为较早入库的那件。
+    """
+    rows = await list_clothes_image_hashes()
+    pairs: list[NearDuplicatePair] = []
+    for later_index in range(1, len(rows)):
+        later = rows[later_index]
+        for earlier in rows[:later_index]:
+            exact = later["sha256"] == earlier["sha256"]
+            if exact:
+                distance = 0
+            elif later["dhash"] and earlier["dhash"]:
+                distance = hamming_distance(later["dhash"], earlier["dhash"])
+            else:
+                continue
+            if exact or distance <= max_distance:
+                pairs.append(
+                    NearDuplicatePair(
+                        clothes_id=later["clothes_id"],
+                        duplicate_of=earlier["clothes_id"],
+                        distance=distance,
+                        exact=exact,
+                    )
+                )
+    return pairs
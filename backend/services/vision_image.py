@@ -0,0 +1,155 @@
+"""
+视觉模型图片预处理
+rembg 输出的是全分辨率 RGBA PNG，直接 base64 发送体积大、上传慢、token 多。
+发送前按透明通道裁剪、缩放长边，并在纯色底上压缩为 JPEG / WebP。
+"""
+import asyncio
+import io
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from PIL import Image, ImageColor, ImageOps, features
+
+from domain.config import VisionImageSettings
+
+MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+_VISION_IMAGE_STATS: dict[str, Any] = {
+    "processed": 0,
+    "failed": 0,
+    "input_bytes": 0,
+    "output_bytes": 0,
+    "total_ms": 0.0,
+    "last": None,
+}
+
+
+@dataclass(frozen=True)
+class PreparedVisionImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    input_bytes: int
+    elapsed_ms: float
+
+    @property
+    def data_url_prefix(self) -> str:
+        return f"data:{self.mime_type};base64,"
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def _crop_to_alpha(image: Image.Image, padding: int) -> Image.Image:
+    bbox = image.getchannel("A").getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(left - padding, 0),
+        max(top - padding, 0),
+        min(right + padding, image.width),
+        min(bottom + padding, image.height),
+    ))
+
+
+def prepare_vision_image(image_bytes: bytes, settings: VisionImageSettings) -> PreparedVisionImage:
+    """同步执行预处理（CPU 密集，调用方应放到线程中执行）。"""
+    started = time.perf_counter()
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    if _has_alpha(image):
+        image = image.convert("RGBA")
+        if settings.crop_to_alpha:
+            image = _crop_to_alpha(image, settings.padding)
+
+    if max(image.size) > settings.max_edge:
+        image.thumbnail((settings.max_edge, settings.max_edge), Image.LANCZOS)
+
+    output_format = settings.format
+    if output_format == "webp" and not features.check("webp"):
+        output_format = "jpeg"
+
+    if output_format == "png":
+        encoded = io.BytesIO()
+        image.save(encoded, format="PNG", optimize=True)
+    else:
+        # JPEG / WebP：透明区域铺底色后编码
+        background = Image.new("RGB", image.size, ImageColor.getrgb(settings.background))
+        if image.mode == "RGBA":
+            background.paste(image, mask=image.getchannel("A"))
+        else:
+            background.paste(image.convert("RGB"))
+        image = background
+        encoded = io.BytesIO()
+        if output_format == "webp":
+            image.save(encoded, format="WEBP", quality=settings.quality, method=4)
+        else:
+            image.save(encoded, format="JPEG", quality=settings.quality, optimize=True)
+
+    return PreparedVisionImage(
+        data=encoded.getvalue(),
+        mime_type=MIME_TYPES[output_format],
+        width=image.width,
+        height=image.height,
+        input_bytes=len(image_bytes),
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def _passthrough(image_bytes: bytes) -> PreparedVisionImage:
+    return PreparedVisionImage(
+        data=image_bytes,
+        mime_type="image/png",
+        width=0,
+        height=0,
+        input_bytes=len(image_bytes),
+        elapsed_ms=0.0,
+    )
+
+
+async def prepare_vision_image_async(image_bytes: bytes, settings: VisionImageSettings) -> PreparedVisionImage:
+    """在线程中预处理图片并记录体积 / 耗时指标；失败时原样发送。"""
+    if not settings.enabled:
+        return _passthrough(image_bytes)
+
+    try:
+        prepared = await asyncio.to_thread(prepare_vision_image, image_bytes, settings)
+    except Exception as e:
+        _VISION_IMAGE_STATS["failed"] += 1
+        print(f"⚠️  视觉图片预处理失败，使用原图: {e}")
+        return _passthrough(image_bytes)
+
+    _VISION_IMAGE_STATS["processed"] += 1
+    _VISION_IMAGE_STATS["input_bytes"] += prepared.input_bytes
+    _VISION_IMAGE_STATS["output_bytes"] += len(prepared.data)
+    _VISION_IMAGE_STATS["total_ms"] += prepared.elapsed_ms
+    _VISION_IMAGE_STATS["last"] = {
+        "input_bytes": prepared.input_bytes,
+        "output_bytes": len(prepared.data),
+        "width": prepared.width,
+        "height": prepared.height,
+        "mime_type": prepared.mime_type,
+        "elapsed_ms": round(prepared.elapsed_ms, 2),
+    }
+    print(
+        f"🖼️  视觉图片预处理: {prepared.input_bytes / 1024:.0f}KB -> {len(prepared.data) / 1024:.0f}KB "
+        f"({prepared.width}x{prepared.height}, {prepared.elapsed_ms:.0f}ms)"
+    )
+    return prepared
+
+
+def get_vision_image_stats() -> dict[str, Any]:
+    processed = _VISION_IMAGE_STATS["processed"]
+    input_bytes = _VISION_IMAGE_STATS["input_bytes"]
+    return {
+        **_VISION_IMAGE_STATS,
+        "total_ms": round(_VISION_IMAGE_STATS["total_ms"], 2),
+        "avg_ms": round(_VISION_IMAGE_STATS["total_ms"] / processed, 2) if processed else 0.0,
+        "compression_ratio": round(_VISION_IMAGE_STATS["output_bytes"] / input_bytes, 4) if input_bytes else None,
+    }
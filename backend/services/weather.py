@@ -2,14 +2,27 @@
 天气服务 - Open-Meteo 免费全球天气接口（无需 API Key）
 文档: https://open-meteo.com/
 """
+import asyncio
+import os
 import re
-from datetime import datetime
-from typing import Optional, List
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional, List
 
 import httpx
 from pydantic import BaseModel
 
-from storage.db import get_weather_cache, get_latest_weather_cache, upsert_weather_cache, cleanup_weather_cache
+from storage.db import (
+    get_weather_cache,
+    get_latest_weather_cache,
+    upsert_weather_cache,
+    cleanup_weather_cache,
+    get_geocode_cache,
+    upsert_geocode_cache,
+)
+from services.http_client import http_client
+from services.singleflight import get_singleflight
 
 
 class CityInfo(BaseModel):
@@ -50,6 +63,16 @@ class WeatherResponse(BaseModel):
     now: WeatherNow
 
 
+class WeatherCacheInfo(BaseModel):
+    """
+    天气缓存命中情况：hit 当前时间桶命中 / stale 先返回旧数据并后台刷新 / miss 同步请求上游并写入当前时间桶 /
+    fallback 上游失败，返回最近一条旧缓存 / mock 上游失败且无缓存，返回模拟数据
+    """
+    status: str
+    age: int = 0  # 数据写入缓存后经过的秒数
+    bucket_start: Optional[str] = None  # 返回数据所在的时间桶；mock 时为空
+
+
 class WeatherInfo(BaseModel):
     """简化的天气信息（用于应用）"""
     temperature: float
@@ -94,6 +117,96 @@ TRADITIONAL_TO_SIMPLIFIED_MAP = str.maketrans({
 })
 NOMINATIM_USER_AGENT = "AIWardrobe/1.0 (city-search)"
 DEFAULT_LOCATION_QUERY = "上海, 上海市, 中国"
+# 地名 -> 坐标几乎不变，缓存较长时间
+GEOCODE_CACHE_TTL_SECONDS = int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# 多源地理编码并发查询的整体时限（秒）
+GEOCODING_DEADLINE_SECONDS = float(os.getenv("GEOCODING_DEADLINE_SECONDS", "8"))
+# 单个地理编码源连续失败达到阈值后熔断，冷却期内直接跳过
+GEOCODING_BREAKER_THRESHOLD = int(os.getenv("GEOCODING_BREAKER_THRESHOLD", "3"))
+GEOCODING_BREAKER_COOLDOWN_SECONDS = float(os.getenv("GEOCODING_BREAKER_COOLDOWN_SECONDS", "60"))
+OPEN_METEO_GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+
+
+class ProviderCircuitBreaker:
+    """
+    简单熔断器：连续失败 threshold 次后打开，冷却 cooldown 秒后放行一次试探请求，
+    试探成功则恢复，失败则重新计时。
+    """
+
+    def __init__(self, name: str, threshold: int, cooldown: float):
+        self.name = name
+        self.threshold = max(threshold, 1)
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.skipped = 0
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.cooldown:
+            # 半开：放行本次请求，其余请求等待试探结果
+            self.opened_at = now
+            return True
+        self.skipped += 1
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.threshold:
+            if self.opened_at is None:
+                print(f"⚠️  地理编码源 {self.name} 连续失败 {self.consecutive_failures} 次，暂时熔断")
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "open": self.opened_at is not None,
+            "consecutive_failures": self.consecutive_failures,
+            "skipped": self.skipped,
+        }
+
+
+GEOCODING_BREAKERS: dict[str, ProviderCircuitBreaker] = {
+    provider: ProviderCircuitBreaker(provider, GEOCODING_BREAKER_THRESHOLD, GEOCODING_BREAKER_COOLDOWN_SECONDS)
+    for provider in ("open_meteo", "nominatim")
+}
+
+
+# 缓存未命中时的并发去重：地理编码按归一化查询、天气按 (地点, 时间桶)
+_geocode_flight = get_singleflight("geocoding")
+_weather_flight = get_singleflight("weather")
+
+# 最近请求过的地点（原始输入 -> 最近请求时间），供后台预热使用
+WEATHER_RECENT_LOCATIONS_LIMIT = max(int(os.getenv("WEATHER_RECENT_LOCATIONS_LIMIT", "16")), 0)
+_RECENT_LOCATIONS: "OrderedDict[str, float]" = OrderedDict()
+
+# stale-while-revalidate：当前时间桶未命中时，最近一条缓存在该秒数内就先返回并后台刷新（0 关闭）
+WEATHER_STALE_MAX_SECONDS = max(int(os.getenv("WEATHER_STALE_MAX_SECONDS", "7200")), 0)
+# 后台刷新失败后，同一地点至少间隔该秒数再重试
+WEATHER_REVALIDATE_RETRY_SECONDS = max(float(os.getenv("WEATHER_REVALIDATE_RETRY_SECONDS", "60")), 0.0)
+_REVALIDATE_TASKS: set[asyncio.Task] = set()
+_REVALIDATE_FAILED_AT: dict[str, float] = {}
+_WEATHER_CACHE_STATS = {
+    "hit": 0, "stale": 0, "miss": 0, "fallback": 0, "mock": 0, "revalidated": 0, "revalidate_failed": 0,
+}
+
+
+def get_geocoding_breaker_stats() -> dict[str, Any]:
+    return {provider: breaker.stats() for provider, breaker in GEOCODING_BREAKERS.items()}
+
+
+def get_weather_cache_stats() -> dict[str, Any]:
+    return {
+        "stale_max_seconds": WEATHER_STALE_MAX_SECONDS,
+        "revalidating": len(_REVALIDATE_TASKS),
+        **_WEATHER_CACHE_STATS,
+    }
 
 
 def build_weather_cache_bucket(now: Optional[datetime] = None) -> str:
@@ -101,10 +214,30 @@ def build_weather_cache_bucket(now: Optional[datetime] = None) -> str:
     return ts.strftime("%Y-%m-%dT%H")
 
 
+def remember_location(location: str) -> None:
+    key = (location or "").strip()
+    if not key or WEATHER_RECENT_LOCATIONS_LIMIT <= 0:
+        return
+    _RECENT_LOCATIONS.pop(key, None)
+    _RECENT_LOCATIONS[key] = time.time()
+    while len(_RECENT_LOCATIONS) > WEATHER_RECENT_LOCATIONS_LIMIT:
+        _RECENT_LOCATIONS.popitem(last=False)
+
+
+def get_recent_locations(max_age_seconds: float) -> List[str]:
+    """最近 max_age_seconds 内请求过的地点，最近的在前。"""
+    cutoff = time.time() - max_age_seconds
+    return [location for location, seen_at in reversed(_RECENT_LOCATIONS.items()) if seen_at >= cutoff]
+
+
 def build_weather_cache_key(resolved_location: str) -> str:
     return (resolved_location or "").strip().lower()
 
 
+def build_geocode_cache_key(location: str) -> str:
+    return normalize_location_query(location)
+
+
 def normalize_location_query(query: str) -> str:
     """归一化地区输入，提升匹配率。"""
     normalized = (query or "").strip().lower()
@@ -462,20 +595,163 @@ def _city_from_nominatim_row(row: dict) -> Optional[tuple[CityInfo, int]]:
     return city, rank_bonus
 
 
-async def search_city(query: str, limit: int = 10) -> List[CityInfo]:
+# 单条结果可能的最高分：city_match_score 上限 + 各来源排序加分上限（见上方两个解析函数）
+CITY_MATCH_MAX_SCORE = 100 + 20 + 10 + 5
+GEOCODING_MAX_RANK_BONUS = {"open_meteo": 30 + 12, "nominatim": 70 + 18 + 4}
+
+
+def _top_result_is_settled(
+    results: list[Optional[list[tuple[CityInfo, int, int]]]],
+    pending_providers: list[str],
+) -> bool:
+    """
+    已返回结果的首位是否已确定：分数唯一最高，且严格高于任何进行中请求可能给出的分数。
+    满足时放弃其余请求，首位结果与等待全部请求后的排序一致。
+    """
+    ranked_cities: dict[str, tuple[CityInfo, int]] = {}
+    for scored_cities in results:
+        for city, base_score, rank_bonus in scored_cities or []:
+            _merge_ranked_city(ranked_cities, city, base_score + rank_bonus)
+    scores = sorted((score for _, score in ranked_cities.values()), reverse=True)
+    if not scores or (len(scores) > 1 and scores[1] == scores[0]):
+        return False
+    return all(
+        scores[0] > CITY_MATCH_MAX_SCORE + GEOCODING_MAX_RANK_BONUS[provider]
+        for provider in pending_providers
+    )
+
+
+def _score_geocoding_payload(provider: str, payload: Any, query: str) -> list[tuple[CityInfo, int, int]]:
+    if provider == "open_meteo":
+        rows = payload.get("results", []) if isinstance(payload, dict) else []
+        parse_row = _city_from_open_meteo_row
+    else:
+        rows = payload if isinstance(payload, list) else []
+        parse_row = _city_from_nominatim_row
+
+    scored: list[tuple[CityInfo, int, int]] = []
+    for row in rows:
+        city_with_bonus = parse_row(row)
+        if not city_with_bonus:
+            continue
+        city, rank_bonus = city_with_bonus
+        base_score = city_match_score(city, query)
+        if base_score <= 0:
+            continue
+        scored.append((city, base_score, rank_bonus))
+    return scored
+
+
+async def _fetch_geocoding_payload(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict[str, Any],
+    timeout: float,
+) -> Any:
+    response = await client.get(
+        url,
+        params=params,
+        headers={"User-Agent": NOMINATIM_USER_AGENT},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def _run_geocoding_jobs(
+    client: httpx.AsyncClient,
+    jobs: list[tuple[str, str, dict[str, Any]]],
+    query: str,
+    stop_on_exact_match: bool,
+) -> tuple[list[Optional[list[tuple[CityInfo, int, int]]]], bool]:
+    """
+    并发执行地理编码请求，整体不超过 GEOCODING_DEADLINE_SECONDS。
+    返回与 jobs 顺序对应的评分结果（失败/超时/被跳过为 None）以及是否有请求失败。
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + GEOCODING_DEADLINE_SECONDS
+    request_timeout = min(10.0, GEOCODING_DEADLINE_SECONDS)
+    results: list[Optional[list[tuple[CityInfo, int, int]]]] = [None] * len(jobs)
+    failed = False
+
+    tasks: dict[asyncio.Task, int] = {}
+    for index, (provider, url, params) in enumerate(jobs):
+        if not GEOCODING_BREAKERS[provider].allow():
+            failed = True
+            continue
+        task = asyncio.create_task(_fetch_geocoding_payload(client, url, params, request_timeout))
+        tasks[task] = index
+
+    pending = set(tasks)
+    exact_match_found = False
+    settled = False
+    try:
+        while pending and not settled:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks[task]
+                provider = jobs[index][0]
+                if task.exception() is not None:
+                    failed = True
+                    GEOCODING_BREAKERS[provider].record_failure()
+                    continue
+                GEOCODING_BREAKERS[provider].record_success()
+                scored = _score_geocoding_payload(provider, task.result(), query)
+                results[index] = scored
+                if any(base_score >= 100 for _, base_score, _ in scored):
+                    exact_match_found = True
+            # 完全匹配只说明找到了候选；进行中的请求加上排序加分仍可能排在它前面
+            if stop_on_exact_match and exact_match_found and pending:
+                settled = _top_result_is_settled(results, [jobs[tasks[task]][0] for task in pending])
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if pending and not settled:
+        # 超过整体时限仍未返回，按失败计入熔断器
+        failed = True
+        for task in pending:
+            GEOCODING_BREAKERS[jobs[tasks[task]][0]].record_failure()
+
+    return results, failed
+
+
+async def search_city(query: str, limit: int = 10, stop_on_exact_match: bool = False) -> List[CityInfo]:
     """
     搜索城市（支持模糊查询）
     综合 Open-Meteo 与 Nominatim 地理编码结果，失败时回退到内置城市列表。
+
+    stop_on_exact_match 为 True 时，已有结果与查询完全匹配（city_match_score >= 100）、
+    且其余请求不可能再产生更高分的结果时停止等待，只用已返回的结果排序；
+    首个结果与等待全部请求时一致，其后的顺序不保证，适用于只需要首个结果的场景。
+    """
+    cities, _ = await search_city_with_source(query, limit, stop_on_exact_match)
+    return cities
+
+
+async def search_city_with_source(
+    query: str,
+    limit: int = 10,
+    stop_on_exact_match: bool = False,
+) -> tuple[List[CityInfo], bool]:
+    """
+    同 search_city，额外返回结果是否来自内置城市模糊匹配兜底。
+    兜底结果只是子串猜测，调用方不应将其当作真实的地理编码结果长期缓存。
     """
     normalized_query = normalize_location_query(query)
     if not normalized_query:
-        return []
+        return [], False
 
     # 兼容老版 LocationID 输入
     if is_location_id(query):
         legacy_city = LEGACY_CITY_BY_ID.get(query.strip())
         if legacy_city:
-            return [_city_from_common(legacy_city)]
+            return [_city_from_common(legacy_city)], False
 
     # 坐标输入直接返回一个虚拟城市项，便于前端复用现有流程
     parsed_coordinate = parse_coordinate_location(query)
@@ -491,86 +767,64 @@ async def search_city(query: str, limit: int = 10) -> List[CityInfo]:
                 lat=f"{latitude}",
                 lon=f"{longitude}",
             )
-        ]
+        ], False
 
-    # 多源 Geocoding（Open-Meteo + Nominatim）
+    # 多源 Geocoding（Open-Meteo + Nominatim），各查询变体并发请求
     geocoding_failed = False
     ranked_cities: dict[str, tuple[CityInfo, int]] = {}
     geocoding_queries = build_geocoding_queries(query)
     geocoding_language = detect_geocoding_language(query)
-    try:
-        async with httpx.AsyncClient(
-            headers={"User-Agent": NOMINATIM_USER_AGENT}
-        ) as client:
-            for geocoding_query in geocoding_queries:
-                try:
-                    response = await client.get(
-                        "https://geocoding-api.open-meteo.com/v1/search",
-                        params={
-                            "name": geocoding_query,
-                            "count": min(max(limit, 1), 20),
-                            "language": geocoding_language,
-                            "format": "json",
-                        },
-                        timeout=10.0,
-                    )
-                    response.raise_for_status()
-                    payload = response.json()
-                except Exception:
-                    geocoding_failed = True
-                    continue
-
-                for row in payload.get("results", []):
-                    city_with_bonus = _city_from_open_meteo_row(row)
-                    if not city_with_bonus:
-                        continue
-                    city, rank_bonus = city_with_bonus
-                    base_score = city_match_score(city, query)
-                    if base_score <= 0:
-                        continue
-                    _merge_ranked_city(ranked_cities, city, base_score + rank_bonus)
-
-            # Nominatim 更擅长多语种地名与别名检索，补充覆盖
-            nominatim_limit = min(max(limit * 2, 10), 20)
-            for nominatim_query in geocoding_queries[:2]:
-                try:
-                    response = await client.get(
-                        "https://nominatim.openstreetmap.org/search",
-                        params={
-                            "q": nominatim_query,
-                            "format": "jsonv2",
-                            "accept-language": geocoding_language,
-                            "addressdetails": 1,
-                            "limit": nominatim_limit,
-                        },
-                        timeout=10.0,
-                    )
-                    response.raise_for_status()
-                    payload = response.json()
-                except Exception:
-                    geocoding_failed = True
-                    continue
+    # Nominatim 更擅长多语种地名与别名检索，补充覆盖
+    nominatim_limit = min(max(limit * 2, 10), 20)
+    jobs: list[tuple[str, str, dict[str, Any]]] = [
+        (
+            "open_meteo",
+            OPEN_METEO_GEOCODING_URL,
+            {
+                "name": geocoding_query,
+                "count": min(max(limit, 1), 20),
+                "language": geocoding_language,
+                "format": "json",
+            },
+        )
+        for geocoding_query in geocoding_queries
+    ] + [
+        (
+            "nominatim",
+            NOMINATIM_SEARCH_URL,
+            {
+                "q": nominatim_query,
+                "format": "jsonv2",
+                "accept-language": geocoding_language,
+                "addressdetails": 1,
+                "limit": nominatim_limit,
+            },
+        )
+        for nominatim_query in geocoding_queries[:2]
+    ]
 
-                for row in payload:
-                    city_with_bonus = _city_from_nominatim_row(row)
-                    if not city_with_bonus:
-                        continue
-                    city, rank_bonus = city_with_bonus
-                    base_score = city_match_score(city, query)
-                    if base_score <= 0:
-                        continue
-                    _merge_ranked_city(ranked_cities, city, base_score + rank_bonus)
+    try:
+        async with http_client("geocoding") as client:
+            job_results, geocoding_failed = await _run_geocoding_jobs(
+                client, jobs, query, stop_on_exact_match
+            )
     except Exception as e:
+        job_results = []
         geocoding_failed = True
         print(f"⚠️  Geocoding 查询失败，使用内置城市兜底: {e}")
 
+    # 按原有的串行顺序合并，保证同分时的排序与逐个请求时一致
+    for scored_cities in job_results:
+        for city, base_score, rank_bonus in scored_cities or []:
+            _merge_ranked_city(ranked_cities, city, base_score + rank_bonus)
+
     if ranked_cities:
         ranked_results = sorted(
             ranked_cities.values(),
             key=lambda item: item[1],
             reverse=True,
         )
-        return [city for city, _ in ranked_results[:limit]]
+        return [city for city, _ in ranked_results[:limit]], False
     if geocoding_failed:
         print("⚠️  Geocoding 查询不可用，使用内置城市兜底")
 
@@ -593,7 +847,7 @@ async def search_city(query: str, limit: int = 10) -> List[CityInfo]:
             matched_cities.append(_city_from_common(city_data))
 
     matched_cities.sort(key=lambda city: city_match_score(city, query), reverse=True)
-    return matched_cities[:limit]
+    return matched_cities[:limit], True
 
 
 async def resolve_location(location: str) -> tuple[str, str]:
@@ -625,10 +879,28 @@ async def resolve_location(location: str) -> tuple[str, str]:
         latitude, longitude = parsed_coordinate
         return format_coordinate_id(latitude, longitude), raw_location
 
-    cities = await search_city(raw_location, limit=1)
+    # 文本地点先查地理编码缓存，命中时无需任何网络请求
+    geocode_key = build_geocode_cache_key(raw_location)
+    cached = await get_geocode_cache(geocode_key, GEOCODE_CACHE_TTL_SECONDS)
+    if cached:
+        return cached["resolved_location"], cached["display_name"]
+
+    return await _geocode_flight.do(geocode_key, lambda: _geocode_and_cache(raw_location, geocode_key))
+
+
+async def _geocode_and_cache(raw_location: str, geocode_key: str) -> tuple[str, str]:
+    cities, from_fallback = await search_city_with_source(raw_location, limit=1, stop_on_exact_match=True)
     if cities:
         city = cities[0]
-        return city.id, format_city_display_name(city)
+        resolved = (city.id, format_city_display_name(city))
+        # 内置城市兜底只是模糊猜测，不写入长期缓存，地理编码恢复后重新解析
+        if from_fallback:
+            return resolved
+        try:
+            await upsert_geocode_cache(geocode_key, *resolved)
+        except Exception as e:
+            print(f"⚠️  写入地理编码缓存失败: {e}")
+        return resolved
 
     return raw_location, raw_location
 
@@ -689,7 +961,7 @@ async def _fetch_open_meteo_now(latitude: float, longitude: float) -> Optional[W
     }
 
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_client("weather") as client:
             response = await client.get(
                 "https://api.open-meteo.com/v1/forecast",
                 params=params,
@@ -770,30 +1042,136 @@ async def get_weather(location: str = DEFAULT_LOCATION_QUERY) -> Optional[Weathe
     Returns:
         WeatherInfo 或 None
     """
+    weather, _ = await get_weather_with_meta(location)
+    return weather
+
+
+def _weather_from_cache(cached: Optional[dict[str, Any]]) -> Optional[WeatherInfo]:
+    payload = (cached or {}).get("payload") or {}
+    if not payload:
+        return None
+    try:
+        return WeatherInfo(**payload)
+    except Exception:
+        return None
+
+
+def _cache_age_seconds(cached: dict[str, Any]) -> int:
+    """SQLite CURRENT_TIMESTAMP 为 UTC 的 "YYYY-MM-DD HH:MM:SS"。"""
+    try:
+        written_at = datetime.strptime(cached.get("updated_at") or "", "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return 0
+    return max(int((datetime.now(timezone.utc).replace(tzinfo=None) - written_at).total_seconds()), 0)
+
+
+async def get_weather_with_meta(location: str = DEFAULT_LOCATION_QUERY) -> tuple[Optional[WeatherInfo], WeatherCacheInfo]:
+    """
+    获取天气信息及缓存命中情况。
+    当前时间桶未命中但最近一条缓存仍在 WEATHER_STALE_MAX_SECONDS 内时，立即返回旧数据并在后台刷新当前时间桶，
+    整点切换不会让用户请求等待上游。
+    """
     resolved_location, display_location = await resolve_location(location)
+    remember_location(location)
     cache_key = build_weather_cache_key(resolved_location)
     bucket_start = build_weather_cache_bucket()
 
     cached = await get_weather_cache(cache_key, bucket_start)
-    if cached:
-        payload = cached.get("payload") or {}
-        if payload:
-            try:
-                return WeatherInfo(**payload)
-            except Exception:
-                pass
+    weather = _weather_from_cache(cached)
+    if weather:
+        _WEATHER_CACHE_STATS["hit"] += 1
+        return weather, WeatherCacheInfo(status="hit", age=_cache_age_seconds(cached), bucket_start=bucket_start)
+
+    if WEATHER_STALE_MAX_SECONDS > 0:
+        latest = await get_latest_weather_cache(cache_key)
+        stale = _weather_from_cache(latest)
+        if stale and _cache_age_seconds(latest) <= WEATHER_STALE_MAX_SECONDS:
+            _WEATHER_CACHE_STATS["stale"] += 1
+            _schedule_revalidate(resolved_location, display_location, cache_key, bucket_start)
+            return stale, WeatherCacheInfo(
+                status="stale", age=_cache_age_seconds(latest), bucket_start=latest["bucket_start"]
+            )
 
+    # 同一地点同一时间桶的并发未命中只请求一次上游
+    weather, cache_info = await _weather_flight.do(
+        (cache_key, bucket_start),
+        lambda: _fetch_and_cache_weather(resolved_location, display_location, cache_key, bucket_start),
+    )
+    _WEATHER_CACHE_STATS[cache_info.status] += 1
+    return weather, cache_info
+
+
+def _schedule_revalidate(resolved_location: str, display_location: str, cache_key: str, bucket_start: str) -> None:
+    failed_at = _REVALIDATE_FAILED_AT.get(cache_key)
+    if failed_at is not None and time.monotonic() - failed_at < WEATHER_REVALIDATE_RETRY_SECONDS:
+        return
+    task = asyncio.ensure_future(_revalidate_weather(resolved_location, display_location, cache_key, bucket_start))
+    _REVALIDATE_TASKS.add(task)
+    task.add_done_callback(_REVALIDATE_TASKS.discard)
+
+
+async def stop_weather_revalidation() -> None:
+    """应用关闭时取消后台刷新任务及其上游请求，保证它们在 HTTP 客户端与数据库连接池关闭前结束。"""
+    tasks = list(_REVALIDATE_TASKS)
+    _REVALIDATE_TASKS.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await _weather_flight.cancel_all()
+
+
+async def _revalidate_weather(resolved_location: str, display_location: str, cache_key: str, bucket_start: str) -> None:
+    try:
+        refreshed = await _refresh_weather_bucket(resolved_location, display_location, cache_key, bucket_start)
+    except Exception as e:
+        print(f"⚠️  后台刷新天气缓存失败: {e}")
+        refreshed = False
+    if refreshed:
+        _WEATHER_CACHE_STATS["revalidated"] += 1
+        _REVALIDATE_FAILED_AT.pop(cache_key, None)
+    else:
+        _WEATHER_CACHE_STATS["revalidate_failed"] += 1
+        _REVALIDATE_FAILED_AT[cache_key] = time.monotonic()
+
+
+async def _refresh_weather_bucket(resolved_location: str, display_location: str, cache_key: str, bucket_start: str) -> bool:
+    """请求上游并写入指定时间桶，返回是否写入成功（上游失败时不会写入兜底数据）。"""
+    # 与用户请求共用同一 single-flight key，刷新进行中到达的未命中请求直接等待结果
+    _, cache_info = await _weather_flight.do(
+        (cache_key, bucket_start),
+        lambda: _fetch_and_cache_weather(resolved_location, display_location, cache_key, bucket_start),
+    )
+    return cache_info.status == "miss"
+
+
+async def prewarm_weather(location: str, bucket_start: str) -> Optional[bool]:
+    """
+    提前为指定时间桶写入天气缓存（供后台预热调用，不计入最近请求地点）。
+    返回 True 表示已写入，None 表示该时间桶已有缓存，False 表示上游不可用。
+    """
+    resolved_location, display_location = await resolve_location(location)
+    cache_key = build_weather_cache_key(resolved_location)
+    if await get_weather_cache(cache_key, bucket_start):
+        return None
+    return await _refresh_weather_bucket(resolved_location, display_location, cache_key, bucket_start)
+
+
+async def _fetch_and_cache_weather(
+    resolved_location: str,
+    display_location: str,
+    cache_key: str,
+    bucket_start: str,
+) -> tuple[WeatherInfo, WeatherCacheInfo]:
+    """请求上游并写入指定时间桶（status=miss）；上游失败时返回最近的旧缓存（fallback）或模拟数据（mock），均不写入。"""
     weather_response = await get_qweather_now(resolved_location)
 
     if not weather_response:
-        stale_cached = await get_latest_weather_cache(cache_key)
-        if stale_cached:
-            stale_payload = stale_cached.get("payload") or {}
-            if stale_payload:
-                try:
-                    return WeatherInfo(**stale_payload)
-                except Exception:
-                    pass
+        latest = await get_latest_weather_cache(cache_key)
+        stale = _weather_from_cache(latest)
+        if stale:
+            return stale, WeatherCacheInfo(
+                status="fallback", age=_cache_age_seconds(latest), bucket_start=latest["bucket_start"]
+            )
 
         print("⚠️  使用模拟天气数据")
         return WeatherInfo(
@@ -806,7 +1184,7 @@ async def get_weather(location: str = DEFAULT_LOCATION_QUERY) -> Optional[Weathe
             windScale="2",
             location=display_location,
             obsTime="2026-01-01T12:00",
-        )
+        ), WeatherCacheInfo(status="mock")
 
     now = weather_response.now
     weather_info = WeatherInfo(
@@ -824,7 +1202,7 @@ async def get_weather(location: str = DEFAULT_LOCATION_QUERY) -> Optional[Weathe
     await upsert_weather_cache(cache_key, bucket_start, weather_info.model_dump())
     await cleanup_weather_cache(max_rows=1200)
 
-    return weather_info
+    return weather_info, WeatherCacheInfo(status="miss", bucket_start=bucket_start)
 
 
 def get_season_from_weather(weather: WeatherInfo) -> list[str]:
@@ -4,7 +4,7 @@
 import json
 from pathlib import Path
 from typing import Optional
-from domain.config import LLMConfig, RecommendationModeWeights
+from domain.config import LLMConfig, RecommendationModeWeights, VisionImageSettings
 from services.weather import validate_location_input, DEFAULT_LOCATION_QUERY
 
 CONFIG_FILE = Path(__file__).parent / "llm_config.json"
@@ -68,6 +68,8 @@ def update_config(
     weather_location: Optional[str] = None,
     zodiac_sign: Optional[str] = None,
     recommendation_mode_weights: Optional[RecommendationModeWeights] = None,
+    vision_image: Optional[VisionImageSettings] = None,
+    vision_image_overrides: Optional[dict[str, VisionImageSettings]] = None,
 ) -> LLMConfig:
     """更新配置"""
     config = load_config()
@@ -100,6 +102,14 @@ def update_config(
         config.zodiac_sign = zodiac_sign.strip().lower()
     if recommendation_mode_weights is not None:
         config.recommendation_mode_weights = recommendation_mode_weights
+    if vision_image is not None:
+        config.vision_image = vision_image
+    if vision_image_overrides is not None:
+        config.vision_image_overrides = {
+            model_id.strip(): settings
+            for model_id, settings in vision_image_overrides.items()
+            if model_id.strip()
+        }
 
     save_config(config)
     return config
@@ -137,4 +147,9 @@ def get_masked_config() -> dict:
         "weather_location": weather_location,
         "zodiac_sign": config.zodiac_sign,
         "recommendation_mode_weights": config.recommendation_mode_weights.model_dump(),
+        "vision_image": config.vision_image.model_dump(),
+        "vision_image_overrides": {
+            model_id: settings.model_dump()
+            for model_id, settings in config.vision_image_overrides.items()
+        },
     }
@@ -1,20 +1,37 @@
 """
 数据库连接和 CRUD 操作
 """
+import asyncio
 import aiosqlite
+import base64
 import json
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, Iterable, List, Optional
 from datetime import datetime
-from domain.clothes import ClothesItem, ClothesCreate
+from domain.clothes import ClothesItem, ClothesCreate, resolve_category_value
+from domain.tags import TAG_KIND_COLOR, TAG_KIND_SEASON, TAG_KIND_USAGE, build_clothes_tags
+from domain.image_variants import build_image_variants
 from storage.models import (
     CLOTHES_TABLE_SQL,
     CLOTHES_INDEX_SQL,
+    CLOTHES_LIST_INDEX_SQL,
+    CLOTHES_CATEGORY_LIST_INDEX_SQL,
+    CLOTHES_TAGS_TABLE_SQL,
+    CLOTHES_TAGS_INDEX_SQL,
     HOROSCOPE_RECORDS_TABLE_SQL,
     HOROSCOPE_RECORDS_INDEX_SQL,
     WEATHER_CACHE_TABLE_SQL,
     WEATHER_CACHE_INDEX_SQL,
     WEATHER_CACHE_UPDATED_AT_INDEX_SQL,
+    GEOCODE_CACHE_TABLE_SQL,
+    LLM_TEXT_CACHE_TABLE_SQL,
+    LLM_TEXT_CACHE_INDEX_SQL,
+    JOBS_TABLE_SQL,
+    JOBS_STATUS_INDEX_SQL,
+    IMAGE_HASHES_TABLE_SQL,
+    IMAGE_HASHES_INDEX_SQL,
 )
 
 # 数据库文件路径
@@ -22,6 +39,212 @@ from storage.models import (
 import os
 _default_path = Path(__file__).parent.parent / "wardrobe.db"
 DB_PATH = Path(os.getenv("DB_FILE_PATH", _default_path))
+# 只读连接池大小（写入始终串行使用单独的一条连接）
+DB_POOL_READERS = max(int(os.getenv("DB_POOL_READERS", "4")), 1)
+
+# 持久化档位：journal_mode + synchronous
+#   wal      - WAL + NORMAL（默认，读写互不阻塞，断电最多丢失最后一个事务）
+#   wal_full - WAL + FULL（每次提交都 fsync）
+#   legacy   - DELETE + FULL（SQLite 默认的回滚日志）
+DURABILITY_PROFILES = {
+    "wal": {"journal_mode": "WAL", "synchronous": "NORMAL"},
+    "wal_full": {"journal_mode": "WAL", "synchronous": "FULL"},
+    "legacy": {"journal_mode": "DELETE", "synchronous": "FULL"},
+}
+DB_DURABILITY = os.getenv("DB_DURABILITY", "wal").strip().lower()
+if DB_DURABILITY not in DURABILITY_PROFILES:
+    DB_DURABILITY = "wal"
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_JOURNAL_SIZE_LIMIT = int(os.getenv("DB_JOURNAL_SIZE_LIMIT", str(64 * 1024 * 1024)))
+# WAL checkpoint 间隔（秒）；每 DB_OPTIMIZE_EVERY 次 checkpoint 执行一次 PRAGMA optimize
+DB_CHECKPOINT_INTERVAL = float(os.getenv("DB_CHECKPOINT_INTERVAL", "300"))
+DB_OPTIMIZE_EVERY = max(int(os.getenv("DB_OPTIMIZE_EVERY", "12")), 1)
+
+
+def _durability_profile() -> dict[str, str]:
+    return DURABILITY_PROFILES.get(DB_DURABILITY, DURABILITY_PROFILES["wal"])
+
+
+async def _configure_connection(conn: aiosqlite.Connection) -> None:
+    """设置连接级 PRAGMA（journal_mode 为库级持久设置，在 init_db 中完成）。"""
+    conn.row_factory = aiosqlite.Row
+    await conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    await conn.execute(f"PRAGMA synchronous = {_durability_profile()['synchronous']}")
+    await conn.execute(f"PRAGMA cache_size = {-DB_CACHE_SIZE_KB}")
+    await conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    await conn.execute("PRAGMA temp_store = MEMORY")
+
+
+class ConnectionPool:
+    """
+    长连接池：N 条复用的只读连接 + 1 条串行化的写连接。
+    每条 aiosqlite 连接都会占用一个后台线程与文件句柄，复用后不再按请求创建。
+    """
+
+    def __init__(self, db_path: Path, readers: int = DB_POOL_READERS):
+        self.db_path = Path(db_path)
+        self.reader_count = max(readers, 1)
+        self._readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._all_readers: list[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._closed = True
+        self._stats = {
+            "connections_opened": 0,
+            "reader_acquires": 0,
+            "reader_waits": 0,
+            "writer_acquires": 0,
+            "writer_waits": 0,
+        }
+
+    @property
+    def is_open(self) -> bool:
+        return not self._closed
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        await _configure_connection(conn)
+        self._stats["connections_opened"] += 1
+        return conn
+
+    async def open(self) -> None:
+        if self.is_open:
+            return
+        self._writer = await self._connect()
+        for _ in range(self.reader_count):
+            conn = await self._connect()
+            self._all_readers.append(conn)
+            self._readers.put_nowait(conn)
+        self._closed = False
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        async with self._write_lock:
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+        for conn in self._all_readers:
+            await conn.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """借出一条只读连接，用完归还。"""
+        self._stats["reader_acquires"] += 1
+        if self._readers.empty():
+            self._stats["reader_waits"] += 1
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """独占写连接；正常退出时提交，异常时回滚。"""
+        self._stats["writer_acquires"] += 1
+        if self._write_lock.locked():
+            self._stats["writer_waits"] += 1
+        async with self._write_lock:
+            conn = self._writer
+            if conn is None:
+                raise RuntimeError("数据库连接池已关闭")
+            try:
+                yield conn
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "db_path": str(self.db_path),
+            "open": self.is_open,
+            "readers": self.reader_count,
+            "readers_idle": self._readers.qsize(),
+            "writer_busy": self._write_lock.locked(),
+            **self._stats,
+        }
+
+
+_POOL: Optional[ConnectionPool] = None
+# 未启用连接池（脚本/测试）或库路径已切换时，退化为一次性连接
+_EPHEMERAL_CONNECTIONS = 0
+
+
+async def open_pool(readers: int = DB_POOL_READERS) -> ConnectionPool:
+    """创建并打开全局连接池（在应用 lifespan 启动时调用）。"""
+    global _POOL
+    if _POOL is not None and _POOL.is_open and _POOL.db_path == DB_PATH:
+        return _POOL
+    await close_pool()
+    pool = ConnectionPool(DB_PATH, readers=readers)
+    await pool.open()
+    _POOL = pool
+    return pool
+
+
+async def close_pool() -> None:
+    """关闭全局连接池（在应用 lifespan 结束时调用）。"""
+    global _POOL
+    pool, _POOL = _POOL, None
+    if pool is not None:
+        await pool.close()
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """连接池统计，用于确认按请求建连的开销已消失。"""
+    pool = _active_pool()
+    return {
+        "pooled": pool is not None,
+        "ephemeral_connections": _EPHEMERAL_CONNECTIONS,
+        "pool": pool.stats() if pool is not None else None,
+    }
+
+
+def _active_pool() -> Optional[ConnectionPool]:
+    if _POOL is not None and _POOL.is_open and _POOL.db_path == DB_PATH:
+        return _POOL
+    return None
+
+
+@asynccontextmanager
+async def _ephemeral_connection() -> AsyncIterator[aiosqlite.Connection]:
+    global _EPHEMERAL_CONNECTIONS
+    _EPHEMERAL_CONNECTIONS += 1
+    async with aiosqlite.connect(DB_PATH) as db:
+        await _configure_connection(db)
+        yield db
+
+
+@asynccontextmanager
+async def read_connection() -> AsyncIterator[aiosqlite.Connection]:
+    """获取只读连接。"""
+    pool = _active_pool()
+    if pool is None:
+        async with _ephemeral_connection() as db:
+            yield db
+        return
+    async with pool.reader() as db:
+        yield db
+
+
+@asynccontextmanager
+async def write_connection() -> AsyncIterator[aiosqlite.Connection]:
+    """获取串行化的写连接，退出时自动提交。"""
+    pool = _active_pool()
+    if pool is None:
+        async with _ephemeral_connection() as db:
+            yield db
+            await db.commit()
+        return
+    async with pool.writer() as db:
+        yield db
 
 
 async def init_db():
@@ -30,15 +253,232 @@ async def init_db():
     if not DB_PATH.parent.exists():
         DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
+        profile = _durability_profile()
+        await db.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        await db.execute(f"PRAGMA journal_size_limit = {DB_JOURNAL_SIZE_LIMIT}")
         await db.execute(CLOTHES_TABLE_SQL)
-        await db.execute(CLOTHES_INDEX_SQL)
+        await db.execute(CLOTHES_TAGS_TABLE_SQL)
         await db.execute(HOROSCOPE_RECORDS_TABLE_SQL)
-        await db.execute(HOROSCOPE_RECORDS_INDEX_SQL)
         await db.execute(WEATHER_CACHE_TABLE_SQL)
+        await db.execute(GEOCODE_CACHE_TABLE_SQL)
+        await db.execute(LLM_TEXT_CACHE_TABLE_SQL)
+        await db.execute(JOBS_TABLE_SQL)
+        await db.execute(IMAGE_HASHES_TABLE_SQL)
+        # 迁移可能新增列，索引在迁移之后创建
+        await _run_migrations(db)
+        await db.execute(CLOTHES_INDEX_SQL)
+        await db.execute(CLOTHES_LIST_INDEX_SQL)
+        await db.execute(CLOTHES_CATEGORY_LIST_INDEX_SQL)
+        await db.execute(CLOTHES_TAGS_INDEX_SQL)
+        await db.execute(HOROSCOPE_RECORDS_INDEX_SQL)
         await db.execute(WEATHER_CACHE_INDEX_SQL)
         await db.execute(WEATHER_CACHE_UPDATED_AT_INDEX_SQL)
-        await db.commit()
+        await db.execute(JOBS_STATUS_INDEX_SQL)
+        await db.execute(IMAGE_HASHES_INDEX_SQL)
+        await db.execute(LLM_TEXT_CACHE_INDEX_SQL)
+    # 迁移可能改写了衣物数据
+    bump_wardrobe_version()
+
+
+async def _migrate_backfill_clothes_tags(db: aiosqlite.Connection) -> None:
+    """为已有衣物回填 clothes_tags。"""
+    cursor = await db.execute(
+        "SELECT id, season_semantics, usage_semantics, color_semantics FROM clothes"
+    )
+    for row in await cursor.fetchall():
+        await _write_clothes_tags(
+            db,
+            int(row["id"]),
+            json.loads(row["season_semantics"] or "[]"),
+            json.loads(row["usage_semantics"] or "[]"),
+            row["color_semantics"] or "",
+        )
+
+
+async def _migrate_canonical_category(db: aiosqlite.Connection) -> None:
+    """新增 canonical_category 列并为已有衣物计算归一化类别。"""
+    cursor = await db.execute("PRAGMA table_info(clothes)")
+    columns = {row["name"] for row in await cursor.fetchall()}
+    if "canonical_category" not in columns:
+        await db.execute("ALTER TABLE clothes ADD COLUMN canonical_category TEXT")
+    # 旧版按原始 category 建的列表索引由 canonical_category 索引取代
+    await db.execute("DROP INDEX IF EXISTS idx_clothes_category_list")
+
+    cursor = await db.execute("SELECT id, category, item, description FROM clothes")
+    updates = [
+        (
+            resolve_category_value(row["category"] or "", row["item"] or "", row["description"] or ""),
+            int(row["id"]),
+        )
+        for row in await cursor.fetchall()
+    ]
+    if updates:
+        await db.executemany(
+            "UPDATE clothes SET canonical_category = ? WHERE id = ?",
+            updates,
+        )
+
+
+async def _migrate_category_list_covering_index(db: aiosqlite.Connection) -> None:
+    """旧版类别列表索引缺少 category 列，默认投影需要回表；删除后由 init_db 按新定义重建。"""
+    await db.execute("DROP INDEX IF EXISTS idx_clothes_canonical_category_list")
+
+
+# 一次性数据迁移，按顺序执行；已执行的版本记录在 PRAGMA user_version
+MIGRATIONS = [
+    _migrate_backfill_clothes_tags,
+    _migrate_canonical_category,
+    _migrate_category_list_covering_index,
+]
+
+
+async def _run_migrations(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA user_version")
+    row = await cursor.fetchone()
+    current_version = int(row[0]) if row else 0
+
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current_version:
+            continue
+        await migration(db)
+        await db.execute(f"PRAGMA user_version = {version}")
+        print(f"✅ 数据库迁移 #{version} 完成: {migration.__name__}")
+
+
+async def _write_clothes_tags(
+    db: aiosqlite.Connection,
+    clothes_id: int,
+    season_semantics: list[str],
+    usage_semantics: list[str],
+    color_semantics: str,
+) -> None:
+    """重建单件衣物的规范化标签（需在写事务内调用）。"""
+    await db.execute("DELETE FROM clothes_tags WHERE clothes_id = ?", (clothes_id,))
+    tags = build_clothes_tags(season_semantics, usage_semantics, color_semantics)
+    if tags:
+        await db.executemany(
+            "INSERT INTO clothes_tags (clothes_id, kind, canonical_value) VALUES (?, ?, ?)",
+            [(clothes_id, kind, value) for kind, value in sorted(tags)],
+        )
+
+
+# 衣柜数据版本号：每次衣物写入提交后递增，用于快照失效与 HTTP ETag。
+# 以启动时的毫秒时间戳为起点，进程重启后不会与之前发出的版本号重复。
+_WARDROBE_VERSION = int(time.time() * 1000)
+
+
+def get_wardrobe_version() -> int:
+    return _WARDROBE_VERSION
+
+
+def bump_wardrobe_version() -> int:
+    global _WARDROBE_VERSION
+    _WARDROBE_VERSION += 1
+    return _WARDROBE_VERSION
+
+
+_MAINTENANCE_TASK: Optional[asyncio.Task] = None
+_MAINTENANCE_STATS: dict[str, Any] = {
+    "checkpoints": 0,
+    "optimizes": 0,
+    "last_checkpoint": None,
+    "last_error": None,
+}
+
+
+async def run_db_maintenance() -> dict[str, Any]:
+    """执行一次 WAL checkpoint（PASSIVE，不阻塞读写），按频率附带 PRAGMA optimize。"""
+    async with write_connection() as db:
+        cursor = await db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        row = await cursor.fetchone()
+        _MAINTENANCE_STATS["checkpoints"] += 1
+        _MAINTENANCE_STATS["last_checkpoint"] = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "busy": row[0] if row else None,
+            "wal_frames": row[1] if row else None,
+            "checkpointed_frames": row[2] if row else None,
+        }
+        if _MAINTENANCE_STATS["checkpoints"] % DB_OPTIMIZE_EVERY == 0:
+            await db.execute("PRAGMA optimize")
+            _MAINTENANCE_STATS["optimizes"] += 1
+    return dict(_MAINTENANCE_STATS)
+
+
+async def _maintenance_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_db_maintenance()
+            _MAINTENANCE_STATS["last_error"] = None
+        except Exception as exc:
+            _MAINTENANCE_STATS["last_error"] = str(exc)
+            print(f"⚠️  数据库维护失败: {exc}")
+
+
+def start_db_maintenance(interval: float = DB_CHECKPOINT_INTERVAL) -> None:
+    """启动后台 checkpoint/optimize 任务（在应用 lifespan 中调用）。"""
+    global _MAINTENANCE_TASK
+    if interval <= 0 or (_MAINTENANCE_TASK is not None and not _MAINTENANCE_TASK.done()):
+        return
+    _MAINTENANCE_TASK = asyncio.create_task(_maintenance_loop(interval))
+
+
+async def stop_db_maintenance() -> None:
+    global _MAINTENANCE_TASK
+    task, _MAINTENANCE_TASK = _MAINTENANCE_TASK, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def get_db_maintenance_stats() -> dict[str, Any]:
+    return {
+        "durability": DB_DURABILITY,
+        "running": _MAINTENANCE_TASK is not None and not _MAINTENANCE_TASK.done(),
+        "interval_seconds": DB_CHECKPOINT_INTERVAL,
+        **_MAINTENANCE_STATS,
+    }
+
+
+def _canonical_category(clothes: ClothesCreate) -> str:
+    """写入时计算一次归一化类别，读路径直接信任存储值。"""
+    return resolve_category_value(clothes.category, clothes.item, clothes.description)
+
+
+async def _insert_clothes(db: aiosqlite.Connection, clothes: ClothesCreate) -> int:
+    """在当前事务中插入衣物及其标签，返回新 ID。"""
+    cursor = await db.execute(
+        """
+        INSERT INTO clothes (
+            category, canonical_category, item, style_semantics, season_semantics,
+            usage_semantics, color_semantics, description, image_filename
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            clothes.category,
+            _canonical_category(clothes),
+            clothes.item,
+            json.dumps(clothes.style_semantics),
+            json.dumps(clothes.season_semantics),
+            json.dumps(clothes.usage_semantics),
+            clothes.color_semantics,
+            clothes.description,
+            clothes.image_filename
+        )
+    )
+    await _write_clothes_tags(
+        db,
+        cursor.lastrowid,
+        clothes.season_semantics,
+        clothes.usage_semantics,
+        clothes.color_semantics,
+    )
+    return cursor.lastrowid
 
 
 async def add_clothes(clothes: ClothesCreate) -> int:
@@ -48,33 +488,31 @@ async def add_clothes(clothes: ClothesCreate) -> int:
     Returns:
         新创建的衣物 ID
     """
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            """
-            INSERT INTO clothes (
-                category, item, style_semantics, season_semantics,
-                usage_semantics, color_semantics, description, image_filename
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                clothes.category,
-                clothes.item,
-                json.dumps(clothes.style_semantics),
-                json.dumps(clothes.season_semantics),
-                json.dumps(clothes.usage_semantics),
-                clothes.color_semantics,
-                clothes.description,
-                clothes.image_filename
-            )
-        )
-        await db.commit()
-        return cursor.lastrowid
+    async with write_connection() as db:
+        clothes_id = await _insert_clothes(db, clothes)
+    # 提交之后再递增版本，避免快照以新版本号缓存旧数据
+    bump_wardrobe_version()
+    return clothes_id
+
+
+async def add_clothes_many(clothes_list: list[ClothesCreate]) -> list[int]:
+    """
+    在同一事务中批量添加衣物，任一条失败则整体回滚
+    
+    Returns:
+        与输入顺序一致的新衣物 ID 列表
+    """
+    if not clothes_list:
+        return []
+    async with write_connection() as db:
+        clothes_ids = [await _insert_clothes(db, clothes) for clothes in clothes_list]
+    bump_wardrobe_version()
+    return clothes_ids
 
 
 async def get_all_clothes() -> List[ClothesItem]:
     """获取所有衣物"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_connection() as db:
         cursor = await db.execute(
             "SELECT * FROM clothes ORDER BY created_at DESC"
         )
@@ -83,12 +521,167 @@ async def get_all_clothes() -> List[ClothesItem]:
         return [_row_to_clothes_item(row) for row in rows]
 
 
+# 列表接口可投影的字段 -> 对应的数据库列
+CLOTHES_PROJECTABLE_FIELDS = {
+    "id": "id",
+    "category": "category",
+    "canonical_category": "canonical_category",
+    "item": "item",
+    "style_semantics": "style_semantics",
+    "season_semantics": "season_semantics",
+    "usage_semantics": "usage_semantics",
+    "color_semantics": "color_semantics",
+    "description": "description",
+    "image_url": "image_filename",
+    "image_variants": "image_filename",
+    "created_at": "created_at",
+}
+# 默认字段恰好被 idx_clothes_list（全部）与 idx_clothes_canonical_category_list（按类别）覆盖
+CLOTHES_LIST_DEFAULT_FIELDS = ("id", "category", "item", "color_semantics", "image_url", "created_at")
+_JSON_ARRAY_FIELDS = {"style_semantics", "season_semantics", "usage_semantics"}
+
+
+def encode_clothes_cursor(created_at: str, clothes_id: int) -> str:
+    """将 (created_at, id) 编码为不透明的翻页游标。"""
+    raw = json.dumps([created_at, clothes_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_clothes_cursor(cursor: str) -> tuple[str, int]:
+    """解析翻页游标，格式非法时抛出 ValueError。"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, clothes_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(created_at), int(clothes_id)
+    except Exception as exc:
+        raise ValueError("无效的翻页游标") from exc
+
+
+def build_clothes_page_query(
+    requested: list[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+) -> tuple[str, list[Any]]:
+    """生成 list_clothes_page 的查询语句与参数（多取一行用于判断是否还有下一页）。"""
+    # 游标字段始终读取，用于生成下一页游标
+    columns = list(dict.fromkeys(
+        ["id", "created_at"] + [CLOTHES_PROJECTABLE_FIELDS[name] for name in requested]
+    ))
+
+    conditions: list[str] = []
+    params: list[Any] = []
+    if category:
+        conditions.append("canonical_category = ?")
+        params.append(category)
+    if cursor:
+        cursor_created_at, cursor_id = decode_clothes_cursor(cursor)
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend([cursor_created_at, cursor_id])
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    params.append(limit + 1)
+    sql = f"""
+            SELECT {', '.join(columns)} FROM clothes
+            {where_sql}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """
+    return sql, params
+
+
+async def list_clothes_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+    category: Optional[str] = None,
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """
+    按 (created_at, id) 倒序做 keyset 分页，只读取并解码请求的字段。
+
+    Returns:
+        (当前页条目, 下一页游标；没有更多数据时为 None)
+    """
+    requested = list(dict.fromkeys(fields or CLOTHES_LIST_DEFAULT_FIELDS))
+    unknown = [name for name in requested if name not in CLOTHES_PROJECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+
+    sql, params = build_clothes_page_query(requested, limit, cursor, category)
+    async with read_connection() as db:
+        cursor_obj = await db.execute(sql, params)
+        rows = await cursor_obj.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [_row_to_projection(row, requested) for row in rows]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_clothes_cursor(last["created_at"], int(last["id"]))
+    return items, next_cursor
+
+
+async def count_clothes_by_category() -> dict[str, int]:
+    """按归一化类别统计数量（只扫描 canonical_category 索引，不读取行数据）。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            """
+            SELECT canonical_category, COUNT(*) AS total FROM clothes
+            GROUP BY canonical_category
+            """
+        )
+        rows = await cursor.fetchall()
+    return {row["canonical_category"] or "": int(row["total"]) for row in rows}
+
+
+async def find_clothes_by_tags(
+    category: Optional[str] = None,
+    seasons: Optional[Iterable[str]] = None,
+    usages: Optional[Iterable[str]] = None,
+    colors: Optional[Iterable[str]] = None,
+) -> List[ClothesItem]:
+    """
+    按规范化标签筛选衣物，单条 SQL 完成（走 idx_clothes_tags_kind_value）。
+    同一维度内多个取值为"或"，不同维度之间为"且"，
+    例如 category=top, seasons={秋, 冬}, usages={commute}。
+    """
+    conditions: list[str] = []
+    params: list[Any] = []
+    if category:
+        conditions.append("canonical_category = ?")
+        params.append(category)
+
+    for kind, values in (
+        (TAG_KIND_SEASON, seasons),
+        (TAG_KIND_USAGE, usages),
+        (TAG_KIND_COLOR, colors),
+    ):
+        value_list = sorted(set(values or []))
+        if not value_list:
+            continue
+        placeholders = ", ".join("?" for _ in value_list)
+        conditions.append(
+            f"id IN (SELECT clothes_id FROM clothes_tags WHERE kind = ? AND canonical_value IN ({placeholders}))"
+        )
+        params.append(kind)
+        params.extend(value_list)
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            f"SELECT * FROM clothes {where_sql} ORDER BY created_at DESC, id DESC",
+            params,
+        )
+        rows = await cursor.fetchall()
+    return [_row_to_clothes_item(row) for row in rows]
+
+
 async def get_clothes_by_category(category: str) -> List[ClothesItem]:
     """按类别获取衣物"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_connection() as db:
         cursor = await db.execute(
-            "SELECT * FROM clothes WHERE category = ? ORDER BY created_at DESC",
+            "SELECT * FROM clothes WHERE canonical_category = ? ORDER BY created_at DESC",
             (category,)
         )
         rows = await cursor.fetchall()
@@ -96,10 +689,23 @@ async def get_clothes_by_category(category: str) -> List[ClothesItem]:
         return [_row_to_clothes_item(row) for row in rows]
 
 
+async def get_clothes_by_ids(clothes_ids: list[int]) -> dict[int, ClothesItem]:
+    """按 ID 批量获取衣物"""
+    if not clothes_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in clothes_ids)
+    async with read_connection() as db:
+        cursor = await db.execute(
+            f"SELECT * FROM clothes WHERE id IN ({placeholders})",
+            tuple(clothes_ids),
+        )
+        rows = await cursor.fetchall()
+    return {int(row["id"]): _row_to_clothes_item(row) for row in rows}
+
+
 async def get_clothes_by_id(clothes_id: int) -> Optional[ClothesItem]:
     """按 ID 获取衣物"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_connection() as db:
         cursor = await db.execute(
             "SELECT * FROM clothes WHERE id = ?",
             (clothes_id,)
@@ -113,28 +719,32 @@ async def get_clothes_by_id(clothes_id: int) -> Optional[ClothesItem]:
 
 async def delete_clothes(clothes_id: int) -> bool:
     """删除衣物"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         cursor = await db.execute(
             "DELETE FROM clothes WHERE id = ?",
             (clothes_id,)
         )
-        await db.commit()
-        return cursor.rowcount > 0
+        await db.execute("DELETE FROM clothes_tags WHERE clothes_id = ?", (clothes_id,))
+        deleted = cursor.rowcount > 0
+    if deleted:
+        bump_wardrobe_version()
+    return deleted
 
 
 async def update_clothes(clothes_id: int, clothes: ClothesCreate) -> bool:
     """更新衣物信息"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         cursor = await db.execute(
             """
             UPDATE clothes 
-            SET category = ?, item = ?, style_semantics = ?, 
+            SET category = ?, canonical_category = ?, item = ?, style_semantics = ?, 
                 season_semantics = ?, usage_semantics = ?, 
                 color_semantics = ?, description = ?
             WHERE id = ?
             """,
             (
                 clothes.category,
+                _canonical_category(clothes),
                 clothes.item,
                 json.dumps(clothes.style_semantics),
                 json.dumps(clothes.season_semantics),
@@ -144,14 +754,22 @@ async def update_clothes(clothes_id: int, clothes: ClothesCreate) -> bool:
                 clothes_id
             )
         )
-        await db.commit()
-        return cursor.rowcount > 0
+        if cursor.rowcount == 0:
+            return False
+        await _write_clothes_tags(
+            db,
+            clothes_id,
+            clothes.season_semantics,
+            clothes.usage_semantics,
+            clothes.color_semantics,
+        )
+    bump_wardrobe_version()
+    return True
 
 
 async def get_horoscope_record(record_date: str, zodiac_sign: str) -> Optional[dict[str, Any]]:
     """按日期和星座获取缓存的运势记录。"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_connection() as db:
         cursor = await db.execute(
             """
             SELECT * FROM horoscope_records
@@ -166,6 +784,27 @@ async def get_horoscope_record(record_date: str, zodiac_sign: str) -> Optional[d
         return _row_to_horoscope_record(row)
 
 
+async def get_horoscope_record_version(record_date: str, zodiac_sign: str) -> Optional[dict[str, Any]]:
+    """只读取运势记录的版本信息（id / 推理状态 / 更新时间），用于 HTTP 条件请求。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            """
+            SELECT id, llm_status, updated_at FROM horoscope_records
+            WHERE record_date = ? AND zodiac_sign = ?
+            LIMIT 1
+            """,
+            (record_date, zodiac_sign),
+        )
+        row = await cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "id": int(row["id"]),
+            "llm_status": row["llm_status"] or "pending",
+            "updated_at": row["updated_at"],
+        }
+
+
 async def upsert_horoscope_source(
     record_date: str,
     zodiac_sign: str,
@@ -179,8 +818,7 @@ async def upsert_horoscope_source(
     """
     payload_json = json.dumps(source_payload, ensure_ascii=False)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with write_connection() as db:
         cursor = await db.execute(
             """
             SELECT id FROM horoscope_records
@@ -203,7 +841,6 @@ async def upsert_horoscope_source(
                 """,
                 (zodiac_name, source_provider, payload_json, existing["id"]),
             )
-            await db.commit()
             return int(existing["id"])
 
         cursor = await db.execute(
@@ -214,7 +851,6 @@ async def upsert_horoscope_source(
             """,
             (record_date, zodiac_sign, zodiac_name, source_provider, payload_json),
         )
-        await db.commit()
         return int(cursor.lastrowid)
 
 
@@ -225,7 +861,7 @@ async def update_horoscope_inference(
     llm_error: Optional[str] = None,
 ) -> None:
     """更新运势推理状态与结果。"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         await db.execute(
             """
             UPDATE horoscope_records
@@ -237,13 +873,11 @@ async def update_horoscope_inference(
             """,
             (llm_status, llm_reasoning, llm_error, record_id),
         )
-        await db.commit()
 
 
 async def get_weather_cache(location_key: str, bucket_start: str) -> Optional[dict[str, Any]]:
     """按地点+时间桶获取天气缓存。"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_connection() as db:
         cursor = await db.execute(
             """
             SELECT * FROM weather_cache
@@ -260,8 +894,7 @@ async def get_weather_cache(location_key: str, bucket_start: str) -> Optional[di
 
 async def get_latest_weather_cache(location_key: str) -> Optional[dict[str, Any]]:
     """按地点获取最新一条天气缓存。"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with read_connection() as db:
         cursor = await db.execute(
             """
             SELECT * FROM weather_cache
@@ -285,8 +918,7 @@ async def upsert_weather_cache(
     """写入或更新天气缓存。"""
     payload_json = json.dumps(payload, ensure_ascii=False)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with write_connection() as db:
         cursor = await db.execute(
             """
             SELECT id FROM weather_cache
@@ -307,7 +939,6 @@ async def upsert_weather_cache(
                 """,
                 (payload_json, existing["id"]),
             )
-            await db.commit()
             return int(existing["id"])
 
         cursor = await db.execute(
@@ -317,13 +948,12 @@ async def upsert_weather_cache(
             """,
             (location_key, bucket_start, payload_json),
         )
-        await db.commit()
         return int(cursor.lastrowid)
 
 
 async def cleanup_weather_cache(max_rows: int = 1000) -> None:
     """限制天气缓存表大小，保留最新记录。"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         await db.execute(
             """
             DELETE FROM weather_cache
@@ -335,7 +965,239 @@ async def cleanup_weather_cache(max_rows: int = 1000) -> None:
             """,
             (max_rows,),
         )
-        await db.commit()
+
+
+async def get_geocode_cache(query_key: str, max_age_seconds: int) -> Optional[dict[str, Any]]:
+    """获取未过期的地理编码缓存。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            """
+            SELECT resolved_location, display_name, updated_at FROM geocode_cache
+            WHERE query_key = ? AND updated_at >= datetime('now', ?)
+            LIMIT 1
+            """,
+            (query_key, f"-{int(max_age_seconds)} seconds"),
+        )
+        row = await cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "resolved_location": row["resolved_location"],
+            "display_name": row["display_name"],
+            "updated_at": row["updated_at"],
+        }
+
+
+async def upsert_geocode_cache(query_key: str, resolved_location: str, display_name: str) -> None:
+    """写入或刷新地理编码缓存。"""
+    async with write_connection() as db:
+        await db.execute(
+            """
+            INSERT INTO geocode_cache (query_key, resolved_location, display_name)
+            VALUES (?, ?, ?)
+            ON CONFLICT(query_key) DO UPDATE SET
+                resolved_location = excluded.resolved_location,
+                display_name = excluded.display_name,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (query_key, resolved_location, display_name),
+        )
+
+
+async def get_llm_text_cache(cache_key: str, max_age_seconds: int) -> Optional[str]:
+    """获取未过期的 LLM 文案缓存。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            """
+            SELECT text FROM llm_text_cache
+            WHERE cache_key = ? AND created_at >= datetime('now', ?)
+            LIMIT 1
+            """,
+            (cache_key, f"-{int(max_age_seconds)} seconds"),
+        )
+        row = await cursor.fetchone()
+        return row["text"] if row else None
+
+
+async def upsert_llm_text_cache(cache_key: str, model: str, text: str) -> None:
+    """写入或刷新 LLM 文案缓存。"""
+    async with write_connection() as db:
+        await db.execute(
+            """
+            INSERT INTO llm_text_cache (cache_key, model, text)
+            VALUES (?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                model = excluded.model,
+                text = excluded.text,
+                created_at = CURRENT_TIMESTAMP
+            """,
+            (cache_key, model, text),
+        )
+
+
+async def cleanup_llm_text_cache(max_age_seconds: int, max_rows: int) -> int:
+    """删除过期的文案缓存，并只保留最新的 max_rows 条；返回删除的行数。"""
+    async with write_connection() as db:
+        expired = await db.execute(
+            "DELETE FROM llm_text_cache WHERE created_at < datetime('now', ?)",
+            (f"-{int(max_age_seconds)} seconds",),
+        )
+        overflow = await db.execute(
+            """
+            DELETE FROM llm_text_cache
+            WHERE cache_key NOT IN (
+                SELECT cache_key FROM llm_text_cache
+                ORDER BY created_at DESC, rowid DESC
+                LIMIT ?
+            )
+            """,
+            (max_rows,),
+        )
+        return max(expired.rowcount, 0) + max(overflow.rowcount, 0)
+
+
+def _row_to_job(row: aiosqlite.Row) -> dict[str, Any]:
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "stage": row["stage"],
+        "input_path": row["input_path"],
+        "result": json.loads(row["result_json"]) if row["result_json"] else None,
+        "error": row["error"],
+        "attempts": row["attempts"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+async def create_job(job_id: str, kind: str, input_path: str) -> None:
+    """创建排队中的后台任务。"""
+    async with write_connection() as db:
+        await db.execute(
+            "INSERT INTO jobs (id, kind, status, input_path) VALUES (?, ?, 'queued', ?)",
+            (job_id, kind, input_path),
+        )
+
+
+async def get_job(job_id: str) -> Optional[dict[str, Any]]:
+    async with read_connection() as db:
+        cursor = await db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+        return _row_to_job(row) if row else None
+
+
+async def update_job(
+    job_id: str,
+    status: str,
+    stage: Optional[str] = None,
+    error: Optional[str] = None,
+) -> None:
+    async with write_connection() as db:
+        await db.execute(
+            """
+            UPDATE jobs
+            SET status = ?, stage = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (status, stage, error, job_id),
+        )
+
+
+async def requeue_job(job_id: str) -> int:
+    """将任务重置为排队状态并累加尝试次数，返回新的尝试次数。"""
+    async with write_connection() as db:
+        await db.execute(
+            """
+            UPDATE jobs
+            SET status = 'queued', stage = NULL, attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (job_id,),
+        )
+        cursor = await db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+        return int(row["attempts"]) if row else 0
+
+
+async def list_unfinished_jobs(kind: str) -> list[dict[str, Any]]:
+    """按创建顺序列出未完成（排队中/执行中）的任务。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            """
+            SELECT * FROM jobs
+            WHERE kind = ? AND status IN ('queued', 'running')
+            ORDER BY created_at, id
+            """,
+            (kind,),
+        )
+        return [_row_to_job(row) for row in await cursor.fetchall()]
+
+
+async def complete_upload_job(job_id: str, clothes: ClothesCreate) -> int:
+    """在同一事务中写入衣物并将上传任务标记为成功，保证重启后不会重复入库。"""
+    async with write_connection() as db:
+        clothes_id = await _insert_clothes(db, clothes)
+        await db.execute(
+            """
+            UPDATE jobs
+            SET status = 'succeeded', stage = NULL, error = NULL, result_json = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (json.dumps({"clothes_id": clothes_id}), job_id),
+        )
+    bump_wardrobe_version()
+    return clothes_id
+
+
+async def get_image_hash(sha256: str) -> Optional[dict[str, Any]]:
+    """按原始图片哈希获取已处理结果。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            "SELECT sha256, dhash, processed_filename, clothes_json FROM image_hashes WHERE sha256 = ?",
+            (sha256,),
+        )
+        row = await cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "sha256": row["sha256"],
+            "dhash": row["dhash"],
+            "processed_filename": row["processed_filename"],
+            "clothes": ClothesCreate.model_validate_json(row["clothes_json"]),
+        }
+
+
+async def upsert_image_hash(sha256: str, dhash: Optional[str], clothes: ClothesCreate) -> None:
+    async with write_connection() as db:
+        await db.execute(
+            """
+            INSERT INTO image_hashes (sha256, dhash, processed_filename, clothes_json)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(sha256) DO UPDATE SET
+                dhash = excluded.dhash,
+                processed_filename = excluded.processed_filename,
+                clothes_json = excluded.clothes_json
+            """,
+            (sha256, dhash, clothes.image_filename, clothes.model_dump_json()),
+        )
+
+
+async def list_clothes_image_hashes() -> list[dict[str, Any]]:
+    """列出有图片指纹的衣物（按 ID 升序）。"""
+    async with read_connection() as db:
+        cursor = await db.execute(
+            """
+            SELECT c.id AS clothes_id, h.sha256, h.dhash
+            FROM clothes c
+            JOIN image_hashes h ON h.processed_filename = c.image_filename
+            ORDER BY c.id
+            """
+        )
+        return [
+            {"clothes_id": int(row["clothes_id"]), "sha256": row["sha256"], "dhash": row["dhash"]}
+            for row in await cursor.fetchall()
+        ]
 
 
 def _row_to_clothes_item(row: aiosqlite.Row) -> ClothesItem:
@@ -343,6 +1205,7 @@ def _row_to_clothes_item(row: aiosqlite.Row) -> ClothesItem:
     return ClothesItem(
         id=row["id"],
         category=row["category"],
+        canonical_category=row["canonical_category"] or "",
         item=row["item"],
         style_semantics=json.loads(row["style_semantics"] or "[]"),
         season_semantics=json.loads(row["season_semantics"] or "[]"),
@@ -354,6 +1217,27 @@ def _row_to_clothes_item(row: aiosqlite.Row) -> ClothesItem:
     )
 
 
+def _row_to_projection(row: aiosqlite.Row, fields: list[str]) -> dict[str, Any]:
+    """将投影查询的行转换为只含请求字段的字典。"""
+    result: dict[str, Any] = {}
+    for name in fields:
+        value = row[CLOTHES_PROJECTABLE_FIELDS[name]]
+        if name in _JSON_ARRAY_FIELDS:
+            value = json.loads(value or "[]")
+        elif name == "canonical_category":
+            value = value or ""
+        elif name == "image_url":
+            value = f"/uploads/{value}"
+        elif name == "image_variants":
+            value = build_image_variants(value)
+        elif name == "created_at":
+            value = datetime.fromisoformat(value).isoformat() if value else None
+        elif name in ("color_semantics", "description"):
+            value = value or ""
+        result[name] = value
+    return result
+
+
 def _row_to_horoscope_record(row: aiosqlite.Row) -> dict[str, Any]:
     """将数据库行转换为星座记录字典。"""
     return {
@@ -8,6 +8,7 @@ CLOTHES_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS clothes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     category TEXT NOT NULL,  -- top, bottom, shoes, accessory
+    canonical_category TEXT,  -- 写入时由 category/item/description 归一化得到
     item TEXT NOT NULL,
     style_semantics TEXT,  -- JSON array
     season_semantics TEXT,  -- JSON array
@@ -24,6 +25,35 @@ CLOTHES_INDEX_SQL = """
 CREATE INDEX IF NOT EXISTS idx_clothes_category ON clothes(category);
 """
 
+# 衣柜列表分页用覆盖索引：按 (created_at, id) 倒序做 keyset 翻页，
+# 并覆盖列表视图默认字段，避免回表
+CLOTHES_LIST_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_clothes_list
+ON clothes(created_at DESC, id DESC, category, item, color_semantics, image_filename);
+"""
+
+# 按归一化类别翻页用覆盖索引，同样覆盖列表视图默认字段（含原始 category）
+CLOTHES_CATEGORY_LIST_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_clothes_canonical_category_list
+ON clothes(canonical_category, created_at DESC, id DESC, category, item, color_semantics, image_filename);
+"""
+
+# 衣物规范化语义标签（季节 / 使用场景 / 颜色），写入衣物时同步维护
+CLOTHES_TAGS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS clothes_tags (
+    clothes_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,  -- season / usage / color
+    canonical_value TEXT NOT NULL,
+    PRIMARY KEY (clothes_id, kind, canonical_value)
+) WITHOUT ROWID;
+"""
+
+# 按标签反查衣物
+CLOTHES_TAGS_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_clothes_tags_kind_value
+ON clothes_tags(kind, canonical_value, clothes_id);
+"""
+
 # 星座运势缓存表
 HOROSCOPE_RECORDS_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS horoscope_records (
@@ -67,3 +97,63 @@ CREATE INDEX IF NOT EXISTS idx_weather_cache_key_bucket ON weather_cache(locatio
 WEATHER_CACHE_UPDATED_AT_INDEX_SQL = """
 CREATE INDEX IF NOT EXISTS idx_weather_cache_updated_at ON weather_cache(updated_at);
 """
+
+# 地理编码缓存（归一化地点查询 -> 坐标 + 展示名），TTL 较长
+GEOCODE_CACHE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query_key TEXT PRIMARY KEY,
+    resolved_location TEXT NOT NULL,  -- 经度,纬度
+    display_name TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# LLM 推荐文案缓存（规范化的提示词输入 + 模型名 的哈希 -> 文案），按 TTL 与行数淘汰
+LLM_TEXT_CACHE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS llm_text_cache (
+    cache_key TEXT PRIMARY KEY,  -- sha256
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+LLM_TEXT_CACHE_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_llm_text_cache_created_at ON llm_text_cache(created_at);
+"""
+
+# 后台任务表（如异步上传），进程重启后据此恢复未完成的任务
+JOBS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,  -- upload
+    status TEXT NOT NULL,  -- queued / running / succeeded / failed
+    stage TEXT,  -- 当前阶段：segment / analyze / save
+    input_path TEXT,  -- 待处理的原始文件
+    result_json TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+JOBS_STATUS_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_jobs_kind_status ON jobs(kind, status, created_at);
+"""
+
+# 上传图片指纹：原始字节哈希 -> 已处理的图片与语义结果，重复上传时直接复用
+IMAGE_HASHES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS image_hashes (
+    sha256 TEXT PRIMARY KEY,
+    dhash TEXT,  -- 64 位感知哈希（十六进制），用于近似重复检测
+    processed_filename TEXT NOT NULL,
+    clothes_json TEXT NOT NULL,  -- 处理得到的 ClothesCreate
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+IMAGE_HASHES_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_image_hashes_processed_filename ON image_hashes(processed_filename);
+"""
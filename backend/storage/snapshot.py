@@ -0,0 +1,144 @@
+"""
+衣柜内存快照
+衣柜只在上传/编辑/删除时变化，读路径（推荐、衣柜列表）共享一份不可变快照，
+写入提交后版本号递增，下次读取时惰性重建并原子替换。
+"""
+import asyncio
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+import storage.db as db_store
+from domain.clothes import ClothesItem
+from domain.tags import normalize_seasons
+
+SNAPSHOT_CATEGORIES = ("top", "bottom", "shoes", "accessory")
+
+
+@dataclass(frozen=True)
+class WardrobeSnapshot:
+    """
+    某一版本衣柜数据的只读视图。
+    items 与 created_at 倒序一致；item_dicts 为推荐服务使用的字典形式，调用方不得修改。
+    """
+    version: int
+    db_path: str
+    items: tuple[ClothesItem, ...]
+    item_dicts: tuple[dict[str, Any], ...]
+    by_id: Mapping[int, ClothesItem]
+    by_category: Mapping[str, tuple[ClothesItem, ...]]
+    dicts_by_category: Mapping[str, tuple[dict[str, Any], ...]]
+    # (canonical_category, 季节) -> 衣物 id 集合
+    season_buckets: Mapping[tuple[str, str], frozenset[int]]
+    _derived: dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def compatible_dicts(self, category: str, allowed_seasons: Iterable[str]) -> list[dict[str, Any]]:
+        """返回该类别中季节标签与 allowed_seasons 有交集的衣物（保持原顺序）。"""
+        matched_ids: set[int] = set()
+        for season in allowed_seasons:
+            matched_ids |= self.season_buckets.get((category, season), frozenset())
+        if not matched_ids:
+            return []
+        return [item for item in self.dicts_by_category.get(category, ()) if item["id"] in matched_ids]
+
+    def derived(self, key: str, factory: Callable[["WardrobeSnapshot"], Any]) -> Any:
+        """按 key 缓存基于本快照计算出的派生数据，随快照一起失效。"""
+        if key not in self._derived:
+            self._derived[key] = factory(self)
+        return self._derived[key]
+
+
+def _clothes_to_dict(item: ClothesItem) -> dict[str, Any]:
+    return {
+        "id": item.id,
+        "category": item.category,
+        "canonical_category": item.canonical_category,
+        "item": item.item,
+        "style_semantics": item.style_semantics,
+        "season_semantics": item.season_semantics,
+        "usage_semantics": item.usage_semantics,
+        "color_semantics": item.color_semantics,
+        "description": item.description,
+        "image_url": item.image_url,
+        "image_variants": item.image_variants,
+    }
+
+
+def build_snapshot(version: int, db_path: str, items: list[ClothesItem]) -> WardrobeSnapshot:
+    item_dicts = tuple(_clothes_to_dict(item) for item in items)
+
+    by_category: dict[str, list[ClothesItem]] = {category: [] for category in SNAPSHOT_CATEGORIES}
+    dicts_by_category: dict[str, list[dict[str, Any]]] = {category: [] for category in SNAPSHOT_CATEGORIES}
+    season_buckets: dict[tuple[str, str], set[int]] = {}
+    for item, item_dict in zip(items, item_dicts):
+        category = item.canonical_category
+        by_category.setdefault(category, []).append(item)
+        dicts_by_category.setdefault(category, []).append(item_dict)
+        for season in normalize_seasons(item.season_semantics):
+            season_buckets.setdefault((category, season), set()).add(item.id)
+
+    return WardrobeSnapshot(
+        version=version,
+        db_path=db_path,
+        items=tuple(items),
+        item_dicts=item_dicts,
+        by_id=MappingProxyType({item.id: item for item in items}),
+        by_category=MappingProxyType({key: tuple(value) for key, value in by_category.items()}),
+        dicts_by_category=MappingProxyType({key: tuple(value) for key, value in dicts_by_category.items()}),
+        season_buckets=MappingProxyType({key: frozenset(value) for key, value in season_buckets.items()}),
+    )
+
+
+_SNAPSHOT: Optional[WardrobeSnapshot] = None
+# 正在构建中的快照任务：(事件循环, 版本号, 库路径, 任务)，避免并发请求重复加载
+_BUILDING: Optional[tuple[asyncio.AbstractEventLoop, int, str, asyncio.Task]] = None
+
+
+async def _load_snapshot(version: int, db_path: str) -> WardrobeSnapshot:
+    global _SNAPSHOT
+    items = await db_store.get_all_clothes()
+    snapshot = build_snapshot(version, db_path, items)
+    # 加载期间若有新的写入，版本号已变化，不安装这份快照
+    if db_store.get_wardrobe_version() == version and str(db_store.DB_PATH) == db_path:
+        _SNAPSHOT = snapshot
+    return snapshot
+
+
+async def get_wardrobe_snapshot() -> WardrobeSnapshot:
+    """获取当前版本的衣柜快照，版本过期时惰性重建。"""
+    global _BUILDING
+    version = db_store.get_wardrobe_version()
+    db_path = str(db_store.DB_PATH)
+
+    snapshot = _SNAPSHOT
+    if snapshot is not None and snapshot.version == version and snapshot.db_path == db_path:
+        return snapshot
+
+    loop = asyncio.get_running_loop()
+    building = _BUILDING
+    if (
+        building is not None
+        and building[0] is loop
+        and building[1] == version
+        and building[2] == db_path
+        and not building[3].done()
+    ):
+        return await asyncio.shield(building[3])
+
+    task = loop.create_task(_load_snapshot(version, db_path))
+    _BUILDING = (loop, version, db_path, task)
+    return await asyncio.shield(task)
+
+
+def get_wardrobe_version() -> int:
+    """当前衣柜版本号（可直接用于 HTTP ETag）。"""
+    return db_store.get_wardrobe_version()
+
+
+def get_snapshot_stats() -> dict[str, Any]:
+    snapshot = _SNAPSHOT
+    return {
+        "version": db_store.get_wardrobe_version(),
+        "snapshot_version": snapshot.version if snapshot else None,
+        "items": len(snapshot.items) if snapshot else 0,
+    }
@@ -0,0 +1,206 @@
+"""
+HTTP 缓存与压缩测试：ETag / 304 条件请求与响应压缩。
+"""
+from datetime import datetime, timedelta
+import gzip
+import importlib
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import storage.db as db_store
+import storage.snapshot as snapshot_store
+from domain.clothes import WardrobeResponse
+from services.weather import WeatherCacheInfo, build_weather_cache_bucket
+from test_support import (
+    app_client,
+    make_clothes,
+    mock_weather,
+    mock_weather_with_meta,
+    run_with_initialized_temp_db,
+)
+
+
+class HttpCachingTests(unittest.TestCase):
+    def test_conditional_requests_return_304_without_db_or_upstream_work(self):
+        async def run_case():
+            await db_store.add_clothes(make_clothes("top", "白衬衫"))
+            record_id = await db_store.upsert_horoscope_source(
+                record_date=datetime.now().strftime("%Y-%m-%d"),
+                zodiac_sign="leo",
+                zodiac_name="狮子座",
+                source_provider="fallback",
+                source_payload={"description": "平稳"},
+            )
+            await db_store.update_horoscope_inference(record_id, "done", "推理结果")
+
+            async with app_client() as client:
+                wardrobe = await client.get("/api/wardrobe")
+                clothes_id = wardrobe.json()["tops"][0]["id"]
+                category = await client.get("/api/wardrobe/top")
+                clothes = await client.get(f"/api/clothes/{clothes_id}")
+                weather = await client.get("/api/weather", params={"location": "上海, 上海市, 中国"})
+                horoscope = await client.get("/api/horoscope/daily", params={"zodiac_sign": "leo"})
+                for response in (wardrobe, category, clothes, weather, horoscope):
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn("etag", response.headers)
+                self.assertEqual(len({r.headers["etag"] for r in (wardrobe, category, clothes)}), 3)
+                self.assertIn("last-modified", horoscope.headers)
+
+                forbidden = AsyncMock(side_effect=AssertionError("should short-circuit"))
+                with patch("api.wardrobe.get_wardrobe_snapshot", new=forbidden), \
+                        patch("api.weather.get_weather_with_meta", new=forbidden), \
+                        patch("api.horoscope.get_weather_with_meta", new=forbidden), \
+                        patch("api.horoscope.get_daily_horoscope", new=forbidden):
+                    for url, params, previous in (
+                        ("/api/wardrobe", None, wardrobe),
+                        ("/api/wardrobe/top", None, category),
+                        (f"/api/clothes/{clothes_id}", None, clothes),
+                        ("/api/weather", {"location": "上海, 上海市, 中国"}, weather),
+                        ("/api/horoscope/daily", {"zodiac_sign": "leo"}, horoscope),
+                    ):
+                        revalidated = await client.get(
+                            url, params=params, headers={"If-None-Match": previous.headers["etag"]}
+                        )
+                        self.assertEqual(revalidated.status_code, 304, url)
+                        self.assertEqual(revalidated.headers["etag"], previous.headers["etag"])
+                        self.assertEqual(revalidated.content, b"")
+
+                    by_date = await client.get(
+                        "/api/horoscope/daily",
+                        params={"zodiac_sign": "leo"},
+                        headers={"If-Modified-Since": horoscope.headers["last-modified"]},
+                    )
+                    self.assertEqual(by_date.status_code, 304)
+
+                # 天气时间桶切换后，只带 If-Modified-Since 的请求不再命中旧建议的 304
+                next_bucket = build_weather_cache_bucket(datetime.now() + timedelta(hours=1))
+                next_hour_weather = (mock_weather(""), WeatherCacheInfo(status="hit", bucket_start=next_bucket))
+                with patch("api.horoscope.build_weather_cache_bucket", return_value=next_bucket), \
+                        patch("api.horoscope.get_weather_with_meta", new=AsyncMock(return_value=next_hour_weather)):
+                    next_hour = await client.get(
+                        "/api/horoscope/daily",
+                        params={"zodiac_sign": "leo"},
+                        headers={"If-Modified-Since": horoscope.headers["last-modified"]},
+                    )
+                self.assertEqual(next_hour.status_code, 200)
+                self.assertNotEqual(next_hour.headers["last-modified"], horoscope.headers["last-modified"])
+
+                # 写入后版本号变化，旧 ETag 不再命中
+                await db_store.add_clothes(make_clothes("top", "蓝衬衫"))
+                changed = await client.get("/api/wardrobe", headers={"If-None-Match": wardrobe.headers["etag"]})
+                self.assertEqual(changed.status_code, 200)
+                self.assertEqual(len(changed.json()["tops"]), 2)
+                self.assertNotEqual(changed.headers["etag"], wardrobe.headers["etag"])
+
+        with patch("api.weather.get_weather_with_meta", new=AsyncMock(side_effect=mock_weather_with_meta)), \
+                patch("api.horoscope.get_weather_with_meta", new=AsyncMock(side_effect=mock_weather_with_meta)):
+            run_with_initialized_temp_db(run_case)
+
+    def test_horoscope_validators_follow_the_weather_bucket_behind_the_suggestion(self):
+        async def run_case():
+            record_id = await db_store.upsert_horoscope_source(
+                record_date=datetime.now().strftime("%Y-%m-%d"),
+                zodiac_sign="leo",
+                zodiac_name="狮子座",
+                source_provider="fallback",
+                source_payload={"description": "平稳"},
+            )
+            await db_store.update_horoscope_inference(record_id, "done", "推理结果")
+
+            current_bucket = build_weather_cache_bucket()
+            previous_bucket = build_weather_cache_bucket(datetime.now() - timedelta(hours=1))
+            weather_meta = AsyncMock(side_effect=[
+                (mock_weather(""), WeatherCacheInfo(status="stale", age=3600, bucket_start=previous_bucket)),
+                (mock_weather(""), WeatherCacheInfo(status="hit", bucket_start=current_bucket)),
+                (mock_weather(""), WeatherCacheInfo(status="mock")),
+            ])
+            params = {"zodiac_sign": "leo"}
+            with patch("api.horoscope.get_weather_with_meta", new=weather_meta):
+                async with app_client() as client:
+                    stale = await client.get("/api/horoscope/daily", params=params)
+                    self.assertEqual(stale.status_code, 200)
+                    self.assertIn("etag", stale.headers)
+                    self.assertNotIn("last-modified", stale.headers)
+
+                    # 天气刷新后，带着旧 ETag 的条件请求拿到基于新天气的建议
+                    fresh = await client.get(
+                        "/api/horoscope/daily", params=params, headers={"If-None-Match": stale.headers["etag"]}
+                    )
+                    self.assertEqual(fresh.status_code, 200)
+                    self.assertNotEqual(fresh.headers["etag"], stale.headers["etag"])
+                    self.assertIn("last-modified", fresh.headers)
+
+                    mocked = await client.get("/api/horoscope/daily", params=params)
+                    self.assertEqual(mocked.status_code, 200)
+                    self.assertNotIn("etag", mocked.headers)
+                    self.assertEqual(mocked.headers["cache-control"], "no-store")
+
+            self.assertEqual(weather_meta.await_count, 3)
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_large_responses_are_compressed_and_wardrobe_json_is_cached(self):
+        async def run_case():
+            await db_store.add_clothes_many([
+                make_clothes(category, f"单品{index}")
+                for index, category in enumerate(["top", "bottom", "shoes", "accessory"] * 10)
+            ])
+
+            async with app_client() as client:
+                plain = await client.get("/api/wardrobe", headers={"Accept-Encoding": "identity"})
+                compressed = await client.get("/api/wardrobe", headers={"Accept-Encoding": "gzip"})
+                category = await client.get("/api/wardrobe/top", headers={"Accept-Encoding": "gzip"})
+                counts = await client.get("/api/wardrobe/counts", headers={"Accept-Encoding": "gzip"})
+
+            self.assertNotIn("content-encoding", plain.headers)
+            self.assertEqual(compressed.headers["content-encoding"], "gzip")
+            self.assertLess(compressed.num_bytes_downloaded, plain.num_bytes_downloaded // 3)
+            self.assertEqual(compressed.json(), plain.json())
+            self.assertEqual(compressed.headers["etag"], plain.headers["etag"])
+            self.assertIn("Accept-Encoding", compressed.headers["vary"])
+
+            # 与原先按响应模型序列化的结果一致
+            snapshot = await snapshot_store.get_wardrobe_snapshot()
+            expected = WardrobeResponse(
+                tops=list(snapshot.by_category["top"]),
+                bottoms=list(snapshot.by_category["bottom"]),
+                shoes=list(snapshot.by_category["shoes"]),
+                accessories=list(snapshot.by_category["accessory"]),
+            )
+            self.assertEqual(plain.json(), expected.model_dump(mode="json"))
+            self.assertEqual(category.json(), expected.model_dump(mode="json")["tops"])
+            self.assertIn("api.wardrobe_json", snapshot._derived)
+
+            # 小响应不压缩
+            self.assertNotIn("content-encoding", counts.headers)
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_precompressed_wardrobe_json_is_compressed_only_once_by_middleware(self):
+        # 预压缩的响应自带 Content-Encoding，依赖压缩中间件跳过这类响应；Starlette / brotli-asgi 升级后以此兜底
+        async def run_case():
+            await db_store.add_clothes_many([
+                make_clothes(category, f"单品{index}")
+                for index, category in enumerate(["top", "bottom", "shoes", "accessory"] * 10)
+            ])
+
+            raw_responses = {}
+            async with app_client() as client:
+                plain = (await client.get("/api/wardrobe", headers={"Accept-Encoding": "identity"})).json()
+                for accept in ("gzip", "gzip, br", "br;q=1.0, gzip;q=0.5, *"):
+                    async with client.stream("GET", "/api/wardrobe", headers={"Accept-Encoding": accept}) as response:
+                        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+                    raw_responses[accept] = (response.headers.get("content-encoding", ""), raw)
+            return plain, raw_responses
+
+        plain, raw_responses = run_with_initialized_temp_db(run_case)
+        for accept, (encoding, raw) in raw_responses.items():
+            # 只有一层编码，解压一次即得到原始 JSON
+            self.assertIn(encoding, ("gzip", "br"), accept)
+            body = gzip.decompress(raw) if encoding == "gzip" else importlib.import_module("brotli").decompress(raw)
+            self.assertEqual(json.loads(body), plain, accept)
+
+
+if __name__ == "__main__":
+    unittest.main()
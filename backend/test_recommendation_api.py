@@ -1,6 +1,8 @@
+"""
+推荐测试：推荐接口、候选排序、向量化打分、整套搭配搜索、流式文案与文案缓存。
+"""
 import asyncio
-from pathlib import Path
-import tempfile
+import time
 from types import SimpleNamespace
 import unittest
 from unittest.mock import AsyncMock, patch
@@ -8,44 +10,30 @@ from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 
 import main
+import api.responses as api_responses
 import storage.db as db_store
-import services.weather as weather_service
-from domain.clothes import resolve_category_value
-from services.weather import build_weather_cache_bucket, build_weather_cache_key
-
-
-def _mock_weather(location: str):
-    return SimpleNamespace(
-        temperature=22.0,
-        feelsLike=23.0,
-        condition="晴",
-        icon="100",
-        humidity=55.0,
-        windDir="东北风",
-        windScale="3",
-        location="上海, 上海市, 中国",
-        obsTime="2026-04-10T10:00:00+08:00",
-    )
-
-
-def _run_with_initialized_temp_db(async_case):
-    backup_db_path = db_store.DB_PATH
-
-    with tempfile.TemporaryDirectory() as temp_dir:
-        db_store.DB_PATH = Path(temp_dir) / "wardrobe.db"
-        try:
-            async def wrapped_case():
-                await db_store.init_db()
-                await async_case()
-
-            asyncio.run(wrapped_case())
-        finally:
-            db_store.DB_PATH = backup_db_path
+import storage.snapshot as snapshot_store
+import services.recommendation as recommendation_service
+import services.outfits as outfits_service
+import services.llm_text_cache as llm_text_cache
+import services.scoring_numpy as scoring_numpy
+from domain.clothes import ClothesItem, resolve_category_value
+from domain.config import LLMConfig
+from test_support import (
+    StreamingLLMHandler,
+    app_client,
+    make_clothes,
+    mock_weather,
+    parse_sse,
+    run_with_initialized_temp_db,
+    running_stub_server,
+    stub_server_url,
+)
 
 
 class RecommendationApiTests(unittest.TestCase):
     def test_recommendation_api_returns_mode_goal_and_reasons(self):
-        async def fake_get_ai_recommendation(weather, zodiac_sign=None, goal=None, mode="balanced"):
+        async def fake_get_ai_recommendation(weather, zodiac_sign=None, goal=None, mode="balanced", bypass_cache=False):
             return {
                 "weather": {
                     "temperature": weather.temperature,
@@ -74,19 +62,23 @@ class RecommendationApiTests(unittest.TestCase):
                 "mode": mode,
             }
 
-        with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=_mock_weather)):
-            with patch("api.recommendation.get_ai_recommendation", new=AsyncMock(side_effect=fake_get_ai_recommendation)):
-                client = TestClient(main.app)
-                response = client.get(
-                    "/api/recommendation",
-                    params={
-                        "location": "上海, 上海市, 中国",
-                        "goal": "上班通勤",
-                        "mode": "goal_first",
-                    },
-                )
+        with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=mock_weather)), \
+                patch("api.recommendation.get_ai_recommendation", new=AsyncMock(side_effect=fake_get_ai_recommendation)), \
+                patch("api.responses.dumps_json", wraps=api_responses.dumps_json) as dumps_json:
+            client = TestClient(main.app)
+            response = client.get(
+                "/api/recommendation",
+                params={
+                    "location": "上海, 上海市, 中国",
+                    "goal": "上班通勤",
+                    "mode": "goal_first",
+                },
+            )
 
         self.assertEqual(response.status_code, 200)
+        # 推荐结果直接由 orjson 编码
+        dumps_json.assert_called_once()
+        self.assertEqual(response.headers["content-type"], "application/json")
         payload = response.json()
         self.assertEqual(payload["mode"], "goal_first")
         self.assertEqual(payload["goal_raw"], "上班通勤")
@@ -98,6 +90,363 @@ class RecommendationApiTests(unittest.TestCase):
         category = resolve_category_value("unknown", "连帽拉链卫衣", "休闲风格，适合通勤")
         self.assertEqual(category, "top")
 
+    def test_recommendation_ranking_uses_request_context_and_cached_features(self):
+        async def run_case():
+            await db_store.add_clothes_many([
+                make_clothes("top", "白衬衫", color_semantics="白色"),
+                make_clothes("top", "藏青针织衫", color_semantics="藏青色", style_semantics=["简约"]),
+                make_clothes("top", "短袖", season_semantics=["夏"], color_semantics="藏青色"),
+                make_clothes("bottom", "休闲裤", usage_semantics=["日常"]),
+                make_clothes("bottom", "西裤", usage_semantics=["上班"]),
+                make_clothes("shoes", "帆布鞋"),
+                make_clothes("shoes", "切尔西短靴"),
+                make_clothes("accessory", "围巾", season_semantics=[]),
+            ])
+            horoscope = {"zodiac_sign": "virgo", "zodiac_name": "处女座", "lucky_color": "藏青色"}
+            weather = SimpleNamespace(**{**vars(mock_weather("")), "feelsLike": 16.0, "condition": "小雨"})
+
+            with patch.object(recommendation_service, "get_daily_horoscope", new=AsyncMock(return_value=horoscope)), \
+                    patch.object(recommendation_service, "get_llm_recommendation", new=AsyncMock(return_value="文案")), \
+                    patch.object(recommendation_service, "build_item_features", wraps=recommendation_service.build_item_features) as build_features:
+                first = await recommendation_service.get_ai_recommendation(weather, goal="上班通勤", mode="goal_first")
+                built = build_features.call_count
+                second = await recommendation_service.get_ai_recommendation(weather, goal="上班通勤", mode="goal_first")
+
+            self.assertEqual(first["suggested_top"]["item"], "藏青针织衫")
+            self.assertIn("幸运色", first["selection_reasons"]["top"])
+            self.assertEqual(first["suggested_bottom"]["item"], "西裤")
+            self.assertEqual(first["suggested_shoes"]["item"], "切尔西短靴")
+            self.assertIn("防水", first["selection_reasons"]["shoes"])
+            self.assertEqual([accessory["name"] for accessory in first["suggested_accessories"]], ["围巾"])
+            # 特征只在快照首次使用时计算一次
+            self.assertEqual(built, 8)
+            self.assertEqual(build_features.call_count, built)
+            self.assertEqual(second["suggested_top"], first["suggested_top"])
+
+            # 兼容接口与批量排序结果一致
+            snapshot = await snapshot_store.get_wardrobe_snapshot()
+            profile = recommendation_service.build_temperature_profile(weather)
+            for category in ("top", "bottom", "shoes"):
+                item, reason = recommendation_service.pick_best_item(
+                    list(snapshot.compatible_dicts(category, profile["allowed_seasons"])),
+                    category, horoscope, weather, profile, "commute", "goal_first",
+                )
+                self.assertEqual(item, first[f"suggested_{category}"])
+                self.assertEqual(reason, first["selection_reasons"][category])
+
+        run_with_initialized_temp_db(run_case)
+
+    @unittest.skipIf(not scoring_numpy.NUMPY_AVAILABLE, "未安装 numpy")
+    def test_vectorized_scoring_matches_python_scoring(self):
+        import random
+
+        rng = random.Random(7)
+        names = {
+            "top": ["白衬衫", "藏青针织衫", "红色卫衣", "灰色T恤"],
+            "bottom": ["直筒牛仔裤", "黑色西裤", "卡其休闲裤"],
+            "shoes": ["小白鞋", "切尔西短靴", "防水徒步鞋", "帆布鞋"],
+            "accessory": ["围巾", "腰带", "墨镜"],
+        }
+        colors = ["白色", "黑色", "红色", "藏青色", "灰色", "蓝色", ""]
+        items = []
+        for index in range(600):
+            category = rng.choice(list(names))
+            items.append(ClothesItem(
+                id=index + 1,
+                category=category,
+                canonical_category=category,
+                item=rng.choice(names[category] + names["accessory"]),
+                style_semantics=rng.sample(["休闲", "通勤", "简约", "运动", "正式", "casual", "Business"], rng.randint(0, 2)),
+                season_semantics=rng.sample(["春", "夏", "秋", "冬", "autumn"], rng.randint(0, 2)),
+                usage_semantics=rng.sample(["日常", "上班", "约会", "运动", "旅行"], rng.randint(0, 2)),
+                color_semantics=rng.choice(colors),
+                description=f"{rng.choice(colors)}单品",
+                image_url=f"/uploads/{index}.png",
+                created_at="2026-01-01T00:00:00",
+            ))
+        snapshot = snapshot_store.build_snapshot(1, ":parity:", items)
+        features_by_id = recommendation_service.get_snapshot_features(snapshot)
+        index = recommendation_service.get_snapshot_vector_index(snapshot)
+
+        for round_index in range(40):
+            weather = SimpleNamespace(
+                feelsLike=rng.choice([-5.0, 8.0, 16.0, 24.0, 32.0]),
+                condition=rng.choice(["晴", "小雨", "中雪", "多云"]),
+            )
+            horoscope = {
+                "lucky_color": rng.choice(["藏青色", "红色", "白", "金色", ""]),
+                "zodiac_sign": rng.choice(list(recommendation_service.ZODIAC_STYLE_HINTS) + [""]),
+            }
+            _, goal = recommendation_service.normalize_goal(rng.choice([None, "上班通勤", "约会", "旅行"]))
+            mode = rng.choice(["balanced", "goal_first", "wardrobe_first"])
+            profile = recommendation_service.build_temperature_profile(weather)
+            context = recommendation_service.build_scoring_context(horoscope, weather, profile, goal, mode, config=LLMConfig())
+
+            for category in ("top", "bottom", "shoes", "accessory"):
+                expected = [
+                    recommendation_service.score_features(features_by_id[item["id"]], category, context)[0]
+                    for item in snapshot.item_dicts
+                ]
+                self.assertEqual(index.scores(category, context).tolist(), expected)
+
+            results = {}
+            for engine in ("python", "numpy"):
+                with patch.object(recommendation_service, "RECOMMENDATION_SCORING_ENGINE", engine):
+                    results[engine] = (
+                        [recommendation_service.select_best_item(snapshot, category, context, season_only=season_only)
+                         for category in ("top", "bottom", "shoes") for season_only in (True, False)],
+                        recommendation_service.select_accessories(snapshot, context, limit=3),
+                    )
+            self.assertEqual(results["numpy"], results["python"], f"round {round_index}")
+
+            # 与兼容接口 pick_best_item 一致
+            for category in ("top", "bottom", "shoes"):
+                expected = recommendation_service.pick_best_item(
+                    list(snapshot.compatible_dicts(category, profile["allowed_seasons"])),
+                    category, horoscope, weather, profile, goal, mode, config=LLMConfig(),
+                )
+                self.assertEqual(results["numpy"][0][("top", "bottom", "shoes").index(category) * 2], expected)
+
+    def test_outfit_search_returns_top_k_combinations_with_pairwise_scores(self):
+        async def run_case():
+            await db_store.add_clothes_many([
+                make_clothes("top", "红色卫衣", color_semantics="红色", style_semantics=["运动"]),
+                make_clothes("top", "白衬衫", color_semantics="白色", style_semantics=["正式", "通勤"]),
+                make_clothes("top", "绿色针织衫", color_semantics="绿色", style_semantics=["休闲"]),
+                make_clothes("bottom", "绿色运动裤", color_semantics="绿色", style_semantics=["运动"]),
+                make_clothes("bottom", "黑色西裤", color_semantics="黑色", style_semantics=["正式"]),
+                make_clothes("shoes", "小白鞋", color_semantics="白色", style_semantics=["休闲"]),
+                make_clothes("shoes", "跑鞋", color_semantics="蓝色", style_semantics=["运动"]),
+                make_clothes("shoes", "凉鞋", season_semantics=["夏"]),
+            ])
+            horoscope = {"zodiac_sign": "leo", "zodiac_name": "狮子座", "lucky_color": "红色"}
+
+            with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=mock_weather)), \
+                    patch.object(outfits_service, "get_daily_horoscope", new=AsyncMock(return_value=horoscope)):
+                async with app_client() as client:
+                    response = await client.get("/api/recommendation/outfits", params={"k": 4})
+                    too_many = await client.get("/api/recommendation/outfits", params={"k": outfits_service.OUTFIT_MAX_K + 1})
+                # 服务层直接调用时 k 被截断，响应回报实际使用的 k
+                clamped = await outfits_service.get_outfit_recommendations(
+                    mock_weather(""), k=outfits_service.OUTFIT_MAX_K + 5
+                )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(too_many.status_code, 422)
+            payload = response.json()
+            self.assertEqual(payload["k"], 4)
+            self.assertEqual(clamped["k"], outfits_service.OUTFIT_MAX_K)
+            outfits = payload["outfits"]
+            self.assertEqual([outfit["rank"] for outfit in outfits], [1, 2, 3, 4])
+            self.assertEqual(payload["purchase_suggestions"], [])
+
+            # 与穷举全部组合的结果一致
+            snapshot = await snapshot_store.get_wardrobe_snapshot()
+            weather = mock_weather("")
+            profile = recommendation_service.build_temperature_profile(weather)
+            context = recommendation_service.build_scoring_context(horoscope, weather, profile, "", "balanced")
+            features_by_id = recommendation_service.get_snapshot_features(snapshot)
+            pairs = outfits_service.get_snapshot_pair_features(snapshot)
+            pools = [snapshot.compatible_dicts(category, profile["allowed_seasons"]) for category in ("top", "bottom", "shoes")]
+            self.assertNotIn("凉鞋", [item["item"] for item in pools[2]])
+            expected = []
+            for top in pools[0]:
+                for bottom in pools[1]:
+                    for shoes in pools[2]:
+                        combo = {"top": top, "bottom": bottom, "shoes": shoes}
+                        total = sum(
+                            recommendation_service.score_features(features_by_id[item["id"]], category, context)[0]
+                            for category, item in combo.items()
+                        )
+                        total += outfits_service.score_pair(pairs[top["id"]], pairs[bottom["id"]])[0]
+                        total += outfits_service.score_pair(pairs[top["id"]], pairs[shoes["id"]])[0]
+                        total += outfits_service.score_pair(pairs[bottom["id"]], pairs[shoes["id"]])[0]
+                        expected.append(total)
+            expected.sort(reverse=True)
+            self.assertEqual([outfit["score"] for outfit in outfits], expected[:4])
+            for outfit in outfits:
+                self.assertEqual(outfit["item_score"] + outfit["compatibility_score"], outfit["score"])
+            self.assertEqual(len({(o["top"]["id"], o["bottom"]["id"], o["shoes"]["id"]) for o in outfits}), 4)
+
+            # 白衬衫 + 黑西裤 + 小白鞋：中性配色、正式风格统一，且契合狮子座风格
+            best = outfits[0]
+            self.assertEqual((best["top"]["item"], best["bottom"]["item"], best["shoes"]["item"]), ("白衬衫", "黑色西裤", "小白鞋"))
+            self.assertTrue(any("风格统一" in reason for reason in best["compatibility_reasons"]))
+            by_name = {item["item"]: pairs[item["id"]] for item in snapshot.item_dicts}
+            self.assertEqual(
+                outfits_service.score_pair(by_name["白衬衫"], by_name["绿色运动裤"], with_reasons=True),
+                (outfits_service.COLOR_HARMONY_BONUS + outfits_service.STYLE_CLASH_PENALTY, ["配色协调", "运动与正式风格冲突"]),
+            )
+            self.assertEqual(
+                outfits_service.score_pair(by_name["红色卫衣"], by_name["绿色运动裤"], with_reasons=True),
+                (outfits_service.COLOR_CLASH_PENALTY + outfits_service.STYLE_COHERENCE_BONUS, ["彩色单品撞色", "风格统一"]),
+            )
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_recommendation_stream_emits_selection_before_llm_tokens_and_falls_back(self):
+        tokens = ["### 今日", "穿搭", "结论"]
+        horoscope = {"zodiac_sign": "leo", "zodiac_name": "狮子座", "lucky_color": "红色", "suggestion": "保持节奏"}
+
+        with running_stub_server(StreamingLLMHandler, tokens=tokens, fail_after=None) as server:
+            llm_config = LLMConfig(api_base=stub_server_url(server), api_key="test-key", model="fake")
+
+            async def run_case():
+                await db_store.add_clothes_many([
+                    make_clothes("top", "白衬衫"),
+                    make_clothes("bottom", "西裤"),
+                ])
+                with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=mock_weather)), \
+                        patch.object(recommendation_service, "get_daily_horoscope", new=AsyncMock(return_value=horoscope)), \
+                        patch.object(recommendation_service, "load_config", return_value=llm_config):
+                    async with app_client() as client:
+                        server.fail_after = None
+                        streamed = await client.get("/api/recommendation/stream", headers={"Accept-Encoding": "gzip"})
+                        server.fail_after = 2
+                        broken = await client.get("/api/recommendation/stream", params={"bypass_cache": "true"})
+                        full = await client.get("/api/recommendation", params={"bypass_cache": "true"})
+                        with patch.object(recommendation_service, "load_config", return_value=LLMConfig()):
+                            basic = await client.get("/api/recommendation/stream")
+                return streamed, broken, full, basic
+
+            streamed, broken, full, basic = run_with_initialized_temp_db(run_case)
+
+        self.assertEqual(streamed.status_code, 200)
+        self.assertTrue(streamed.headers["content-type"].startswith("text/event-stream"))
+        self.assertNotIn("content-encoding", streamed.headers)
+        events = parse_sse(streamed.text)
+        names = [name for name, _ in events]
+        self.assertEqual(
+            names,
+            ["weather", "temperature_rule", "horoscope", "selection", "purchase_suggestions", "token", "token", "token", "done"],
+        )
+        payloads = dict(events)
+        self.assertEqual(payloads["selection"]["suggested_top"]["item"], "白衬衫")
+        self.assertEqual([data["text"] for name, data in events if name == "token"], tokens)
+        self.assertEqual(payloads["done"], {"recommendation_text": "### 今日穿搭结论", "source": "llm"})
+
+        # 输出两段后中断：发出 fallback，文案替换为规则版本
+        broken_events = parse_sse(broken.text)
+        self.assertEqual([name for name, _ in broken_events][-4:], ["token", "token", "fallback", "done"])
+        fallback = dict(broken_events)["fallback"]
+        self.assertIn("今日穿搭结论", fallback["text"])
+        self.assertEqual(dict(broken_events)["done"], {"recommendation_text": fallback["text"], "source": "fallback"})
+
+        # 非流式接口同样经 LLM 失败回退，且与流式回退文本一致
+        self.assertEqual(full.json()["recommendation_text"], fallback["text"])
+        self.assertEqual(full.json()["suggested_top"], payloads["selection"]["suggested_top"])
+
+        # 未配置 API Key 时直接发出规则文本
+        self.assertEqual(dict(parse_sse(basic.text))["done"]["source"], "basic")
+
+    def test_llm_recommendation_text_is_cached_by_normalized_inputs(self):
+        requests_seen = []
+        handle = StreamingLLMHandler.do_POST
+
+        def counting_post(handler):
+            requests_seen.append(handler.path)
+            handle(handler)
+
+        horoscope = {"zodiac_sign": "leo", "zodiac_name": "狮子座", "lucky_color": "红色", "suggestion": ""}
+
+        with running_stub_server(StreamingLLMHandler, tokens=["缓存", "文案"], fail_after=None) as server:
+            llm_config = LLMConfig(api_base=stub_server_url(server), api_key="test-key", model="fake")
+
+            async def run_case():
+                await db_store.add_clothes_many([make_clothes("top", "白衬衫"), make_clothes("bottom", "西裤")])
+                before = llm_text_cache.get_llm_text_cache_stats()
+                with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=mock_weather)), \
+                        patch.object(recommendation_service, "get_daily_horoscope", new=AsyncMock(return_value=horoscope)), \
+                        patch.object(recommendation_service, "load_config", return_value=llm_config), \
+                        patch.object(StreamingLLMHandler, "do_POST", counting_post):
+                    async with app_client() as client:
+                        first = await client.get("/api/recommendation/stream")
+                        second = await client.get("/api/recommendation/stream")
+                        calls_after_hit = len(requests_seen)
+                        bypassed = await client.get("/api/recommendation/stream", params={"bypass_cache": "true"})
+                        other_goal = await client.get("/api/recommendation/stream", params={"goal": "约会"})
+                        calls = len(requests_seen)
+
+                        # 不同模型使用不同的键
+                        with patch.object(recommendation_service, "load_config",
+                                          return_value=llm_config.model_copy(update={"model": "fake-2"})):
+                            await client.get("/api/recommendation/stream")
+                        # 过期后重新生成
+                        async with db_store.write_connection() as db:
+                            await db.execute("UPDATE llm_text_cache SET created_at = datetime('now', '-2 hours')")
+                        await client.get("/api/recommendation/stream")
+                after = llm_text_cache.get_llm_text_cache_stats()
+                await db_store.upsert_llm_text_cache("k1", "m", "a")
+                await db_store.upsert_llm_text_cache("k2", "m", "b")
+                deleted = await db_store.cleanup_llm_text_cache(3600, max_rows=1)
+                kept = await db_store.get_llm_text_cache("k2", 3600)
+                return first, second, bypassed, other_goal, calls_after_hit, calls, len(requests_seen), before, after, (deleted, kept)
+
+            first, second, bypassed, other_goal, calls_after_hit, calls, total_calls, before, after, deleted = (
+                run_with_initialized_temp_db(run_case)
+            )
+
+        self.assertEqual(dict(parse_sse(first.text))["done"], {"recommendation_text": "缓存文案", "source": "llm"})
+        self.assertEqual(dict(parse_sse(second.text))["done"], {"recommendation_text": "缓存文案", "source": "cache"})
+        self.assertEqual(calls_after_hit, 1)
+        self.assertEqual(dict(parse_sse(bypassed.text))["done"]["source"], "llm")
+        self.assertEqual(dict(parse_sse(other_goal.text))["done"]["source"], "llm")
+        self.assertEqual(calls, 3)
+        self.assertEqual(total_calls, 5)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["bypassed"] - before["bypassed"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 4)
+        # 写入时清理过期记录（goal 与 fake-2 两条）；超出行数上限时保留最新写入的
+        self.assertEqual(after["evicted"] - before["evicted"], 2)
+        self.assertEqual(deleted, (2, "b"))
+
+    def test_concurrent_identical_streams_share_one_llm_call(self):
+        requests_seen = []
+        handle = StreamingLLMHandler.do_POST
+
+        def slow_counting_post(handler):
+            requests_seen.append(handler.path)
+            # 上游开始响应前稍作停顿，保证其余请求在调用进行中到达
+            time.sleep(0.3)
+            handle(handler)
+
+        horoscope = {"zodiac_sign": "leo", "zodiac_name": "狮子座", "lucky_color": "红色", "suggestion": ""}
+
+        with running_stub_server(StreamingLLMHandler, tokens=["共享", "文案"], fail_after=None) as server:
+            llm_config = LLMConfig(api_base=stub_server_url(server), api_key="test-key", model="fake")
+
+            async def run_case():
+                await db_store.add_clothes_many([make_clothes("top", "白衬衫"), make_clothes("bottom", "西裤")])
+                with patch("api.recommendation.get_weather", new=AsyncMock(side_effect=mock_weather)), \
+                        patch.object(recommendation_service, "get_daily_horoscope", new=AsyncMock(return_value=horoscope)), \
+                        patch.object(recommendation_service, "load_config", return_value=llm_config), \
+                        patch.object(StreamingLLMHandler, "do_POST", slow_counting_post):
+                    async with app_client() as client:
+                        leader = asyncio.create_task(client.get("/api/recommendation/stream"))
+                        while not requests_seen:
+                            await asyncio.sleep(0.01)
+                        # 流式与非流式的相同请求都加入进行中的调用
+                        follower, full = await asyncio.gather(
+                            client.get("/api/recommendation/stream"),
+                            client.get("/api/recommendation"),
+                        )
+                        leader = await leader
+                        cached = await client.get("/api/recommendation/stream")
+                return leader, follower, full, cached
+
+            leader, follower, full, cached = run_with_initialized_temp_db(run_case)
+
+        self.assertEqual(len(requests_seen), 1)
+        leader_events = parse_sse(leader.text)
+        follower_events = parse_sse(follower.text)
+        self.assertEqual([data["text"] for name, data in leader_events if name == "token"], ["共享", "文案"])
+        # 等待者一次性收到完整文案
+        self.assertEqual([data["text"] for name, data in follower_events if name == "token"], ["共享文案"])
+        for events in (leader_events, follower_events):
+            self.assertEqual(dict(events)["done"], {"recommendation_text": "共享文案", "source": "llm"})
+        self.assertEqual(full.json()["recommendation_text"], "共享文案")
+        self.assertEqual(dict(parse_sse(cached.text))["done"], {"recommendation_text": "共享文案", "source": "cache"})
+
     def test_recommendation_mode_weights_config_roundtrip(self):
         import storage.config_store as config_store
 
@@ -141,67 +490,6 @@ class RecommendationApiTests(unittest.TestCase):
             config_store._CONFIG_CACHE = backup_cache
             config_store._CONFIG_MTIME = backup_mtime
 
-    def test_get_weather_uses_db_cache_before_provider(self):
-        async def run_case():
-            cache_key = build_weather_cache_key("121.4737,31.2304")
-            bucket = build_weather_cache_bucket()
-
-            await db_store.upsert_weather_cache(
-                cache_key,
-                bucket,
-                {
-                    "temperature": 18.5,
-                    "feelsLike": 19.0,
-                    "condition": "多云",
-                    "icon": "102",
-                    "humidity": 63.0,
-                    "windDir": "东北风",
-                    "windScale": "2",
-                    "location": "上海, 上海市, 中国",
-                    "obsTime": "2026-04-11T10:00:00+08:00",
-                },
-            )
-
-            with patch("services.weather.resolve_location", new=AsyncMock(return_value=("121.4737,31.2304", "上海, 上海市, 中国"))):
-                with patch("services.weather.get_qweather_now", new=AsyncMock(side_effect=AssertionError("provider should not be called"))):
-                    weather = await weather_service.get_weather("上海, 上海市, 中国")
-
-            self.assertIsNotNone(weather)
-            self.assertEqual(weather.condition, "多云")
-            self.assertEqual(weather.temperature, 18.5)
-
-        _run_with_initialized_temp_db(run_case)
-
-    def test_get_weather_falls_back_to_latest_cached_when_provider_fails(self):
-        async def run_case():
-            cache_key = build_weather_cache_key("121.9999,31.9999")
-
-            await db_store.upsert_weather_cache(
-                cache_key,
-                "2000-01-01T00",
-                {
-                    "temperature": 16.0,
-                    "feelsLike": 15.0,
-                    "condition": "阴",
-                    "icon": "104",
-                    "humidity": 70.0,
-                    "windDir": "北风",
-                    "windScale": "3",
-                    "location": "上海, 上海市, 中国",
-                    "obsTime": "2000-01-01T00:00:00+08:00",
-                },
-            )
-
-            with patch("services.weather.resolve_location", new=AsyncMock(return_value=("121.9999,31.9999", "上海, 上海市, 中国"))):
-                with patch("services.weather.get_qweather_now", new=AsyncMock(return_value=None)):
-                    weather = await weather_service.get_weather("上海, 上海市, 中国")
-
-            self.assertIsNotNone(weather)
-            self.assertEqual(weather.condition, "阴")
-            self.assertEqual(weather.temperature, 16.0)
-
-        _run_with_initialized_temp_db(run_case)
-
 
 if __name__ == "__main__":
     unittest.main()
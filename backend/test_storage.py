@@ -0,0 +1,168 @@
+"""
+存储层测试：连接池、分类写入、快照、分页投影与标签索引。
+"""
+import unittest
+from unittest.mock import patch
+
+import storage.db as db_store
+import storage.snapshot as snapshot_store
+from test_support import make_clothes, run_with_initialized_temp_db
+
+
+class StorageTests(unittest.TestCase):
+    def test_canonical_category_is_persisted_on_write(self):
+        async def run_case():
+            clothes_id = await db_store.add_clothes(make_clothes("unknown", "连帽拉链卫衣"))
+            item = await db_store.get_clothes_by_id(clothes_id)
+            self.assertEqual(item.category, "unknown")
+            self.assertEqual(item.canonical_category, "top")
+
+            await db_store.update_clothes(clothes_id, make_clothes("unknown", "直筒牛仔裤"))
+            self.assertEqual([c.id for c in await db_store.get_clothes_by_category("bottom")], [clothes_id])
+            self.assertEqual(await db_store.count_clothes_by_category(), {"bottom": 1})
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_wardrobe_snapshot_is_replaced_after_writes(self):
+        async def run_case():
+            first_id = await db_store.add_clothes(make_clothes("top", "卫衣", season_semantics=["秋"]))
+            snapshot = await snapshot_store.get_wardrobe_snapshot()
+            self.assertIs(await snapshot_store.get_wardrobe_snapshot(), snapshot)
+            self.assertEqual([item.id for item in snapshot.by_category["top"]], [first_id])
+
+            second_id = await db_store.add_clothes(make_clothes("shoes", "短靴", season_semantics=["冬"]))
+            refreshed = await snapshot_store.get_wardrobe_snapshot()
+            self.assertGreater(refreshed.version, snapshot.version)
+            self.assertEqual([item["id"] for item in refreshed.compatible_dicts("shoes", {"秋", "冬"})], [second_id])
+            self.assertEqual(refreshed.compatible_dicts("top", {"夏"}), [])
+
+            await db_store.delete_clothes(first_id)
+            self.assertNotIn(first_id, (await snapshot_store.get_wardrobe_snapshot()).by_id)
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_connection_pool_reuses_connections(self):
+        async def run_case():
+            await db_store.open_pool(readers=2)
+            try:
+                for _ in range(5):
+                    await db_store.upsert_weather_cache("pool-key", "2026-04-10T10", {"temperature": 20.0})
+                    await db_store.get_weather_cache("pool-key", "2026-04-10T10")
+
+                stats = db_store.get_pool_stats()
+                self.assertTrue(stats["pooled"])
+                self.assertEqual(stats["pool"]["connections_opened"], 3)
+                self.assertEqual(stats["pool"]["reader_acquires"], 5)
+                self.assertEqual(stats["pool"]["writer_acquires"], 5)
+            finally:
+                await db_store.close_pool()
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_pooled_connections_apply_durability_pragmas_and_maintenance(self):
+        async def read_pragma(db, name):
+            cursor = await db.execute(f"PRAGMA {name}")
+            return (await cursor.fetchone())[0]
+
+        async def run_case():
+            await db_store.open_pool(readers=1)
+            try:
+                expected = {
+                    "journal_mode": "wal",
+                    "synchronous": 1,  # NORMAL
+                    "busy_timeout": db_store.DB_BUSY_TIMEOUT_MS,
+                    "mmap_size": db_store.DB_MMAP_SIZE,
+                    "cache_size": -db_store.DB_CACHE_SIZE_KB,
+                }
+                for acquire in (db_store.read_connection, db_store.write_connection):
+                    async with acquire() as db:
+                        for name, value in expected.items():
+                            self.assertEqual(await read_pragma(db, name), value, name)
+
+                await db_store.add_clothes(make_clothes("top", "衬衫"))
+                before = db_store.get_db_maintenance_stats()
+                with patch.object(db_store, "DB_OPTIMIZE_EVERY", 1):
+                    stats = await db_store.run_db_maintenance()
+
+                self.assertEqual(stats["checkpoints"], before["checkpoints"] + 1)
+                self.assertEqual(stats["optimizes"], before["optimizes"] + 1)
+                self.assertEqual(stats["last_checkpoint"]["busy"], 0)
+                self.assertEqual(
+                    stats["last_checkpoint"]["checkpointed_frames"],
+                    stats["last_checkpoint"]["wal_frames"],
+                )
+            finally:
+                await db_store.close_pool()
+
+        with patch.object(db_store, "DB_DURABILITY", "wal"):
+            run_with_initialized_temp_db(run_case)
+
+    def test_wardrobe_keyset_pagination_with_projection(self):
+        async def run_case():
+            created_ids = []
+            for index in range(5):
+                created_ids.append(await db_store.add_clothes(make_clothes("top", f"上衣{index}")))
+
+            seen_ids = []
+            cursor = None
+            while True:
+                items, cursor = await db_store.list_clothes_page(limit=2, cursor=cursor, fields=["item", "image_url"])
+                for item in items:
+                    self.assertEqual(set(item), {"item", "image_url"})
+                    seen_ids.append(int(item["item"].removeprefix("上衣")))
+                if cursor is None:
+                    break
+
+            # 同一秒内创建时按 id 倒序
+            self.assertEqual(seen_ids, [4, 3, 2, 1, 0])
+            self.assertEqual(await db_store.count_clothes_by_category(), {"top": 5})
+
+            with self.assertRaises(ValueError):
+                await db_store.list_clothes_page(fields=["password"])
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_default_wardrobe_page_queries_use_covering_indexes(self):
+        async def run_case():
+            fields = list(db_store.CLOTHES_LIST_DEFAULT_FIELDS)
+            cursor = db_store.encode_clothes_cursor("2026-04-10 10:00:00", 10)
+            cases = [
+                (None, "idx_clothes_list"),
+                ("top", "idx_clothes_canonical_category_list"),
+            ]
+            async with db_store.read_connection() as db:
+                for category, index_name in cases:
+                    sql, params = db_store.build_clothes_page_query(fields, 20, cursor, category)
+                    plan_cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                    plan = " ".join(row[-1] for row in await plan_cursor.fetchall())
+                    self.assertIn(f"USING COVERING INDEX {index_name}", plan)
+                    self.assertNotIn("TEMP B-TREE", plan)
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_find_clothes_by_tags_uses_canonical_values(self):
+        async def run_case():
+            commute_top = await db_store.add_clothes(
+                make_clothes("top", "风衣", season_semantics=["秋季"], usage_semantics=["上班"])
+            )
+            await db_store.add_clothes(
+                make_clothes("top", "短袖", season_semantics=["夏"], usage_semantics=["通勤"])
+            )
+            await db_store.add_clothes(
+                make_clothes("bottom", "西裤", season_semantics=["autumn"], usage_semantics=["commute"])
+            )
+
+            results = await db_store.find_clothes_by_tags(category="top", seasons={"秋", "冬"}, usages={"commute"})
+            self.assertEqual([item.id for item in results], [commute_top])
+
+            await db_store.update_clothes(
+                commute_top,
+                make_clothes("top", "风衣", season_semantics=["春"], usage_semantics=["上班"]),
+            )
+            self.assertEqual(await db_store.find_clothes_by_tags(category="top", seasons={"秋", "冬"}), [])
+
+        run_with_initialized_temp_db(run_case)
+
+
+if __name__ == "__main__":
+    unittest.main()
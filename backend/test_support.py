@@ -0,0 +1,152 @@
+"""
+后端测试共用的夹具：临时数据库、假天气、衣物构造、本地桩服务器与 ASGI 客户端。
+"""
+import asyncio
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+import main
+import storage.db as db_store
+import services.upload_pipeline as upload_pipeline
+import services.weather as weather_service
+from domain.clothes import ClothesCreate
+from services.weather import build_weather_cache_bucket
+
+
+def mock_weather(location: str):
+    return SimpleNamespace(
+        temperature=22.0,
+        feelsLike=23.0,
+        condition="晴",
+        icon="100",
+        humidity=55.0,
+        windDir="东北风",
+        windScale="3",
+        location="上海, 上海市, 中国",
+        obsTime="2026-04-10T10:00:00+08:00",
+    )
+
+
+def mock_weather_with_meta(location: str):
+    return mock_weather(location), weather_service.WeatherCacheInfo(
+        status="hit", bucket_start=build_weather_cache_bucket()
+    )
+
+
+def make_clothes(category: str, item: str, **overrides) -> ClothesCreate:
+    values = {
+        "category": category,
+        "item": item,
+        "style_semantics": ["休闲"],
+        "season_semantics": ["春", "秋"],
+        "usage_semantics": ["日常"],
+        "color_semantics": "黑色",
+        "description": f"{item}描述",
+        "image_filename": f"{item}.png",
+    }
+    values.update(overrides)
+    return ClothesCreate(**values)
+
+
+class KeepAliveStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StreamingLLMHandler(BaseHTTPRequestHandler):
+    """模拟 chat/completions 流式接口；server.fail_after 不为 None 时输出若干段后返回损坏的数据。"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for index, token in enumerate(self.server.tokens):
+            if self.server.fail_after is not None and index == self.server.fail_after:
+                self.wfile.write(b"data: {broken\n\n")
+                self.wfile.flush()
+                return
+            chunk = {"choices": [{"delta": {"content": token}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def running_stub_server(handler_class, **attributes):
+    """在本地随机端口启动桩服务器；attributes 挂到 server 上供 handler 读取。"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    server.daemon_threads = True
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def stub_server_url(server, path: str = "") -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def app_client(app=None) -> httpx.AsyncClient:
+    """直接调用 ASGI 应用的异步客户端（不经过网络，也不触发 lifespan）。"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app or main.app), base_url="http://testserver")
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def run_with_initialized_temp_db(async_case):
+    backup_db_path = db_store.DB_PATH
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_store.DB_PATH = Path(temp_dir) / "wardrobe.db"
+        try:
+            async def wrapped_case():
+                await db_store.init_db()
+                return await async_case()
+
+            return asyncio.run(wrapped_case())
+        finally:
+            db_store.DB_PATH = backup_db_path
+
+
+@contextmanager
+def patched_upload_pipeline(segment, analyze):
+    """上传目录指向临时目录，并替换去背景与语义分析；产出临时上传目录。"""
+    with tempfile.TemporaryDirectory() as upload_dir:
+        with patch.object(upload_pipeline, "UPLOAD_DIR", Path(upload_dir)), \
+                patch.object(upload_pipeline, "segment_image", new=segment), \
+                patch.object(upload_pipeline, "analyze_image", new=analyze):
+            yield Path(upload_dir)
@@ -0,0 +1,396 @@
+"""
+上传流水线测试：去背景执行器、异步任务、批量上传、去重、图片变体与视觉模型输入。
+"""
+import asyncio
+import base64
+from concurrent.futures import Future
+from io import BytesIO
+from pathlib import Path
+import json
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+import storage.db as db_store
+import domain.image_variants as image_variants
+import services.segment as segment_service
+import services.upload_jobs as upload_jobs
+import services.openai_compatible as openai_compatible
+from domain.clothes import ClothesSemantics
+from domain.config import LLMConfig, VisionImageSettings
+from api.uploads_static import UploadsStaticFiles
+from test_support import app_client, patched_upload_pipeline, run_with_initialized_temp_db
+
+
+class UploadPipelineTests(unittest.TestCase):
+    def test_segmentation_keeps_event_loop_responsive_with_backpressure(self):
+        release = threading.Event()
+        started_sizes = []
+
+        def blocking_remove(image, **kwargs):
+            started_sizes.append(image.size[0])
+            release.wait(5)
+            return image
+
+        def png_bytes(edge):
+            buffer = BytesIO()
+            segment_service.Image.new("RGBA", (edge, edge)).save(buffer, format="PNG")
+            return buffer.getvalue()
+
+        async def run_case():
+            first = asyncio.create_task(segment_service.remove_background_async(png_bytes(4)))
+            await asyncio.sleep(0)
+
+            # 抠图阻塞期间事件循环仍能及时调度其他协程
+            started = time.perf_counter()
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+            loop_elapsed = time.perf_counter() - started
+
+            # 不等待或等待超时都会被拒绝
+            with self.assertRaises(segment_service.SegmentationBusyError):
+                await segment_service.remove_background_async(png_bytes(4), wait_timeout=0)
+            with self.assertRaises(segment_service.SegmentationBusyError):
+                await segment_service.remove_background_async(png_bytes(4), wait_timeout=0.05)
+
+            # 在时限内等待的调用方按到达顺序获得空位
+            second = asyncio.create_task(segment_service.remove_background_async(png_bytes(5), wait_timeout=5))
+            third = asyncio.create_task(segment_service.remove_background_async(png_bytes(6), wait_timeout=5))
+            await asyncio.sleep(0.05)
+            waiting = segment_service.get_segment_stats()["waiting"]
+
+            release.set()
+            results = await asyncio.gather(first, second, third)
+            return loop_elapsed, waiting, results
+
+        with patch.object(segment_service, "rembg_remove", new=blocking_remove):
+            with patch.object(segment_service, "rembg_new_session", new=None):
+                with patch.object(segment_service, "SEGMENT_QUEUE_SIZE", 1):
+                    loop_elapsed, waiting, results = asyncio.run(run_case())
+
+        self.assertLess(loop_elapsed, 0.5)
+        self.assertEqual(waiting, 2)
+        self.assertTrue(all(result.startswith(b"\x89PNG") for result in results))
+        self.assertEqual(started_sizes, [4, 5, 6])
+        stats = segment_service.get_segment_stats()
+        self.assertEqual((stats["in_flight"], stats["waiting"]), (0, 0))
+
+        # 进程池模式下以子进程预热结果判断 session 是否已加载
+        warmup = Future()
+        with patch.object(segment_service, "SEGMENT_EXECUTOR", "process"), \
+                patch.object(segment_service, "_WARMUP", warmup):
+            self.assertFalse(segment_service.get_segment_stats()["session_loaded"])
+            warmup.set_result(True)
+            self.assertTrue(segment_service.get_segment_stats()["session_loaded"])
+
+    def test_upload_job_runs_in_background_and_streams_status(self):
+        semantics = ClothesSemantics(
+            category="上衣",
+            item="条纹衬衫",
+            style_semantics=["通勤"],
+            season_semantics=["春"],
+            usage_semantics=["上班"],
+            color_semantics="蓝白",
+            description="蓝白条纹衬衫",
+        )
+
+        async def run_case():
+            try:
+                async with app_client() as client:
+                    response = await client.post(
+                        "/api/upload/jobs",
+                        files={"file": ("shirt.png", b"raw-image", "image/png")},
+                    )
+                    self.assertEqual(response.status_code, 202)
+                    accepted = response.json()
+                    self.assertEqual(accepted["status"], "queued")
+
+                    # SSE 在任务结束后关闭，最后一个事件即最终状态
+                    events = await client.get(accepted["events_url"])
+                    status = await client.get(accepted["status_url"])
+                    missing = await client.get("/api/upload/jobs/not-a-job")
+            finally:
+                await upload_jobs.stop_upload_workers()
+
+            self.assertEqual(events.headers["content-type"].split(";")[0], "text/event-stream")
+            self.assertIn('"status":"succeeded"', events.text.strip().split("\n\n")[-1])
+            body = status.json()
+            self.assertEqual(body["status"], "succeeded")
+            self.assertEqual(body["clothes"]["item"], "条纹衬衫")
+            self.assertEqual(body["clothes"]["category"], "top")
+            self.assertEqual(len(list(upload_dir.iterdir())), 1)
+            self.assertEqual(missing.status_code, 404)
+
+        with patched_upload_pipeline(
+            segment=AsyncMock(return_value=b"processed"), analyze=AsyncMock(return_value=semantics)
+        ) as upload_dir:
+            run_with_initialized_temp_db(run_case)
+
+    def test_batch_upload_reports_per_item_results(self):
+        async def fake_analyze(processed_bytes):
+            if processed_bytes == b"processed-bad":
+                raise ValueError("无法识别")
+            name = processed_bytes.decode().split("-", 1)[1]
+            return ClothesSemantics(
+                category="bottom",
+                item=name,
+                style_semantics=["休闲"],
+                season_semantics=["秋"],
+                usage_semantics=["日常"],
+                color_semantics="蓝色",
+                description=f"{name}描述",
+            )
+
+        async def fake_segment(raw_bytes, wait_timeout=None):
+            return b"processed-" + raw_bytes
+
+        async def run_case():
+            version_before = db_store.get_wardrobe_version()
+            async with app_client() as client:
+                response = await client.post(
+                    "/api/upload/batch",
+                    params={"segment_concurrency": 1, "analyze_concurrency": 2},
+                    files=[
+                        ("files", ("a.png", "牛仔裤".encode(), "image/png")),
+                        ("files", ("b.png", b"bad", "image/png")),
+                        ("files", ("c.txt", b"text", "text/plain")),
+                        ("files", ("d.png", "半身裙".encode(), "image/png")),
+                    ],
+                )
+
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertEqual((body["succeeded"], body["failed"]), (2, 2))
+            self.assertEqual([item["status"] for item in body["items"]], ["succeeded", "failed", "failed", "succeeded"])
+            self.assertEqual(body["items"][0]["clothes"]["item"], "牛仔裤")
+            self.assertEqual(body["items"][3]["clothes"]["item"], "半身裙")
+            self.assertIn("无法识别", body["items"][1]["error"])
+            self.assertIn("只支持图片文件", body["items"][2]["error"])
+            # 成功条目在一个事务中写入，版本号只递增一次
+            self.assertEqual(db_store.get_wardrobe_version(), version_before + 1)
+            self.assertEqual(len(await db_store.get_all_clothes()), 2)
+
+        with patched_upload_pipeline(segment=fake_segment, analyze=fake_analyze):
+            run_with_initialized_temp_db(run_case)
+
+    def test_repeat_upload_reuses_processed_result_and_reports_duplicates(self):
+        def gradient_png(shift: int) -> bytes:
+            image = segment_service.Image.new("L", (64, 64))
+            image.putdata([min(255, x * 4 + shift) for y in range(64) for x in range(64)])
+            buffer = BytesIO()
+            image.save(buffer, format="PNG")
+            return buffer.getvalue()
+
+        semantics = ClothesSemantics(
+            category="top",
+            item="渐变T恤",
+            style_semantics=["休闲"],
+            season_semantics=["夏"],
+            usage_semantics=["日常"],
+            color_semantics="灰色",
+            description="灰色渐变T恤",
+        )
+        segment = AsyncMock(return_value=b"processed")
+        analyze = AsyncMock(return_value=semantics)
+
+        async def run_case():
+            async with app_client() as client:
+                responses = [
+                    await client.post("/api/upload", files={"file": ("a.png", image_bytes, "image/png")})
+                    for image_bytes in (gradient_png(0), gradient_png(0), gradient_png(3))
+                ]
+                duplicates = (await client.get("/api/wardrobe/duplicates")).json()
+
+            self.assertEqual([response.status_code for response in responses], [200, 200, 200])
+            self.assertEqual(
+                [response.headers["X-Upload-Dedup"] for response in responses],
+                ["miss", "hit", "miss"],
+            )
+            first, second, third = (response.json() for response in responses)
+            self.assertEqual(second["image_url"], first["image_url"])
+            self.assertNotEqual(third["image_url"], first["image_url"])
+            # 第二次上传完全跳过去背景与 LLM 分析
+            self.assertEqual(segment.await_count, 2)
+            self.assertEqual(analyze.await_count, 2)
+
+            pairs = {(pair["clothes_id"], pair["duplicate_of"]): pair for pair in duplicates["pairs"]}
+            self.assertTrue(pairs[(second["id"], first["id"])]["exact"])
+            self.assertFalse(pairs[(third["id"], first["id"])]["exact"])
+            self.assertLessEqual(pairs[(third["id"], first["id"])]["distance"], duplicates["max_distance"])
+
+        with patched_upload_pipeline(segment=segment, analyze=analyze):
+            run_with_initialized_temp_db(run_case)
+
+    def test_upload_generates_image_variants_served_with_immutable_cache(self):
+        image = segment_service.Image.new("RGBA", (1200, 900), (0, 0, 0, 0))
+        image.paste((20, 60, 200, 255), (100, 100, 1100, 800))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        processed_bytes = buffer.getvalue()
+
+        semantics = ClothesSemantics(
+            category="bottom",
+            item="蓝色长裤",
+            style_semantics=["休闲"],
+            season_semantics=["秋"],
+            usage_semantics=["日常"],
+            color_semantics="蓝色",
+            description="蓝色长裤",
+        )
+
+        async def run_case(upload_dir: Path):
+            async with app_client() as client:
+                response = await client.post("/api/upload", files={"file": ("a.png", b"raw", "image/png")})
+                wardrobe = (await client.get("/api/wardrobe")).json()
+                listing = (await client.get("/api/wardrobe/items", params={"fields": "id,image_variants"})).json()
+
+            self.assertEqual(response.status_code, 200)
+            item = response.json()
+            variants = item["image_variants"]
+            self.assertEqual(set(variants), set(image_variants.VARIANT_NAMES))
+            self.assertEqual(wardrobe["bottoms"][0]["image_variants"], variants)
+            self.assertEqual(listing["items"][0]["image_variants"], variants)
+            for url in variants.values():
+                self.assertTrue((upload_dir / Path(url).name).exists())
+
+            # 删除缩略图后首次请求时按需重新生成
+            thumb_name = Path(variants["thumb"]).name
+            (upload_dir / thumb_name).unlink()
+            static_app = Starlette(routes=[Mount("/uploads", app=UploadsStaticFiles(directory=str(upload_dir)))])
+            async with app_client(static_app) as client:
+                thumb = await client.get(variants["thumb"])
+                original = await client.get(item["image_url"])
+
+            self.assertEqual(thumb.status_code, 200)
+            self.assertIn("immutable", thumb.headers["cache-control"])
+            self.assertNotIn("immutable", original.headers.get("cache-control", ""))
+            with segment_service.Image.open(BytesIO(thumb.content)) as served:
+                self.assertEqual(served.format, image_variants.VARIANT_EXTENSION.upper())
+                self.assertEqual(max(served.size), image_variants.IMAGE_THUMB_EDGE)
+            self.assertLess(len(thumb.content), len(processed_bytes))
+
+        with patched_upload_pipeline(
+            segment=AsyncMock(return_value=processed_bytes), analyze=AsyncMock(return_value=semantics)
+        ) as upload_dir:
+            run_with_initialized_temp_db(lambda: run_case(upload_dir))
+
+    def test_unfinished_upload_jobs_are_recovered_on_startup(self):
+        semantics = ClothesSemantics(
+            category="shoes",
+            item="帆布鞋",
+            style_semantics=["休闲"],
+            season_semantics=["夏"],
+            usage_semantics=["日常"],
+            color_semantics="白色",
+            description="白色帆布鞋",
+        )
+
+        async def run_case():
+            input_path = upload_jobs.job_input_dir() / "interrupted.png"
+            input_path.parent.mkdir(parents=True, exist_ok=True)
+            input_path.write_bytes(b"raw-image")
+            await db_store.create_job("interrupted", upload_jobs.UPLOAD_JOB_KIND, str(input_path))
+            await db_store.update_job("interrupted", "running", stage="analyze")
+
+            try:
+                await upload_jobs.start_upload_workers()
+                await upload_jobs._RUNTIME.queue.join()
+            finally:
+                await upload_jobs.stop_upload_workers()
+
+            job = await upload_jobs.get_upload_job_status("interrupted")
+            self.assertEqual(job.status, "succeeded")
+            self.assertEqual(job.attempts, 1)
+            self.assertEqual(job.clothes.item, "帆布鞋")
+            self.assertFalse(input_path.exists())
+
+        with patched_upload_pipeline(
+            segment=AsyncMock(return_value=b"processed"), analyze=AsyncMock(return_value=semantics)
+        ):
+            run_with_initialized_temp_db(run_case)
+
+    def test_failed_upload_jobs_remove_their_raw_input(self):
+        async def run_case():
+            input_dir = upload_jobs.job_input_dir()
+            input_dir.mkdir(parents=True, exist_ok=True)
+            broken_path = input_dir / "broken.png"
+            broken_path.write_bytes(b"raw-image")
+            await db_store.create_job("broken", upload_jobs.UPLOAD_JOB_KIND, str(broken_path))
+            # 多次中断的任务在恢复时直接放弃
+            abandoned_path = input_dir / "abandoned.png"
+            abandoned_path.write_bytes(b"raw-image")
+            await db_store.create_job("abandoned", upload_jobs.UPLOAD_JOB_KIND, str(abandoned_path))
+            for _ in range(upload_jobs.UPLOAD_JOB_MAX_ATTEMPTS):
+                await db_store.requeue_job("abandoned")
+
+            try:
+                await upload_jobs.start_upload_workers()
+                await upload_jobs._RUNTIME.queue.join()
+            finally:
+                await upload_jobs.stop_upload_workers()
+
+            broken = await upload_jobs.get_upload_job_status("broken")
+            self.assertEqual(broken.status, "failed")
+            self.assertIn("无法识别", broken.error)
+            abandoned = await upload_jobs.get_upload_job_status("abandoned")
+            self.assertEqual(abandoned.status, "failed")
+            self.assertEqual(list(input_dir.iterdir()), [])
+
+        with patched_upload_pipeline(
+            segment=AsyncMock(return_value=b"processed"), analyze=AsyncMock(side_effect=ValueError("无法识别"))
+        ):
+            run_with_initialized_temp_db(run_case)
+
+    def test_vision_image_is_cropped_resized_and_reencoded_per_model(self):
+        # 2000x1500 透明画布中央一块 400x800 的不透明衣物
+        image = segment_service.Image.new("RGBA", (2000, 1500), (0, 0, 0, 0))
+        image.paste((200, 30, 30, 255), (800, 350, 1200, 1150))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        image_bytes = buffer.getvalue()
+
+        config = LLMConfig(
+            api_key="test-key",
+            model="vision-small",
+            vision_image_overrides={"vision-small": VisionImageSettings(format="webp", max_edge=256, padding=0)},
+        )
+        captured = {}
+
+        async def fake_transport(transport, request):
+            captured["payload"] = json.loads(request.content)
+            content = json.dumps({
+                "category": "top",
+                "item": "红色上衣",
+                "style_semantics": [],
+                "season_semantics": [],
+                "usage_semantics": [],
+                "color_semantics": "红色",
+                "description": "红色上衣",
+            }, ensure_ascii=False)
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]}, request=request)
+
+        with patch.object(openai_compatible, "load_config", return_value=config):
+            with patch.object(httpx.AsyncHTTPTransport, "handle_async_request", new=fake_transport):
+                semantics = asyncio.run(openai_compatible.analyze_clothes_openai(image_bytes))
+
+        self.assertEqual(semantics.item, "红色上衣")
+        url = captured["payload"]["messages"][0]["content"][1]["image_url"]["url"]
+        prefix = "data:image/webp;base64,"
+        self.assertTrue(url.startswith(prefix))
+        sent_bytes = base64.b64decode(url[len(prefix):])
+        self.assertLess(len(sent_bytes), len(image_bytes))
+        with segment_service.Image.open(BytesIO(sent_bytes)) as sent:
+            self.assertEqual(sent.format, "WEBP")
+            self.assertEqual(sent.size, (128, 256))
+
+        # 未覆盖的模型使用默认设置（JPEG）
+        self.assertEqual(config.vision_image_for("other-model").format, "jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,637 @@
+"""
+天气与地理编码测试：天气缓存、陈旧数据回源、多源地理编码、共享 HTTP 客户端、single-flight 与预热。
+"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+import storage.db as db_store
+import services.http_client as http_client_registry
+import services.weather as weather_service
+import services.recommendation as recommendation_service
+import services.horoscope as horoscope_service
+import services.prewarm as prewarm_service
+from api.http_cache import make_etag
+from services.singleflight import SingleFlight
+from domain.config import LLMConfig
+from services.weather import build_weather_cache_bucket, build_weather_cache_key
+from test_support import (
+    KeepAliveStubHandler,
+    app_client,
+    mock_weather,
+    run_with_initialized_temp_db,
+    running_stub_server,
+    stub_server_url,
+)
+
+
+class WeatherGeocodingTests(unittest.TestCase):
+    def test_get_weather_uses_db_cache_before_provider(self):
+        async def run_case():
+            cache_key = build_weather_cache_key("121.4737,31.2304")
+            bucket = build_weather_cache_bucket()
+
+            await db_store.upsert_weather_cache(
+                cache_key,
+                bucket,
+                {
+                    "temperature": 18.5,
+                    "feelsLike": 19.0,
+                    "condition": "多云",
+                    "icon": "102",
+                    "humidity": 63.0,
+                    "windDir": "东北风",
+                    "windScale": "2",
+                    "location": "上海, 上海市, 中国",
+                    "obsTime": "2026-04-11T10:00:00+08:00",
+                },
+            )
+
+            with patch("services.weather.resolve_location", new=AsyncMock(return_value=("121.4737,31.2304", "上海, 上海市, 中国"))):
+                with patch("services.weather.get_qweather_now", new=AsyncMock(side_effect=AssertionError("provider should not be called"))):
+                    weather = await weather_service.get_weather("上海, 上海市, 中国")
+
+            self.assertIsNotNone(weather)
+            self.assertEqual(weather.condition, "多云")
+            self.assertEqual(weather.temperature, 18.5)
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_get_weather_falls_back_to_latest_cached_when_provider_fails(self):
+        async def run_case():
+            cache_key = build_weather_cache_key("121.9999,31.9999")
+
+            await db_store.upsert_weather_cache(
+                cache_key,
+                "2000-01-01T00",
+                {
+                    "temperature": 16.0,
+                    "feelsLike": 15.0,
+                    "condition": "阴",
+                    "icon": "104",
+                    "humidity": 70.0,
+                    "windDir": "北风",
+                    "windScale": "3",
+                    "location": "上海, 上海市, 中国",
+                    "obsTime": "2000-01-01T00:00:00+08:00",
+                },
+            )
+
+            with patch("services.weather.resolve_location", new=AsyncMock(return_value=("121.9999,31.9999", "上海, 上海市, 中国"))):
+                with patch("services.weather.get_qweather_now", new=AsyncMock(return_value=None)):
+                    weather = await weather_service.get_weather("上海, 上海市, 中国")
+
+            self.assertIsNotNone(weather)
+            self.assertEqual(weather.condition, "阴")
+            self.assertEqual(weather.temperature, 16.0)
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_weather_cache_info_describes_fallback_row_when_provider_fails(self):
+        location = "上海, 上海市, 中国"
+        cache_key = build_weather_cache_key("121.9999,31.9999")
+
+        async def run_case():
+            await db_store.upsert_weather_cache(
+                cache_key,
+                "2000-01-01T00",
+                {
+                    "temperature": 16.0, "feelsLike": 15.0, "condition": "阴", "icon": "104", "humidity": 70.0,
+                    "windDir": "北风", "windScale": "3", "location": location, "obsTime": "2000-01-01T00:00:00+08:00",
+                },
+            )
+            # 超出可接受的陈旧时长，只能在上游失败后兜底返回
+            async with db_store.write_connection() as db:
+                await db.execute(
+                    "UPDATE weather_cache SET updated_at = datetime('now', '-3 hours') WHERE location_key = ?",
+                    (cache_key,),
+                )
+
+            with patch.object(weather_service, "resolve_location", new=AsyncMock(return_value=("121.9999,31.9999", location))), \
+                    patch.object(weather_service, "get_qweather_now", new=AsyncMock(return_value=None)), \
+                    patch.object(weather_service, "WEATHER_STALE_MAX_SECONDS", 3600):
+                weather, cache_info = await weather_service.get_weather_with_meta(location)
+
+            self.assertEqual(weather.temperature, 16.0)
+            # 缓存状态、时间桶与数据年龄描述的是实际返回的旧缓存，且兜底数据不写入当前时间桶
+            self.assertEqual(cache_info.status, "fallback")
+            self.assertEqual(cache_info.bucket_start, "2000-01-01T00")
+            self.assertGreaterEqual(cache_info.age, 3 * 3600)
+            self.assertIsNone(await db_store.get_weather_cache(cache_key, build_weather_cache_bucket()))
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_weather_serves_stale_bucket_and_revalidates_in_background(self):
+        location = "上海, 上海市, 中国"
+        cache_key = build_weather_cache_key("121.4737,31.2304")
+        upstream_started = asyncio.Event()
+        release_upstream = asyncio.Event()
+
+        async def slow_qweather_now(resolved):
+            upstream_started.set()
+            await release_upstream.wait()
+            return SimpleNamespace(now=SimpleNamespace(
+                temp="25", feelsLike="26", text="晴", icon="100", humidity="40",
+                windDir="南风", windScale="1", obsTime="2026-04-11T11:00",
+            ))
+
+        def payload(temperature, obs_time):
+            return {
+                "temperature": temperature, "feelsLike": temperature, "condition": "多云", "icon": "101",
+                "humidity": 60.0, "windDir": "东风", "windScale": "2", "location": location, "obsTime": obs_time,
+            }
+
+        async def run_case():
+            await db_store.upsert_weather_cache(cache_key, "2026-04-11T10", payload(18.0, "2026-04-11T10:00"))
+            await db_store.upsert_weather_cache("expired-key", "2026-04-11T08", payload(12.0, "2026-04-11T08:00"))
+            async with db_store.write_connection() as db:
+                await db.execute(
+                    "UPDATE weather_cache SET updated_at = datetime('now', '-600 seconds') WHERE location_key = ?",
+                    (cache_key,),
+                )
+                await db.execute(
+                    "UPDATE weather_cache SET updated_at = datetime('now', '-3 hours') WHERE location_key = 'expired-key'"
+                )
+
+            with patch.object(weather_service, "resolve_location",
+                              new=AsyncMock(return_value=("121.4737,31.2304", location))), \
+                    patch.object(weather_service, "get_qweather_now", new=slow_qweather_now), \
+                    patch.object(weather_service, "WEATHER_STALE_MAX_SECONDS", 3600):
+                async with app_client() as client:
+                    # 上游被挂起时请求仍立即返回旧时间桶的数据
+                    stale = await asyncio.wait_for(client.get("/api/weather", params={"location": location}), 2)
+                    await asyncio.wait_for(upstream_started.wait(), 2)
+                    release_upstream.set()
+                    while weather_service._REVALIDATE_TASKS:
+                        await asyncio.sleep(0.01)
+                    fresh = await client.get(
+                        "/api/weather", params={"location": location}, headers={"If-None-Match": stale.headers["etag"]}
+                    )
+
+                # 超出可接受的陈旧时长时同步请求上游
+                with patch.object(weather_service, "resolve_location",
+                                  new=AsyncMock(return_value=("expired-key", location))):
+                    _, expired_info = await weather_service.get_weather_with_meta(location)
+            return stale, fresh, expired_info
+
+        stale, fresh, expired_info = run_with_initialized_temp_db(run_case)
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.headers["x-cache"], "stale")
+        self.assertGreaterEqual(int(stale.headers["age"]), 600)
+        self.assertEqual(stale.json()["temperature"], 18.0)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.headers["x-cache"], "hit")
+        self.assertLess(int(fresh.headers["age"]), 60)
+        self.assertEqual(fresh.json()["temperature"], 25.0)
+        self.assertNotEqual(fresh.headers["etag"], stale.headers["etag"])
+        self.assertEqual(expired_info.status, "miss")
+
+    def test_shutdown_cancels_background_weather_revalidation(self):
+        location = "上海, 上海市, 中国"
+        cache_key = build_weather_cache_key("121.4737,31.2304")
+        upstream_started = asyncio.Event()
+        upstream_cancelled = []
+
+        async def hanging_qweather_now(resolved):
+            upstream_started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                upstream_cancelled.append(resolved)
+                raise
+
+        async def run_case():
+            await db_store.upsert_weather_cache(cache_key, "2026-04-11T10", {
+                "temperature": 18.0, "feelsLike": 18.0, "condition": "多云", "icon": "101", "humidity": 60.0,
+                "windDir": "东风", "windScale": "2", "location": location, "obsTime": "2026-04-11T10:00",
+            })
+            with patch.object(weather_service, "resolve_location",
+                              new=AsyncMock(return_value=("121.4737,31.2304", location))), \
+                    patch.object(weather_service, "get_qweather_now", new=hanging_qweather_now), \
+                    patch.object(weather_service, "WEATHER_STALE_MAX_SECONDS", 24 * 3600):
+                _, cache_info = await weather_service.get_weather_with_meta(location)
+                await asyncio.wait_for(upstream_started.wait(), 2)
+                await asyncio.wait_for(weather_service.stop_weather_revalidation(), 2)
+            return cache_info
+
+        cache_info = run_with_initialized_temp_db(run_case)
+        self.assertEqual(cache_info.status, "stale")
+        self.assertEqual(upstream_cancelled, ["121.4737,31.2304"])
+        self.assertEqual(weather_service.get_weather_cache_stats()["revalidating"], 0)
+        self.assertEqual(weather_service._weather_flight.in_flight(), 0)
+
+    def test_weather_etag_is_withheld_until_current_bucket_is_cached(self):
+        location = "上海, 上海市, 中国"
+        upstream = [None, SimpleNamespace(now=SimpleNamespace(
+            temp="25", feelsLike="26", text="多云", icon="101", humidity="40",
+            windDir="南风", windScale="1", obsTime="2026-04-11T11:00",
+        ))]
+
+        async def flaky_qweather_now(resolved):
+            return upstream.pop(0)
+
+        async def run_case():
+            with patch.object(weather_service, "resolve_location",
+                              new=AsyncMock(return_value=("121.4737,31.2304", location))), \
+                    patch.object(weather_service, "get_qweather_now", new=flaky_qweather_now):
+                async with app_client() as client:
+                    # 上游失败：返回模拟数据，不发 ETag 且禁止缓存
+                    failed = await client.get("/api/weather", params={"location": location})
+                    # 同一时间桶内上游恢复：客户端拿到真实数据与当前时间桶的 ETag
+                    recovered = await client.get("/api/weather", params={"location": location})
+                    revalidated = await client.get(
+                        "/api/weather", params={"location": location},
+                        headers={"If-None-Match": recovered.headers["etag"]},
+                    )
+            return failed, recovered, revalidated
+
+        failed, recovered, revalidated = run_with_initialized_temp_db(run_case)
+        self.assertEqual(failed.status_code, 200)
+        self.assertEqual(failed.json()["temperature"], 20.0)
+        self.assertEqual(failed.headers["x-cache"], "mock")
+        self.assertNotIn("etag", failed.headers)
+        self.assertEqual(failed.headers["cache-control"], "no-store")
+        self.assertEqual(recovered.status_code, 200)
+        self.assertEqual(recovered.json()["temperature"], 25.0)
+        self.assertEqual(recovered.headers["x-cache"], "miss")
+        self.assertEqual(recovered.headers["cache-control"], "no-cache")
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(upstream, [])
+
+    def test_weather_fallback_uses_the_old_bucket_etag_until_upstream_recovers(self):
+        location = "上海, 上海市, 中国"
+        cache_key = build_weather_cache_key("121.4737,31.2304")
+        upstream = [None, SimpleNamespace(now=SimpleNamespace(
+            temp="25", feelsLike="26", text="多云", icon="101", humidity="40",
+            windDir="南风", windScale="1", obsTime="2026-04-11T11:00",
+        ))]
+
+        async def flaky_qweather_now(resolved):
+            return upstream.pop(0)
+
+        async def run_case():
+            await db_store.upsert_weather_cache(cache_key, "2000-01-01T00", {
+                "temperature": 16.0, "feelsLike": 15.0, "condition": "阴", "icon": "104", "humidity": 70.0,
+                "windDir": "北风", "windScale": "3", "location": location, "obsTime": "2000-01-01T00:00:00+08:00",
+            })
+            # 超出可接受的陈旧时长，只能在上游失败后兜底返回
+            async with db_store.write_connection() as db:
+                await db.execute(
+                    "UPDATE weather_cache SET updated_at = datetime('now', '-3 hours') WHERE location_key = ?",
+                    (cache_key,),
+                )
+
+            with patch.object(weather_service, "resolve_location",
+                              new=AsyncMock(return_value=("121.4737,31.2304", location))), \
+                    patch.object(weather_service, "get_qweather_now", new=flaky_qweather_now), \
+                    patch.object(weather_service, "WEATHER_STALE_MAX_SECONDS", 3600):
+                async with app_client() as client:
+                    fallback = await client.get("/api/weather", params={"location": location})
+                    # 上游恢复后，带着旧时间桶 ETag 的条件请求拿到新数据
+                    recovered = await client.get(
+                        "/api/weather", params={"location": location},
+                        headers={"If-None-Match": fallback.headers["etag"]},
+                    )
+            return fallback, recovered
+
+        fallback, recovered = run_with_initialized_temp_db(run_case)
+        self.assertEqual(fallback.status_code, 200)
+        self.assertEqual(fallback.json()["temperature"], 16.0)
+        self.assertEqual(fallback.headers["x-cache"], "fallback")
+        self.assertEqual(fallback.headers["cache-control"], "no-cache")
+        self.assertEqual(
+            fallback.headers["etag"],
+            make_etag("weather", weather_service.build_geocode_cache_key(location), "2000-01-01T00"),
+        )
+        self.assertEqual(recovered.status_code, 200)
+        self.assertEqual(recovered.json()["temperature"], 25.0)
+        self.assertEqual(recovered.headers["x-cache"], "miss")
+        self.assertNotEqual(recovered.headers["etag"], fallback.headers["etag"])
+        self.assertEqual(upstream, [])
+
+    def test_warm_cache_weather_request_makes_no_outbound_http(self):
+        async def run_case():
+            location = "上海, 上海市, 中国"
+            await db_store.upsert_geocode_cache(
+                weather_service.build_geocode_cache_key(location),
+                "121.4737,31.2304",
+                location,
+            )
+            await db_store.upsert_weather_cache(
+                build_weather_cache_key("121.4737,31.2304"),
+                build_weather_cache_bucket(),
+                {
+                    "temperature": 21.0,
+                    "feelsLike": 21.5,
+                    "condition": "晴",
+                    "icon": "100",
+                    "humidity": 50.0,
+                    "windDir": "南风",
+                    "windScale": "1",
+                    "location": location,
+                    "obsTime": "2026-04-11T10:00:00+08:00",
+                },
+            )
+
+            outbound = AsyncMock(side_effect=AssertionError("outbound HTTP should not happen"))
+            with patch.object(httpx.AsyncHTTPTransport, "handle_async_request", new=outbound):
+                async with app_client() as client:
+                    response = await client.get("/api/weather", params={"location": location})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["condition"], "晴")
+            outbound.assert_not_called()
+
+        run_with_initialized_temp_db(run_case)
+
+    def test_search_city_parallel_keeps_sequential_ranking_and_breaks_dead_provider(self):
+        calls = {"open_meteo": 0, "nominatim": 0}
+
+        async def fake_transport(transport, request):
+            if request.url.host == "nominatim.openstreetmap.org":
+                calls["nominatim"] += 1
+                raise httpx.ConnectError("nominatim down", request=request)
+            calls["open_meteo"] += 1
+            name = request.url.params["name"]
+            # 第一个查询变体最慢返回，但合并时仍应排在最前
+            if name == "上海, 上海市, 中国":
+                await asyncio.sleep(0.05)
+                latitude = 31.2304
+            else:
+                latitude = 31.1
+            row = {
+                "name": "上海",
+                "latitude": latitude,
+                "longitude": 121.4737,
+                "admin1": "上海市",
+                "country": "中国",
+                "feature_code": "PPLA",
+            }
+            return httpx.Response(200, json={"results": [row]}, request=request)
+
+        breakers = {
+            provider: weather_service.ProviderCircuitBreaker(provider, threshold=2, cooldown=60)
+            for provider in ("open_meteo", "nominatim")
+        }
+
+        async def run_case():
+            with patch.dict(weather_service.GEOCODING_BREAKERS, breakers):
+                with patch.object(httpx.AsyncHTTPTransport, "handle_async_request", new=fake_transport):
+                    first = await weather_service.search_city("上海, 上海市, 中国", limit=5)
+                    second = await weather_service.search_city("上海, 上海市, 中国", limit=5)
+            return first, second
+
+        first, second = asyncio.run(run_case())
+
+        self.assertEqual(first[0].id, weather_service.format_coordinate_id(31.2304, 121.4737))
+        self.assertEqual([city.id for city in first], [city.id for city in second])
+        self.assertEqual(calls["open_meteo"], 6)
+        # Nominatim 第一次搜索失败两次后熔断，第二次搜索不再请求
+        self.assertEqual(calls["nominatim"], 2)
+        self.assertTrue(breakers["nominatim"].stats()["open"])
+
+    def test_exact_match_early_stop_keeps_the_higher_ranked_later_result(self):
+        nominatim_id = weather_service.format_coordinate_id(31.2304, 121.4737)
+        delays = {}
+
+        async def fake_transport(transport, request):
+            if request.url.host == "nominatim.openstreetmap.org":
+                await asyncio.sleep(delays["nominatim"])
+                # 完全匹配 + 高 importance 城市：总分高于 Open-Meteo 的完全匹配
+                row = {"name": "上海", "lat": "31.2304", "lon": "121.4737", "importance": 1.0,
+                       "addresstype": "city", "address": {"state": "上海市", "country": "中国"}}
+                return httpx.Response(200, json=[row], request=request)
+            await asyncio.sleep(delays["open_meteo"])
+            row = {"name": "上海", "latitude": 31.1, "longitude": 121.4, "admin1": "上海市",
+                   "country": "中国", "feature_code": "PPLA"}
+            return httpx.Response(200, json={"results": [row]}, request=request)
+
+        breakers = {
+            provider: weather_service.ProviderCircuitBreaker(provider, threshold=5, cooldown=60)
+            for provider in ("open_meteo", "nominatim")
+        }
+
+        async def search(stop_on_exact_match):
+            return await asyncio.wait_for(
+                weather_service.search_city("上海", limit=1, stop_on_exact_match=stop_on_exact_match), 2
+            )
+
+        async def run_case():
+            with patch.dict(weather_service.GEOCODING_BREAKERS, breakers), \
+                    patch.object(httpx.AsyncHTTPTransport, "handle_async_request", new=fake_transport):
+                # Open-Meteo 先返回完全匹配，但仍需等待可能排名更高的 Nominatim
+                delays.update(open_meteo=0, nominatim=0.05)
+                later_wins = await search(True)
+                full_ranking = await search(False)
+                # Nominatim 先返回且 Open-Meteo 不可能超过它时，不再等待慢请求
+                delays.update(open_meteo=5, nominatim=0)
+                settled_early = await search(True)
+            return later_wins, full_ranking, settled_early
+
+        later_wins, full_ranking, settled_early = asyncio.run(run_case())
+
+        self.assertEqual([city.id for city in full_ranking], [nominatim_id])
+        self.assertEqual([city.id for city in later_wins], [nominatim_id])
+        self.assertEqual([city.id for city in settled_early], [nominatim_id])
+        self.assertFalse(breakers["open_meteo"].stats()["open"])
+
+    def test_builtin_city_fallback_is_not_written_to_geocode_cache(self):
+        location = "浦东新区, 上海, 中国"
+        pudong = weather_service.CityInfo(
+            name="浦东新区", id=weather_service.format_coordinate_id(31.2215, 121.5447),
+            adm1="上海市", adm2="", country="中国", lat="31.2215", lon="121.5447",
+        )
+
+        async def run_case():
+            cache_key = weather_service.build_geocode_cache_key(location)
+            # 所有地理编码源失败：按内置城市模糊匹配到“上海”，但不写入缓存
+            with patch.object(weather_service, "_run_geocoding_jobs", new=AsyncMock(return_value=([], True))):
+                guessed = await weather_service.resolve_location(location)
+            guessed_cache = await db_store.get_geocode_cache(cache_key, weather_service.GEOCODE_CACHE_TTL_SECONDS)
+
+            # 地理编码恢复后重新解析并缓存真实结果
+            with patch.object(weather_service, "_run_geocoding_jobs",
+                              new=AsyncMock(return_value=([[(pudong, 100, 0)]], False))):
+                resolved = await weather_service.resolve_location(location)
+            cached = await db_store.get_geocode_cache(cache_key, weather_service.GEOCODE_CACHE_TTL_SECONDS)
+            return guessed, guessed_cache, resolved, cached
+
+        guessed, guessed_cache, resolved, cached = run_with_initialized_temp_db(run_case)
+        self.assertEqual(guessed[0], weather_service.format_coordinate_id(31.2304, 121.4737))
+        self.assertIsNone(guessed_cache)
+        self.assertEqual(resolved[0], pudong.id)
+        self.assertEqual(cached["resolved_location"], pudong.id)
+
+    def test_shared_http_client_reuses_connections(self):
+        with running_stub_server(KeepAliveStubHandler) as server:
+            url = stub_server_url(server, "/stub")
+
+            async def run_case():
+                await http_client_registry.start_http_clients()
+                try:
+                    before = http_client_registry.get_http_client_stats()["upstreams"]["weather"]
+                    clients = set()
+                    for _ in range(3):
+                        async with http_client_registry.http_client("weather") as client:
+                            clients.add(id(client))
+                            response = await client.get(url)
+                            self.assertEqual(response.status_code, 200)
+                    after = http_client_registry.get_http_client_stats()["upstreams"]["weather"]
+                finally:
+                    await http_client_registry.close_http_clients()
+                return clients, before, after
+
+            clients, before, after = asyncio.run(run_case())
+
+        self.assertEqual(len(clients), 1)
+        self.assertEqual(after["requests"] - before["requests"], 3)
+        self.assertEqual(after["new_connections"] - before["new_connections"], 1)
+        self.assertFalse(http_client_registry.get_http_client_stats()["shared"])
+
+    def test_concurrent_cache_misses_share_a_single_upstream_call(self):
+        calls = {"aztro": 0, "reasoning": 0, "weather": 0, "llm": 0}
+
+        async def slow(name, result):
+            calls[name] += 1
+            await asyncio.sleep(0.05)
+            return result
+
+        weather_response = SimpleNamespace(now=SimpleNamespace(
+            temp="18", feelsLike="17", text="多云", icon="101", humidity="60",
+            windDir="东风", windScale="2", obsTime="2026-04-10T10:00",
+        ))
+
+        async def run_case():
+            with patch.object(horoscope_service, "fetch_aztro_horoscope",
+                              new=lambda **kwargs: slow("aztro", {"description": "平稳", "color": "Blue"})), \
+                    patch.object(horoscope_service, "generate_llm_reasoning",
+                                 new=lambda **kwargs: slow("reasoning", ("推理结果", "done", ""))), \
+                    patch.object(weather_service, "get_qweather_now", new=lambda location: slow("weather", weather_response)), \
+                    patch.object(recommendation_service, "_generate_llm_text",
+                                 new=lambda config, inputs, key: slow("llm", "共享文案")), \
+                    patch.object(recommendation_service, "load_config", return_value=LLMConfig(api_key="k", model="m")):
+                weather = mock_weather("")
+                horoscopes = await asyncio.gather(*[
+                    horoscope_service.get_daily_horoscope(weather, zodiac_sign="leo") for _ in range(5)
+                ])
+                weathers = await asyncio.gather(*[weather_service.get_weather("31.23,121.47") for _ in range(5)])
+                # 时间桶已写入缓存，之后的请求直接命中
+                await weather_service.get_weather("31.23,121.47")
+                texts = await asyncio.gather(*[
+                    recommendation_service.get_llm_recommendation(
+                        weather, horoscopes[0], recommendation_service.build_temperature_profile(weather),
+                        {}, {}, [], [], "", "", bypass_cache=True,
+                    )
+                    for _ in range(5)
+                ])
+            return horoscopes, weathers, texts
+
+        horoscopes, weathers, texts = run_with_initialized_temp_db(run_case)
+        self.assertEqual(calls, {"aztro": 1, "reasoning": 1, "weather": 1, "llm": 1})
+        self.assertTrue(all(h["llm_reasoning"] == "推理结果" and h["llm_status"] == "done" for h in horoscopes))
+        self.assertEqual({w.temperature for w in weathers}, {18.0})
+        self.assertEqual(set(texts), {"共享文案"})
+
+        async def primitive_case():
+            flight = SingleFlight("test")
+            started = asyncio.Event()
+
+            async def upstream():
+                started.set()
+                await asyncio.sleep(0.05)
+                return "ok"
+
+            leader = asyncio.ensure_future(flight.do("k", upstream))
+            await started.wait()
+            follower = asyncio.ensure_future(flight.do("k", upstream))
+            await asyncio.sleep(0)
+            # 首个调用者取消不影响共享同一调用的其他等待者
+            leader.cancel()
+            result = await follower
+
+            async def failing():
+                await asyncio.sleep(0.01)
+                raise RuntimeError("upstream down")
+
+            errors = await asyncio.gather(flight.do("e", failing), flight.do("e", failing), return_exceptions=True)
+            return result, leader.cancelled(), errors, flight.stats()
+
+        result, leader_cancelled, errors, stats = asyncio.run(primitive_case())
+        self.assertEqual(result, "ok")
+        self.assertTrue(leader_cancelled)
+        self.assertTrue(all(isinstance(error, RuntimeError) for error in errors))
+        self.assertEqual(stats, {"in_flight": 0, "executed": 2, "shared": 2, "failed": 1})
+
+    def test_prewarm_fills_next_weather_bucket_and_daily_horoscope(self):
+        self.assertEqual(
+            prewarm_service.next_weather_run(datetime(2026, 4, 10, 10, 30), lead_seconds=120),
+            (datetime(2026, 4, 10, 10, 58), datetime(2026, 4, 10, 11, 0)),
+        )
+        self.assertEqual(
+            prewarm_service.next_weather_run(datetime(2026, 4, 10, 10, 59), lead_seconds=120),
+            (datetime(2026, 4, 10, 11, 58), datetime(2026, 4, 10, 12, 0)),
+        )
+        self.assertEqual(
+            prewarm_service.next_horoscope_run(datetime(2026, 4, 10, 10, 30), delay_seconds=300),
+            datetime(2026, 4, 11, 0, 5),
+        )
+        self.assertEqual(
+            prewarm_service.next_horoscope_run(datetime(2026, 4, 10, 0, 1), delay_seconds=300),
+            datetime(2026, 4, 10, 0, 5),
+        )
+
+        upstream_calls = []
+        reasoning_calls = []
+
+        async def fake_qweather_now(location):
+            upstream_calls.append(location)
+            return SimpleNamespace(now=SimpleNamespace(
+                temp="18", feelsLike="17", text="多云", icon="101", humidity="60",
+                windDir="东风", windScale="2", obsTime="2026-04-10T10:58",
+            ))
+
+        async def fake_reasoning(**kwargs):
+            reasoning_calls.append(kwargs["sign_key"])
+            return "推理结果", "done", ""
+
+        config = LLMConfig(weather_location="31.23,121.47", zodiac_sign="狮子座")
+
+        async def run_case():
+            weather_service._RECENT_LOCATIONS.clear()
+            with patch.object(weather_service, "get_qweather_now", new=fake_qweather_now), \
+                    patch.object(horoscope_service, "fetch_aztro_horoscope", new=AsyncMock(return_value=None)), \
+                    patch.object(horoscope_service, "generate_llm_reasoning", new=fake_reasoning), \
+                    patch.object(prewarm_service, "load_config", return_value=config):
+                # 用户请求记录最近地点；与设置中的城市重复的地点只预热一次
+                await weather_service.get_weather("31.23,121.47")
+                await weather_service.get_weather("39.90,116.40")
+                upstream_calls.clear()
+                first = await prewarm_service.run_weather_prewarm("2026-04-10T11")
+                second = await prewarm_service.run_weather_prewarm("2026-04-10T11")
+                resolved, _ = await weather_service.resolve_location("39.90,116.40")
+                warmed = await db_store.get_weather_cache(weather_service.build_weather_cache_key(resolved), "2026-04-10T11")
+
+                first_horoscope = await prewarm_service.run_horoscope_prewarm()
+                second_horoscope = await prewarm_service.run_horoscope_prewarm()
+            return first, second, warmed, first_horoscope, second_horoscope
+
+        first, second, warmed, first_horoscope, second_horoscope = run_with_initialized_temp_db(run_case)
+        self.assertEqual(first["locations"], {"31.23,121.47": "warmed", "39.90,116.40": "warmed"})
+        self.assertEqual(second["locations"], {"31.23,121.47": "cached", "39.90,116.40": "cached"})
+        self.assertEqual(len(upstream_calls), 2)
+        self.assertEqual(warmed["payload"]["obsTime"], "2026-04-10T10:58")
+        self.assertEqual(first_horoscope["signs"], {"leo": "done"})
+        self.assertEqual(second_horoscope["signs"], {"leo": "done"})
+        self.assertEqual(reasoning_calls, ["leo"])
+
+        status = prewarm_service.get_prewarm_status()
+        self.assertEqual(status["last_horoscope_run"]["signs"], {"leo": "done"})
+        self.assertGreaterEqual(status["weather_warmed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
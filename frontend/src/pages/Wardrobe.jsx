@@ -154,7 +154,11 @@ export default function Wardrobe() {
                                     >
                                         <div className="relative aspect-square bg-zinc-100 dark:bg-zinc-800 p-4 flex items-center justify-center overflow-hidden">
                                             <img
-                                                src={toImageUrl(item.image_url)}
+                                                src={toImageUrl(item.image_variants?.medium || item.image_url)}
+                                                srcSet={item.image_variants?.thumb
+                                                    ? `${toImageUrl(item.image_variants.thumb)} 256w, ${toImageUrl(item.image_variants.medium)} 768w`
+                                                    : undefined}
+                                                sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                                                 alt={item.item}
                                                 loading="lazy"
                                                 className="w-full h-full object-contain drop-shadow-sm group-hover:scale-105 transition-transform duration-500"